@@ -1,13 +1,90 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from strawberry.fastapi import GraphQLRouter
-from schema import schema
+from fastapi.requests import HTTPConnection
+from fastapi.responses import PlainTextResponse
+from schema import schema, get_loaders, transmissor
+import cache
+import barramento
+from busca import indice_oportunidades
+from database_config import SessaoDaRequisicao, engine, replicas, monitorar_replicas
+from pool import estatisticas_pool
+import metricas
+from consultas_persistidas import GraphQLRouterPersistido
+from compressao import Compressao
 import os
 
+#enquanto a API está no ar, a saúde das réplicas de leitura é verificada em segundo plano
+#e o barramento (com vários workers) leva as alterações deste worker para os outros
+@asynccontextmanager
+async def ciclo_de_vida(app):
+    tarefa = asyncio.create_task(monitorar_replicas()) if replicas else None
+    if barramento.barramento is not None:
+        await barramento.barramento.iniciar()
+    #o índice da busca é carregado antes da primeira requisição, para ela não pagar a leitura das tabelas inteiras
+    await indice_oportunidades.atualizar()
+    yield
+    if tarefa is not None:
+        tarefa.cancel()
+    if barramento.barramento is not None:
+        await barramento.barramento.parar()
+
 # Criando a instância do FastAPI
-app = FastAPI()
+app = FastAPI(lifespan=ciclo_de_vida)
+#as respostas grandes do /graphql (ex: getEstagios com as descrições) saem com gzip ou brotli
+app.add_middleware(Compressao, caminhos=("/graphql",))
+
+#cada requisição recebe os seus próprios dataloaders e uma sessão do banco compartilhada pelos resolvers dela,
+#aberta só se alguém usar e fechada no fim da resposta; uma conexão WebSocket (subscriptions) dura muito tempo,
+#então nela cada leitura continua abrindo e fechando a sua sessão e os loaders são os de cada evento (ver loaders_de)
+async def get_context(conexao: HTTPConnection):
+    if conexao.scope["type"] == "websocket":
+        yield {}
+        return
+
+    sessao = SessaoDaRequisicao()
+    try:
+        yield {"loaders": get_loaders(), "sessao": sessao}
+    finally:
+        await sessao.fechar()
 
-# Adicionando a rota GraphQL
-graphql_app = GraphQLRouter(schema)
+# Adicionando a rota GraphQL (com suporte a queries persistidas)
+graphql_app = GraphQLRouterPersistido(schema, context_getter=get_context)
 app.include_router(graphql_app, prefix="/graphql")
-print(f"API GraphQL rodando com PID: {os.getpid()}")
 
+#contadores do cache de respostas (acertos, falhas, despejos...) para ajustar o tamanho dele
+@app.get("/estatisticas/cache")
+async def estatisticas_cache():
+    return cache.cache_respostas.estatisticas()
+
+#uso do pool de conexões e tempo de espera por uma conexão, para separar lentidão do banco de falta de conexões
+@app.get("/estatisticas/pool")
+async def estatisticas_do_pool():
+    return {
+        "primario": estatisticas_pool(engine),
+        "replicas": [
+            {"url": replica.url, "saudavel": replica.saudavel, "falhas": replica.falhas, **estatisticas_pool(replica.engine)}
+            for replica in replicas
+        ],
+    }
+
+#mensagens publicadas, recebidas e perdidas pelo barramento de alterações, e o atraso da entrega
+@app.get("/estatisticas/barramento")
+async def estatisticas_barramento():
+    return barramento.barramento.estatisticas() if barramento.barramento is not None else {"backend": None}
+
+#latência por operação e por resolver, SQL por requisição, erros e uso de CPU/memória do processo (formato Prometheus)
+@app.get("/metrics", response_class=PlainTextResponse)
+async def exportar_metricas():
+    extras = [
+        ("cache_respostas", cache.cache_respostas.estatisticas()),
+        ("pool", estatisticas_pool(engine)),
+        ("transmissao", transmissor.estatisticas()),
+        *((f"pool_replica_{numero}", {"saudavel": int(replica.saudavel), **estatisticas_pool(replica.engine)})
+          for numero, replica in enumerate(replicas)),
+    ]
+    if barramento.barramento is not None:
+        extras.append(("barramento", barramento.barramento.estatisticas()))
+    return metricas.exportar(extras)
+
+print(f"API GraphQL rodando com PID: {os.getpid()}")
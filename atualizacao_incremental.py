@@ -0,0 +1,68 @@
+import asyncio
+from typing import Optional
+from database_config import get_session
+
+
+#base das estruturas em memória mantidas pelas mutations (o índice da busca e os agregados das estatísticas):
+#as alterações avisadas pelo eventos.py só marcam o que mudou, e a próxima leitura relê do banco só essas linhas
+#(ou a tabela inteira, quando a alteração não diz o id). As subclasses dizem como ler as linhas de uma tabela e
+#como tirar da estrutura uma linha (o documento é (tabela, id)) ou uma tabela inteira
+class AtualizacaoIncremental:
+    def __init__(self, tabelas):
+        self.tabelas = tabelas
+        self.carregado = False
+        self.pendentes = {tabela: set() for tabela in tabelas}
+        self.tabelas_inteiras = set()
+        self.trava = asyncio.Lock()
+
+    def marcar(self, tabela: str, id: Optional[int]):
+        if id is None:
+            self.tabelas_inteiras.add(tabela)
+        else:
+            self.pendentes[tabela].add(id)
+
+    #registrado com ouvir() por quem cria a estrutura
+    def alteracao(self, alteracao):
+        if alteracao.tabela in self.tabelas:
+            self.marcar(alteracao.tabela, alteracao.id)
+
+    #lê as linhas da tabela (só as dos ids, quando informados) para a estrutura e devolve os ids encontrados
+    async def ler(self, session, tabela: str, ids=None) -> set:
+        raise NotImplementedError
+
+    def remover(self, documento):
+        raise NotImplementedError
+
+    def remover_tabela(self, tabela: str):
+        raise NotImplementedError
+
+    async def atualizar(self):
+        if self.carregado and not self.tabelas_inteiras and not any(self.pendentes.values()):
+            return
+
+        #lido do banco principal, senão uma réplica atrasada faria uma linha nova parecer deletada
+        async with self.trava:
+            async with get_session(primario=True, propria=True) as session:
+                if not self.carregado:
+                    for tabela in self.tabelas:
+                        self.pendentes[tabela].clear()
+                        await self.ler(session, tabela)
+                    self.tabelas_inteiras.clear()
+                    self.carregado = True
+                    return
+
+                for tabela in list(self.tabelas_inteiras):
+                    self.tabelas_inteiras.discard(tabela)
+                    self.pendentes[tabela].clear()
+                    self.remover_tabela(tabela)
+                    await self.ler(session, tabela)
+
+                for tabela, pendentes in self.pendentes.items():
+                    if not pendentes:
+                        continue
+                    ids = list(pendentes)
+                    pendentes.clear()
+                    encontrados = await self.ler(session, tabela, ids)
+                    #os ids que não voltaram do banco foram deletados
+                    for id in set(ids) - encontrados:
+                        self.remover((tabela, id))
@@ -0,0 +1,218 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from eventos import Alteracao, notificar, ouvir
+from metricas import Histograma, LIMITES_LATENCIA
+from models import Base
+
+logger = logging.getLogger("barramento")
+
+#com vários workers, cada um tem os seus caches em memória (respostas, busca, estatísticas, ETags); o barramento leva
+#as alterações feitas num worker para todos os outros. Vazio desliga (um processo só); sqlite:///caminho.db serve para
+#testes e várias instâncias na mesma máquina; redis://host:6379/0 é o usado em produção
+BARRAMENTO = os.getenv("BARRAMENTO", "")
+CANAL = os.getenv("BARRAMENTO_CANAL", "alteracoes")
+#intervalo (em segundos) entre as leituras do backend SQLite e por quanto tempo as mensagens ficam guardadas nele
+INTERVALO_SQLITE = float(os.getenv("BARRAMENTO_INTERVALO", "0.05"))
+RETENCAO_SQLITE = float(os.getenv("BARRAMENTO_RETENCAO", "60"))
+
+
+#parte comum dos backends: numeração das mensagens, fila de envio, métricas e aplicação das alterações recebidas
+#cada backend implementa enviar(texto), receber() (gerador assíncrono de textos) e fechar()
+class Barramento:
+    def __init__(self):
+        self.origem = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.sequencia = 0
+        self.fila = None
+        self.tarefas = []
+        self.ultimas = {}       #origem -> última sequência recebida dela
+        self.publicadas = 0
+        self.falhas_envio = 0
+        self.recebidas = 0
+        self.perdidas = 0       #buracos na sequência de alguma origem
+        self.erros_recebimento = 0
+        self.atraso = Histograma(LIMITES_LATENCIA)
+        self.atraso_maximo = 0.0
+
+    #chamado pelas mutations (pelo eventos.py), então só coloca a mensagem na fila
+    def publicar(self, alteracao: Alteracao):
+        if alteracao.origem is not None or self.fila is None:
+            return
+        self.sequencia += 1
+        self.fila.put_nowait(json.dumps({
+            "origem": self.origem,
+            "sequencia": self.sequencia,
+            "enviado_em": time.time(),
+            "tabela": alteracao.tabela,
+            "acao": alteracao.acao,
+            "id": alteracao.id,
+        }, separators=(",", ":")))
+
+    async def enviar_fila(self):
+        while True:
+            texto = await self.fila.get()
+            try:
+                await self.enviar(texto)
+                self.publicadas += 1
+            except Exception as e:
+                self.falhas_envio += 1
+                logger.warning("Falha ao publicar uma alteração no barramento: %s", e)
+
+    async def ouvir_backend(self):
+        while True:
+            try:
+                async for texto in self.receber():
+                    self.tratar(texto)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.erros_recebimento += 1
+                logger.warning("Erro lendo o barramento, tentando de novo: %s", e)
+                await asyncio.sleep(1)
+
+    def tratar(self, texto):
+        mensagem = json.loads(texto)
+        origem = mensagem["origem"]
+        if origem == self.origem:
+            return
+
+        atraso = max(time.time() - mensagem["enviado_em"], 0.0)
+        self.atraso.observar(atraso)
+        self.atraso_maximo = max(self.atraso_maximo, atraso)
+        self.recebidas += 1
+
+        anterior = self.ultimas.get(origem)
+        if anterior is not None and mensagem["sequencia"] <= anterior:
+            return
+        self.ultimas[origem] = mensagem["sequencia"]
+        if anterior is not None and mensagem["sequencia"] > anterior + 1:
+            #sem saber o que se perdeu, todas as tabelas são tratadas como alteradas
+            self.perdidas += mensagem["sequencia"] - anterior - 1
+            logger.warning("%d alterações de %s se perderam no barramento", mensagem["sequencia"] - anterior - 1, origem)
+            for tabela in Base.metadata.tables:
+                notificar(Alteracao(tabela, "atualizar", None, origem))
+
+        notificar(Alteracao(mensagem["tabela"], mensagem["acao"], mensagem["id"], origem))
+
+    async def iniciar(self):
+        self.fila = asyncio.Queue()
+        self.tarefas = [asyncio.create_task(self.enviar_fila()), asyncio.create_task(self.ouvir_backend())]
+
+    async def parar(self):
+        for tarefa in self.tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*self.tarefas, return_exceptions=True)
+        self.fila = None
+        await self.fechar()
+
+    def estatisticas(self):
+        return {
+            "backend": type(self).__name__,
+            "origem": self.origem,
+            "publicadas": self.publicadas,
+            "falhas_envio": self.falhas_envio,
+            "pendentes": self.fila.qsize() if self.fila is not None else 0,
+            "recebidas": self.recebidas,
+            "perdidas": self.perdidas,
+            "erros_recebimento": self.erros_recebimento,
+            "atraso_medio": self.atraso.soma / self.atraso.quantidade if self.atraso.quantidade else 0.0,
+            "atraso_maximo": self.atraso_maximo,
+        }
+
+
+#as mensagens ficam numa tabela de um arquivo SQLite que todos os workers leem de tempos em tempos
+class BarramentoSQLite(Barramento):
+    def __init__(self, caminho: str, canal: str = CANAL):
+        super().__init__()
+        self.canal = canal
+        self.trava = threading.Lock()
+        self.conexao = sqlite3.connect(caminho, timeout=5, isolation_level=None, check_same_thread=False)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute(
+            "CREATE TABLE IF NOT EXISTS barramento "
+            "(seq INTEGER PRIMARY KEY AUTOINCREMENT, canal TEXT, criado_em REAL, corpo TEXT)"
+        )
+
+    def executar(self, sql, parametros=()):
+        with self.trava:
+            return self.conexao.execute(sql, parametros).fetchall()
+
+    def inserir(self, texto):
+        agora = time.time()
+        self.executar("INSERT INTO barramento (canal, criado_em, corpo) VALUES (?, ?, ?)", (self.canal, agora, texto))
+        if self.sequencia % 100 == 0:
+            self.executar("DELETE FROM barramento WHERE criado_em < ?", (agora - RETENCAO_SQLITE,))
+
+    async def enviar(self, texto):
+        await asyncio.to_thread(self.inserir, texto)
+
+    async def receber(self):
+        #só as mensagens publicadas depois que o worker subiu interessam
+        ultimo = (await asyncio.to_thread(self.executar, "SELECT COALESCE(MAX(seq), 0) FROM barramento"))[0][0]
+        while True:
+            linhas = await asyncio.to_thread(
+                self.executar, "SELECT seq, corpo FROM barramento WHERE canal = ? AND seq > ? ORDER BY seq", (self.canal, ultimo))
+            for seq, corpo in linhas:
+                ultimo = seq
+                yield corpo
+            await asyncio.sleep(INTERVALO_SQLITE)
+
+    async def fechar(self):
+        self.conexao.close()
+
+
+#pub/sub de um servidor compatível com Redis; precisa do pacote redis
+class BarramentoRedis(Barramento):
+    def __init__(self, url: str, canal: str = CANAL):
+        super().__init__()
+        try:
+            from redis import asyncio as aioredis
+        except ImportError:
+            raise Exception("BARRAMENTO=redis:// precisa do pacote redis (pip install redis)")
+        self.canal = canal
+        self.cliente = aioredis.from_url(url)
+
+    async def enviar(self, texto):
+        await self.cliente.publish(self.canal, texto)
+
+    async def receber(self):
+        pubsub = self.cliente.pubsub()
+        await pubsub.subscribe(self.canal)
+        try:
+            async for mensagem in pubsub.listen():
+                if mensagem["type"] == "message":
+                    yield mensagem["data"]
+        finally:
+            await pubsub.aclose()
+
+    async def fechar(self):
+        await self.cliente.aclose()
+
+
+def criar_barramento(url: str):
+    if not url:
+        return None
+    if url.startswith("sqlite:///"):
+        return BarramentoSQLite(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return BarramentoRedis(url)
+    raise Exception(f"Backend de barramento desconhecido: {url}")
+
+
+barramento = criar_barramento(BARRAMENTO)
+
+#permite trocar o backend (ex: nos testes, um arquivo SQLite temporário)
+def configurar_barramento(backend):
+    global barramento
+    barramento = backend
+
+@ouvir
+def publicar_alteracao(alteracao):
+    if barramento is not None:
+        barramento.publicar(alteracao)
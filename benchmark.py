@@ -0,0 +1,437 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+
+#benchmark da API: cria um banco SQLite com dados gerados a partir de uma seed, roda a aplicação ASGI no mesmo
+#processo com vários clientes simultâneos e salva vazão e latências (p50/p95/p99) por operação num JSON
+#
+#   python benchmark.py --escala 10k --clientes 20 --duracao 30 --saida antes.json
+#   python benchmark.py --comparar antes.json depois.json
+#   python benchmark.py --medir-conversores   (CPU e memória para transformar 10k linhas nos tipos do GraphQL)
+#   python benchmark.py --medir-serializacao  (CPU x bytes do json/orjson e do gzip/brotli nas maiores respostas)
+
+ESCALAS = {"10k": 10_000, "100k": 100_000, "1M": 1_000_000}
+VERTENTES = ["Telecomunicações", "Ciência da Computação", "Automação"]
+NIVEIS = ["Básico", "Intermediário", "Avançado"]
+ESTADOS = ["SP", "RJ", "MG", "RS", "PR", "BA", "PE", "SC", "GO", "DF"]
+TAMANHO_BLOCO = 10_000
+
+
+def tamanhos(escala: int):
+    #a escala é a quantidade de estágios; as outras tabelas são proporcionais a ela
+    return {
+        "endereco": max(escala // 10, 1),
+        "empresa": max(escala // 10, 1),
+        "plataforma": max(escala // 100, 1),
+        "professor": max(escala // 20, 1),
+        "estagio": escala,
+        "bolsa": escala,
+        "curso": escala,
+    }
+
+def gerar_linhas(tabela, inicio, fim, quantidades, seed):
+    rng = random.Random(f"{seed}-{tabela}-{inicio}")
+    hoje = date(2025, 1, 1)
+    linhas = []
+    for i in range(inicio, fim):
+        dias = rng.randint(0, 365)
+        data_inicio = hoje + timedelta(days=dias)
+        data_fim = data_inicio + timedelta(days=rng.randint(30, 730))
+        remunerado = rng.random() < 0.7
+        if tabela == "endereco":
+            linhas.append({"rua": f"Rua {i}", "numero": rng.randint(1, 1000), "bairro": f"Bairro {i % 500}",
+                           "cidade": f"Cidade {i % 1000}", "estado": rng.choice(ESTADOS), "cep": f"{rng.randint(0, 99999999):08d}"})
+        elif tabela == "empresa":
+            linhas.append({"nome": f"Empresa {i}", "vertente": rng.choice(VERTENTES), "CNPJ": f"{i:014d}",
+                           "endereco_id": rng.randint(1, quantidades["endereco"]), "telefone": "11999999999",
+                           "email": f"contato{i}@empresa.com", "website": f"https://empresa{i}.com", "status": rng.random() < 0.9})
+        elif tabela == "plataforma":
+            linhas.append({"nome": f"Plataforma {i}", "email": f"contato{i}@plataforma.com",
+                           "website": f"https://plataforma{i}.com", "tipo": rng.random() < 0.5})
+        elif tabela == "professor":
+            linhas.append({"nome": f"Professor {i}", "vertente": rng.choice(VERTENTES), "telefone": "11999999999",
+                           "email": f"professor{i}@universidade.br", "website": f"https://professor{i}.br", "formacao": "PhD"})
+        elif tabela == "estagio":
+            linhas.append({"nome": f"Estágio {i}", "vertente": rng.choice(VERTENTES), "remunerado": remunerado,
+                           "salario": round(rng.uniform(800, 3000), 2) if remunerado else None,
+                           "empresa_id": rng.randint(1, quantidades["empresa"]), "horas_semanais": rng.choice([20, 30, 40]),
+                           "descricao": f"Descrição do estágio {i}", "data_inicio": data_inicio, "data_fim": data_fim})
+        elif tabela == "bolsa":
+            linhas.append({"nome": f"Bolsa {i}", "vertente": rng.choice(VERTENTES), "remunerado": remunerado,
+                           "salario": round(rng.uniform(400, 2200), 2) if remunerado else None,
+                           "horas_semanais": rng.choice([10, 20, 40]), "quantidade_vagas": rng.randint(1, 10),
+                           "descricao": f"Descrição da bolsa {i}", "data_inicio": data_inicio, "data_fim": data_fim,
+                           "professor_id": rng.randint(1, quantidades["professor"])})
+        elif tabela == "curso":
+            pago = rng.random() < 0.5
+            linhas.append({"nome": f"Curso {i}", "categoria": "Pago" if pago else "Gratuito",
+                           "preco": round(rng.uniform(50, 900), 2) if pago else None,
+                           "plataforma_id": rng.randint(1, quantidades["plataforma"]), "nivel": rng.choice(NIVEIS),
+                           "vertente": rng.choice(VERTENTES), "data_inicio": data_inicio, "data_fim": data_fim})
+    return linhas
+
+async def criar_banco(caminho, escala, seed):
+    from sqlalchemy import insert, select
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from geografia import linha_geocodificada
+    from models import Base, CepGeocodificado, Endereco
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{caminho}")
+    quantidades = tamanhos(escala)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        for tabela, quantidade in quantidades.items():
+            modelo = Base.metadata.tables[tabela]
+            for inicio in range(0, quantidade, TAMANHO_BLOCO):
+                fim = min(inicio + TAMANHO_BLOCO, quantidade)
+                await conn.execute(insert(modelo), gerar_linhas(tabela, inicio, fim, quantidades, seed))
+            print(f"  {tabela}: {quantidade} linhas")
+
+        #coordenadas dos CEPs dos endereços, para a busca por proximidade
+        rng = random.Random(f"{seed}-cep")
+        ceps = (await conn.execute(select(Endereco.cep).distinct())).scalars().all()
+        linhas = [linha_geocodificada(cep, rng.uniform(-33.7, 5.2), rng.uniform(-73.9, -34.8)) for cep in ceps]
+        for inicio in range(0, len(linhas), TAMANHO_BLOCO):
+            await conn.execute(insert(CepGeocodificado.__table__), linhas[inicio:inicio + TAMANHO_BLOCO])
+        print(f"  cep_geocodificado: {len(linhas)} linhas")
+    await engine.dispose()
+
+
+#cada operação da mistura: (nome, peso, função que monta query e variáveis)
+def operacoes(quantidades):
+    def estagios_pagina(rng):
+        return "query EstagiosPagina($f:Int){ estagios(first:$f){ edges{ node{ id nome salario empresa{ nome } } } pageInfo{ hasNextPage endCursor } } }", {"f": 20}
+
+    def estagios_filtro(rng):
+        return ("query EstagiosFiltro($v:String,$min:Float){ estagios(first:20, ordem:{campo:SALARIO, direcao:DESC}, filtro:{vertente:$v, salario:{minimo:$min}}){ edges{ node{ id nome salario dataFim } } } }",
+                {"v": rng.choice(VERTENTES), "min": rng.choice([1000, 1500, 2000])})
+
+    def estagios_empresa(rng):
+        return "query EstagiosDaEmpresa($e:Int){ getEstagios(filtro:{empresaId:$e}){ id nome salario remunerado } }", {"e": rng.randint(1, quantidades["empresa"])}
+
+    def estagios_por_local(rng):
+        return ("query EstagiosPorLocal($c:String,$e:String){ estagios(first:20, filtro:{localizacao:{cidade:$c, estado:$e}}){ edges{ node{ id nome empresa{ nome } } } } }",
+                {"c": f"Cidade {rng.randrange(1000)}", "e": rng.choice(ESTADOS)})
+
+    def estagios_no_raio(rng):
+        return ("query EstagiosNoRaio($la:Float!,$lo:Float!){ estagios(first:20, filtro:{localizacao:{raio:{latitude:$la, longitude:$lo, km:50}}}){ edges{ node{ id nome } } } }",
+                {"la": rng.uniform(-33.7, 5.2), "lo": rng.uniform(-73.9, -34.8)})
+
+    def estagio_por_id(rng):
+        return "query EstagioPorId($id:Int!){ getIdEstagios(input:{id:$id}){ id nome descricao empresa{ nome endereco{ cidade estado } } } }", {"id": rng.randint(1, quantidades["estagio"])}
+
+    def bolsa_por_id(rng):
+        return "query BolsaPorId($id:Int!){ getIdBolsas(input:{id:$id}){ id nome salario professor{ nome email } } }", {"id": rng.randint(1, quantidades["bolsa"])}
+
+    def cursos_pagina(rng):
+        return "query CursosPagina{ cursos(first:20, ordem:{campo:DATA_INICIO}){ edges{ node{ id nome preco plataforma{ nome } } } } }", {}
+
+    def criar_estagio(rng):
+        return ("mutation CriarEstagio($i:EstagioInputCreate!){ criarEstagio(input:$i){ id } }",
+                {"i": {"nome": "Estágio benchmark", "vertente": rng.choice(VERTENTES), "salario": 1500.0, "remunerado": True,
+                       "empresaId": rng.randint(1, quantidades["empresa"]), "dataInicio": "2025-03-01", "dataFim": "2025-12-01"}})
+
+    def atualizar_estagio(rng):
+        return ("mutation AtualizarEstagio($i:EstagioUpdateInput!){ updateEstagio(input:$i){ id salario } }",
+                {"i": {"id": rng.randint(1, quantidades["estagio"]), "salario": round(rng.uniform(800, 3000), 2)}})
+
+    def criar_estagios(rng):
+        return ("mutation CriarEstagios($i:[EstagioInputCreate!]!){ criarEstagios(inputs:$i){ itens{ indice elemento{ id } } erros{ indice } } }",
+                {"i": [{"nome": f"Lote {k}", "vertente": rng.choice(VERTENTES), "empresaId": rng.randint(1, quantidades["empresa"])} for k in range(50)]})
+
+    return [
+        ("EstagiosPagina", 25, estagios_pagina),
+        ("EstagiosFiltro", 15, estagios_filtro),
+        ("EstagiosDaEmpresa", 10, estagios_empresa),
+        ("EstagiosPorLocal", 4, estagios_por_local),
+        ("EstagiosNoRaio", 2, estagios_no_raio),
+        ("EstagioPorId", 20, estagio_por_id),
+        ("BolsaPorId", 10, bolsa_por_id),
+        ("CursosPagina", 10, cursos_pagina),
+        ("CriarEstagio", 5, criar_estagio),
+        ("AtualizarEstagio", 3, atualizar_estagio),
+        ("CriarEstagios", 2, criar_estagios),
+    ]
+
+
+def percentil(ordenadas, p):
+    if not ordenadas:
+        return 0.0
+    posicao = min(len(ordenadas) - 1, max(0, round(p / 100 * len(ordenadas) + 0.5) - 1))
+    return ordenadas[posicao]
+
+def resumir(amostras, erros, duracao):
+    resumo = {}
+    for nome in sorted(set(amostras) | set(erros)):
+        ordenadas = sorted(amostras.get(nome, []))
+        resumo[nome] = {
+            "requisicoes": len(ordenadas),
+            "erros": erros.get(nome, 0),
+            "rps": len(ordenadas) / duracao,
+            "media_ms": sum(ordenadas) / len(ordenadas) * 1000 if ordenadas else 0.0,
+            "p50_ms": percentil(ordenadas, 50) * 1000,
+            "p95_ms": percentil(ordenadas, 95) * 1000,
+            "p99_ms": percentil(ordenadas, 99) * 1000,
+            "max_ms": ordenadas[-1] * 1000 if ordenadas else 0.0,
+        }
+    return resumo
+
+async def rodar_carga(app, quantidades, clientes, duracao, aquecimento, seed):
+    import httpx
+
+    mistura = operacoes(quantidades)
+    pesos = [peso for _, peso, _ in mistura]
+    amostras, erros = {}, {}
+    medindo = False
+
+    async def cliente(numero, ate):
+        rng = random.Random(f"{seed}-cliente-{numero}")
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=60) as http:
+            while time.perf_counter() < ate:
+                nome, _, montar = rng.choices(mistura, weights=pesos)[0]
+                query, variaveis = montar(rng)
+                inicio = time.perf_counter()
+                resposta = await http.post("/graphql", json={"query": query, "variables": variaveis})
+                latencia = time.perf_counter() - inicio
+                if not medindo:
+                    continue
+                if resposta.status_code != 200 or resposta.json().get("errors"):
+                    erros[nome] = erros.get(nome, 0) + 1
+                else:
+                    amostras.setdefault(nome, []).append(latencia)
+
+    if aquecimento > 0:
+        ate = time.perf_counter() + aquecimento
+        await asyncio.gather(*(cliente(i, ate) for i in range(clientes)))
+
+    medindo = True
+    inicio = time.perf_counter()
+    ate = inicio + duracao
+    await asyncio.gather(*(cliente(i, ate) for i in range(clientes)))
+    return amostras, erros, time.perf_counter() - inicio
+
+
+#compara a leitura pelo ORM (objetos com identity map, lidos atributo a atributo) com a leitura de colunas pelo Core
+#usando o conversor gerado; mede tempo de CPU e pico de memória alocada para cada 10k linhas
+async def medir_conversores(caminho, linhas, repeticoes):
+    import tracemalloc
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from models import Estagio
+    from operator import attrgetter
+    from projecao import colunas_do_tipo, converter_linhas
+    from schema import EstagioType
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{caminho}")
+    colunas = colunas_do_tipo(Estagio, EstagioType)
+    converter = converter_linhas(EstagioType, colunas)
+
+    async def pelo_orm():
+        valores = attrgetter(*(coluna.key for coluna in colunas))
+        async with AsyncSession(engine) as session:
+            resultado = await session.execute(select(Estagio).limit(linhas))
+            return [converter(valores(objeto)) for objeto in resultado.scalars().all()]
+
+    async def pelo_core():
+        async with AsyncSession(engine) as session:
+            resultado = await session.execute(select(*colunas).limit(linhas))
+            return [converter(row) for row in resultado]
+
+    medidas = {}
+    for nome, funcao in (("orm", pelo_orm), ("core", pelo_core)):
+        await funcao()
+        inicio = time.process_time()
+        for _ in range(repeticoes):
+            quantidade = len(await funcao())
+        cpu = (time.process_time() - inicio) / repeticoes
+
+        tracemalloc.start()
+        await funcao()
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        escala = 10_000 / quantidade
+        medidas[nome] = {"linhas": quantidade, "cpu_ms_por_10k": cpu * 1000 * escala, "pico_kib_por_10k": pico / 1024 * escala}
+    await engine.dispose()
+    return medidas
+
+#as maiores respostas da API, usadas para comparar os serializadores e os níveis de compressão
+CONSULTAS_GRANDES = {
+    "getEstagios": "{ getEstagios { id nome vertente salario empresaId remunerado horasSemanais descricao dataInicio dataFim } }",
+    "getBolsas": "{ getBolsas { id nome vertente salario descricao quantidadeVagas dataInicio dataFim } }",
+    "estagios(first: 100)": "{ estagios(first: 100) { edges { node { id nome descricao dataFim empresa { nome } } } } }",
+}
+
+def medir_cpu(funcao, repeticoes):
+    inicio = time.process_time()
+    for _ in range(repeticoes):
+        resultado = funcao()
+    return (time.process_time() - inicio) / repeticoes * 1000, resultado
+
+async def medir_serializacao(repeticoes):
+    import httpx
+    import orjson
+    from app import app
+    from compressao import brotli, comprimir
+
+    codecs = [("gzip", 1), ("gzip", 4), ("gzip", 6), ("gzip", 9)]
+    if brotli is not None:
+        codecs += [("br", 1), ("br", 5), ("br", 11)]
+
+    medidas = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark") as cliente:
+        for nome, query in CONSULTAS_GRANDES.items():
+            resposta = await cliente.post("/graphql", json={"query": query}, headers={"accept-encoding": "identity"})
+            dados = resposta.json()
+            json_ms, corpo = medir_cpu(lambda: json.dumps(dados, separators=(",", ":")).encode(), repeticoes)
+            orjson_ms, _ = medir_cpu(lambda: orjson.dumps(dados), repeticoes)
+            medidas[nome] = {"bytes": len(corpo), "json_ms": json_ms, "orjson_ms": orjson_ms, "compressao": {}}
+            for codificacao, nivel in codecs:
+                cpu_ms, comprimido = medir_cpu(lambda: comprimir(codificacao, corpo, nivel), repeticoes)
+                medidas[nome]["compressao"][f"{codificacao}-{nivel}"] = {"bytes": len(comprimido), "cpu_ms": cpu_ms}
+    return medidas
+
+def executar_serializacao(args):
+    escala = ESCALAS.get(args.escala) or int(args.escala)
+    base = banco_base(args, escala)
+    os.environ["DATABASE"] = f"sqlite+aiosqlite:///{base}"
+    os.environ["CACHE_RESPOSTAS"] = "0"
+    medidas = asyncio.run(medir_serializacao(repeticoes=5))
+
+    for nome, dados in medidas.items():
+        print(f"{nome}: {dados['bytes'] / 1024:.0f} KiB, json {dados['json_ms']:.1f} ms, orjson {dados['orjson_ms']:.1f} ms "
+              f"({dados['json_ms'] / max(dados['orjson_ms'], 1e-9):.1f}x)")
+        print(f"  {'compressão':<12}{'KiB':>10}{'razão':>8}{'CPU ms':>10}")
+        for codec, compressao in dados["compressao"].items():
+            print(f"  {codec:<12}{compressao['bytes'] / 1024:>10.0f}{dados['bytes'] / compressao['bytes']:>8.1f}{compressao['cpu_ms']:>10.1f}")
+    with open(args.saida, "w") as f:
+        json.dump({"escala": escala, "seed": args.seed, "serializacao": medidas}, f, indent=2, ensure_ascii=False)
+    print(f"Resultado salvo em {args.saida}")
+
+def versao_codigo():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def banco_base(args, escala):
+    os.makedirs(args.pasta, exist_ok=True)
+    base = os.path.join(args.pasta, f"base_{escala}_{args.seed}.db")
+    if not os.path.exists(base):
+        print(f"Criando o banco com escala {escala} (seed {args.seed})")
+        asyncio.run(criar_banco(base + ".tmp", escala, args.seed))
+        os.replace(base + ".tmp", base)
+    return base
+
+def executar_conversores(args):
+    escala = ESCALAS.get(args.escala) or int(args.escala)
+    base = banco_base(args, escala)
+    os.environ["DATABASE"] = f"sqlite+aiosqlite:///{base}"
+    medidas = asyncio.run(medir_conversores(base, min(escala, 10_000), repeticoes=5))
+
+    print(f"{'leitura':<10}{'linhas':>8}{'CPU ms/10k':>14}{'pico KiB/10k':>16}")
+    for nome, dados in medidas.items():
+        print(f"{nome:<10}{dados['linhas']:>8}{dados['cpu_ms_por_10k']:>14.1f}{dados['pico_kib_por_10k']:>16.0f}")
+    orm, core = medidas["orm"], medidas["core"]
+    print(f"core/orm: CPU {core['cpu_ms_por_10k'] / orm['cpu_ms_por_10k']:.2f}x, memória {core['pico_kib_por_10k'] / orm['pico_kib_por_10k']:.2f}x")
+
+def executar(args):
+    escala = ESCALAS.get(args.escala) or int(args.escala)
+    base = banco_base(args, escala)
+
+    #as mutations alteram o banco, então cada execução usa uma cópia do banco base
+    trabalho = os.path.join(args.pasta, "trabalho.db")
+    shutil.copyfile(base, trabalho)
+
+    #a aplicação lê a configuração do ambiente quando é importada
+    os.environ["DATABASE"] = f"sqlite+aiosqlite:///{trabalho}"
+    if args.sem_cache:
+        os.environ["CACHE_RESPOSTAS"] = "0"
+    from app import app
+
+    quantidades = tamanhos(escala)
+    print(f"Rodando {args.clientes} clientes por {args.duracao}s")
+    amostras, erros, duracao = asyncio.run(rodar_carga(app, quantidades, args.clientes, args.duracao, args.aquecimento, args.seed))
+
+    total = sum(len(lista) for lista in amostras.values())
+    resultado = {
+        "configuracao": {"escala": escala, "seed": args.seed, "clientes": args.clientes, "duracao": args.duracao,
+                         "aquecimento": args.aquecimento, "cache": not args.sem_cache},
+        "ambiente": {"python": platform.python_version(), "plataforma": platform.platform(), "commit": versao_codigo()},
+        "total": {"requisicoes": total, "erros": sum(erros.values()), "rps": total / duracao},
+        "operacoes": resumir(amostras, erros, duracao),
+    }
+    with open(args.saida, "w") as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+
+    imprimir(resultado)
+    print(f"Resultado salvo em {args.saida}")
+
+def imprimir(resultado):
+    print(f"{'operação':<20}{'req':>8}{'erros':>7}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for nome, dados in resultado["operacoes"].items():
+        print(f"{nome:<20}{dados['requisicoes']:>8}{dados['erros']:>7}{dados['rps']:>9.1f}"
+              f"{dados['p50_ms']:>10.2f}{dados['p95_ms']:>10.2f}{dados['p99_ms']:>10.2f}")
+    print(f"total: {resultado['total']['requisicoes']} requisições, {resultado['total']['rps']:.1f} req/s, {resultado['total']['erros']} erros")
+
+
+#compara duas execuções; a variação é de b em relação a a (latência positiva é piora, rps positivo é melhora)
+def comparar(caminho_a, caminho_b):
+    with open(caminho_a) as f:
+        a = json.load(f)
+    with open(caminho_b) as f:
+        b = json.load(f)
+
+    if a["configuracao"] != b["configuracao"]:
+        print(f"Atenção: configurações diferentes\n  {a['configuracao']}\n  {b['configuracao']}")
+
+    def variacao(antes, depois):
+        return f"{(depois - antes) / antes * 100:+.1f}%" if antes else "-"
+
+    print(f"{'operação':<20}{'rps':>18}{'p50 ms':>22}{'p95 ms':>22}{'p99 ms':>22}")
+    for nome in sorted(set(a["operacoes"]) | set(b["operacoes"])):
+        x = a["operacoes"].get(nome)
+        y = b["operacoes"].get(nome)
+        if x is None or y is None:
+            print(f"{nome:<20} só aparece em {'b' if x is None else 'a'}")
+            continue
+        colunas = [f"{y['rps']:.1f} ({variacao(x['rps'], y['rps'])})"]
+        for chave in ("p50_ms", "p95_ms", "p99_ms"):
+            colunas.append(f"{y[chave]:.2f} ({variacao(x[chave], y[chave])})")
+        print(f"{nome:<20}{colunas[0]:>18}{colunas[1]:>22}{colunas[2]:>22}{colunas[3]:>22}")
+    print(f"{'total':<20}{b['total']['rps']:.1f} req/s ({variacao(a['total']['rps'], b['total']['rps'])})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da API GraphQL")
+    parser.add_argument("--escala", default="10k", help="10k, 100k, 1M ou um número de estágios")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--clientes", type=int, default=20)
+    parser.add_argument("--duracao", type=float, default=30, help="segundos medidos")
+    parser.add_argument("--aquecimento", type=float, default=3, help="segundos rodando antes de medir")
+    parser.add_argument("--sem-cache", action="store_true", help="desliga o cache de respostas")
+    parser.add_argument("--pasta", default=".benchmark", help="onde ficam os bancos gerados")
+    parser.add_argument("--saida", default="benchmark.json")
+    parser.add_argument("--comparar", nargs=2, metavar=("A", "B"), help="compara dois resultados salvos")
+    parser.add_argument("--medir-conversores", action="store_true", help="mede ORM x Core com conversores gerados em 10k linhas")
+    parser.add_argument("--medir-serializacao", action="store_true", help="mede json x orjson e gzip x brotli nas maiores respostas")
+    args = parser.parse_args()
+
+    if args.comparar:
+        comparar(*args.comparar)
+        sys.exit(0)
+    if args.medir_conversores:
+        executar_conversores(args)
+        sys.exit(0)
+    if args.medir_serializacao:
+        executar_serializacao(args)
+        sys.exit(0)
+    executar(args)
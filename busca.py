@@ -0,0 +1,190 @@
+import base64
+import heapq
+import json
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import List, Optional
+from sqlalchemy import select
+from atualizacao_incremental import AtualizacaoIncremental
+from database_config import marcar_tabelas
+from eventos import ouvir
+from models import Bolsa, Curso, Estagio
+from paginacao import PAGINA_PADRAO, validar_tamanho
+
+#tabelas que entram na busca e as colunas indexadas de cada uma (o nome pesa mais que a descrição)
+TABELAS_BUSCA = {
+    "curso": (Curso, {"nome": 3, "nivel": 1, "categoria": 1, "vertente": 1}),
+    "estagio": (Estagio, {"nome": 3, "descricao": 1, "vertente": 1}),
+    "bolsa": (Bolsa, {"nome": 3, "descricao": 1, "vertente": 1}),
+}
+
+#parâmetros do BM25
+K1 = 1.2
+B = 0.75
+
+STOPWORDS = {
+    "a", "ao", "aos", "as", "com", "como", "da", "das", "de", "do", "dos", "e", "em", "entre", "na", "nas",
+    "no", "nos", "o", "os", "ou", "para", "pela", "pelas", "pelo", "pelos", "por", "que", "se", "sem",
+    "sua", "suas", "seu", "seus", "um", "uma", "umas", "uns",
+}
+
+
+def sem_acentos(texto: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFKD", texto) if not unicodedata.combining(c))
+
+#redução simples do plural, para "estágios" e "estagio" caírem no mesmo termo
+def radical(palavra: str) -> str:
+    if len(palavra) <= 3:
+        return palavra
+    for sufixo, troca in (("oes", "ao"), ("aes", "ao"), ("ais", "al"), ("eis", "el"), ("ns", "m"), ("res", "r")):
+        if palavra.endswith(sufixo):
+            return palavra[:-len(sufixo)] + troca
+    if palavra.endswith("s") and not palavra.endswith(("ss", "us", "is")):
+        return palavra[:-1]
+    return palavra
+
+#texto -> termos sem acento, em minúsculas, sem stopwords e sem plural
+def tokenizar(texto: Optional[str]) -> List[str]:
+    if not texto:
+        return []
+    palavras = re.findall(r"\w+", sem_acentos(texto).lower())
+    return [radical(palavra) for palavra in palavras if palavra not in STOPWORDS]
+
+
+#índice invertido em memória: termo -> {documento: frequência}; o documento é (tabela, id)
+class IndiceInvertido:
+    def __init__(self):
+        self.postings = {}
+        self.termos_do_documento = {}
+        self.tamanhos = {}
+        self.vertentes = {}
+        self.tamanho_total = 0
+
+    def adicionar(self, documento, termos: Counter, vertente: Optional[str]):
+        self.remover(documento)
+        for termo, frequencia in termos.items():
+            self.postings.setdefault(termo, {})[documento] = frequencia
+        self.termos_do_documento[documento] = tuple(termos)
+        tamanho = sum(termos.values())
+        self.tamanhos[documento] = tamanho
+        self.tamanho_total += tamanho
+        self.vertentes[documento] = vertente
+
+    def remover(self, documento):
+        termos = self.termos_do_documento.pop(documento, None)
+        if termos is None:
+            return
+        for termo in termos:
+            documentos = self.postings[termo]
+            del documentos[documento]
+            if not documentos:
+                del self.postings[termo]
+        self.tamanho_total -= self.tamanhos.pop(documento)
+        del self.vertentes[documento]
+
+    def remover_tabela(self, tabela: str):
+        for documento in [documento for documento in self.termos_do_documento if documento[0] == tabela]:
+            self.remover(documento)
+
+    #pontuação BM25 de cada documento que tem pelo menos um dos termos
+    def pontuar(self, termos: List[str], tabelas=None, vertente=None):
+        total = len(self.tamanhos)
+        if total == 0:
+            return {}
+        media = self.tamanho_total / total
+
+        pontos = {}
+        for termo in set(termos):
+            documentos = self.postings.get(termo)
+            if not documentos:
+                continue
+            idf = math.log(1 + (total - len(documentos) + 0.5) / (len(documentos) + 0.5))
+            for documento, frequencia in documentos.items():
+                if tabelas is not None and documento[0] not in tabelas:
+                    continue
+                if vertente is not None and self.vertentes[documento] != vertente:
+                    continue
+                normalizacao = frequencia + K1 * (1 - B + B * self.tamanhos[documento] / media)
+                pontos[documento] = pontos.get(documento, 0.0) + idf * frequencia * (K1 + 1) / normalizacao
+        return pontos
+
+
+def termos_da_linha(row, pesos: dict) -> Counter:
+    termos = Counter()
+    for coluna, peso in pesos.items():
+        for termo in tokenizar(getattr(row, coluna)):
+            termos[termo] += peso
+    return termos
+
+
+#o índice guarda os termos de nome/descrição de todos os cursos, estágios e bolsas na memória de cada worker
+#(na ordem de algumas centenas de bytes por linha) e a primeira carga lê as três tabelas inteiras; por isso ela
+#é feita na subida da API (ver ciclo_de_vida no app.py) e não na primeira busca
+class IndiceOportunidades(AtualizacaoIncremental):
+    def __init__(self):
+        super().__init__(TABELAS_BUSCA)
+        self.indice = IndiceInvertido()
+
+    async def ler(self, session, tabela: str, ids=None):
+        model_class, pesos = TABELAS_BUSCA[tabela]
+        colunas = [model_class.id, *(getattr(model_class, coluna) for coluna in pesos)]
+        if "vertente" not in pesos:
+            colunas.append(model_class.vertente)
+        query = select(*colunas)
+        if ids is not None:
+            query = query.where(model_class.id.in_(ids))
+
+        encontrados = set()
+        resultado = await session.stream(query.execution_options(yield_per=5000))
+        async for row in resultado:
+            self.indice.adicionar((tabela, row.id), termos_da_linha(row, pesos), row.vertente)
+            encontrados.add(row.id)
+        return encontrados
+
+    def remover(self, documento):
+        self.indice.remover(documento)
+
+    def remover_tabela(self, tabela: str):
+        self.indice.remover_tabela(tabela)
+
+
+indice_oportunidades = IndiceOportunidades()
+ouvir(indice_oportunidades.alteracao)
+
+
+#o cursor guarda a posição do último resultado: (relevância, tabela, id)
+def codificar_cursor_busca(pontos: float, documento) -> str:
+    texto = json.dumps([pontos, documento[0], documento[1]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(texto.encode()).decode()
+
+def decodificar_cursor_busca(cursor: str):
+    try:
+        pontos, tabela, id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return -float(pontos), tabela, int(id)
+    except Exception:
+        raise Exception("Cursor inválido")
+
+#documentos ordenados por relevância (e por tabela e id nos empates), a partir do cursor
+async def buscar(texto: str, tabelas=None, vertente: Optional[str] = None,
+                 first: Optional[int] = None, after: Optional[str] = None):
+    validar_tamanho("first", first)
+    termos = tokenizar(texto)
+    if not termos:
+        raise Exception("O texto da busca não tem nenhuma palavra válida")
+
+    #as respostas da busca também são invalidadas quando essas tabelas mudam
+    marcar_tabelas(*(tabelas or TABELAS_BUSCA))
+    await indice_oportunidades.atualizar()
+    pontos = indice_oportunidades.indice.pontuar(termos, tabelas, vertente)
+
+    #só a página (mais um, para saber se tem próxima) é ordenada: O(M log página) em vez de ordenar os M resultados
+    chaves = ((-valor, documento[0], documento[1]) for documento, valor in pontos.items())
+    if after is not None:
+        posicao = decodificar_cursor_busca(after)
+        chaves = (chave for chave in chaves if chave > posicao)
+
+    tamanho = first or PAGINA_PADRAO
+    pagina = heapq.nsmallest(tamanho + 1, chaves)
+    return [(-chave[0], (chave[1], chave[2])) for chave in pagina[:tamanho]], len(pagina) > tamanho
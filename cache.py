@@ -0,0 +1,160 @@
+from collections import OrderedDict
+from functools import lru_cache
+import hashlib
+import json
+import os
+import time
+from graphql import ExecutionResult, parse, print_ast
+from strawberry.extensions import SchemaExtension
+from strawberry.types.graphql import OperationType
+from database_config import leitura_pode_estar_atrasada, marcar_tabelas, tabelas_consultadas
+from eventos import ouvir
+
+
+#cache em memória com LRU, TTL e tags (as tabelas que cada resposta leu)
+#outro backend pode ser usado desde que tenha os mesmos métodos (get, set, invalidar, estatisticas)
+class MemoriaCache:
+    def __init__(self, max_itens: int = 1000, ttl: float = 30):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self.itens = OrderedDict()   #chave -> (expira_em, valor, tags)
+        self.por_tag = {}            #tag -> chaves
+        self.geracao = 0
+        self.invalidada_em = {}      #tag -> geração da última invalidação
+        self.acertos = 0
+        self.falhas = 0
+        self.despejos = 0
+        self.expirados = 0
+        self.invalidados = 0
+
+    #usado para descobrir se alguma tag foi invalidada enquanto a resposta era calculada
+    def geracao_atual(self):
+        return self.geracao
+
+    def get(self, chave):
+        item = self.itens.get(chave)
+        if item is None:
+            self.falhas += 1
+            return None
+
+        expira_em, valor, tags = item
+        if expira_em < time.monotonic():
+            self._remover(chave)
+            self.expirados += 1
+            self.falhas += 1
+            return None
+
+        self.itens.move_to_end(chave)
+        self.acertos += 1
+        return valor
+
+    def set(self, chave, valor, tags, geracao_inicio=None):
+        if geracao_inicio is not None and any(self.invalidada_em.get(tag, -1) >= geracao_inicio for tag in tags):
+            return
+
+        if chave in self.itens:
+            self._remover(chave)
+        self.itens[chave] = (time.monotonic() + self.ttl, valor, tags)
+        for tag in tags:
+            self.por_tag.setdefault(tag, set()).add(chave)
+
+        while len(self.itens) > self.max_itens:
+            self._remover(next(iter(self.itens)))
+            self.despejos += 1
+
+    def invalidar(self, tags):
+        for tag in tags:
+            self.invalidada_em[tag] = self.geracao
+            for chave in self.por_tag.pop(tag, set()):
+                if chave in self.itens:
+                    self._remover(chave)
+                    self.invalidados += 1
+        self.geracao += 1
+
+    def _remover(self, chave):
+        _, _, tags = self.itens.pop(chave)
+        for tag in tags:
+            chaves = self.por_tag.get(tag)
+            if chaves is not None:
+                chaves.discard(chave)
+                if not chaves:
+                    del self.por_tag[tag]
+
+    def estatisticas(self):
+        return {
+            "itens": len(self.itens),
+            "max_itens": self.max_itens,
+            "ttl": self.ttl,
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "despejos": self.despejos,
+            "expirados": self.expirados,
+            "invalidados": self.invalidados,
+        }
+
+
+CACHE_ATIVO = os.getenv("CACHE_RESPOSTAS", "1") != "0"
+cache_respostas = MemoriaCache(
+    max_itens=int(os.getenv("CACHE_MAX_ITENS", "1000")),
+    ttl=float(os.getenv("CACHE_TTL", "30")),
+)
+
+#permite trocar o backend do cache (ex: um cache compartilhado entre processos)
+def configurar_cache(backend):
+    global cache_respostas
+    cache_respostas = backend
+
+@ouvir
+def invalidar_cache(alteracao):
+    cache_respostas.invalidar({alteracao.tabela})
+
+
+#o texto da query é normalizado (espaços, quebras de linha, vírgulas) para que queries iguais usem a mesma chave
+@lru_cache(maxsize=1024)
+def normalizar_query(query: str) -> str:
+    return print_ast(parse(query))
+
+def chave_cache(query: str, variaveis, nome_operacao) -> str:
+    texto = json.dumps(
+        [normalizar_query(query), variaveis or {}, nome_operacao],
+        sort_keys=True, default=str, separators=(",", ":"),
+    )
+    return hashlib.sha256(texto.encode()).hexdigest()
+
+
+#extensão que responde as queries direto do cache e guarda as respostas que não tiveram erro
+class CacheDeResposta(SchemaExtension):
+    async def on_execute(self):
+        contexto = self.execution_context
+        #um resultado já definido (ex: query recusada pela análise de custo) não passa pelo cache
+        if not CACHE_ATIVO or contexto.operation_type != OperationType.QUERY or contexto.result is not None:
+            yield
+            return
+
+        cache = cache_respostas
+        chave = chave_cache(contexto.query, contexto.variables, contexto.operation_name)
+        item = cache.get(chave)
+        if item is not None:
+            dados, tags = item
+            #quem está fora do cache (ex: o ETag do cache HTTP) também precisa saber quais tabelas a resposta leu
+            marcar_tabelas(*tags)
+            contexto.result = ExecutionResult(data=dados)
+            yield
+            return
+
+        geracao = cache.geracao_atual()
+        inicio = time.monotonic()
+        tabelas = set()
+        token = tabelas_consultadas.set(tabelas)
+        try:
+            yield
+        finally:
+            tabelas_consultadas.reset(token)
+        marcar_tabelas(*tabelas)
+
+        #respostas incrementais (@defer/@stream) não são guardadas
+        resultado = contexto.result
+        if (isinstance(resultado, ExecutionResult) and not resultado.errors and resultado.data is not None
+                and not leitura_pode_estar_atrasada(tabelas, inicio)):
+            tags = frozenset(tabelas)
+            cache.set(chave, (resultado.data, tags), tags, geracao)
@@ -0,0 +1,154 @@
+from enum import Enum
+import hashlib
+import json
+import os
+import time
+import strawberry
+from graphql import ExecutionResult, get_named_type
+from graphql.utilities import get_operation_ast
+from strawberry.extensions import SchemaExtension
+from strawberry.schema_directive import Location
+from strawberry.types.graphql import OperationType
+from cache import chave_cache
+from consultas_persistidas import LRU
+from custo import CalculoDeCusto
+from database_config import leitura_pode_estar_atrasada, tabelas_consultadas
+from eventos import ouvir
+
+#max-age dos campos raiz sem @cacheControl; 0 faz o cliente revalidar sempre (com o ETag, a revalidação é barata)
+MAX_AGE_PADRAO = int(os.getenv("CACHE_HTTP_MAX_AGE", "0"))
+
+
+@strawberry.enum
+class EscopoCache(Enum):
+    PUBLIC = "public"     #pode ficar na CDN
+    PRIVATE = "private"   #só no navegador do cliente
+
+#política de cache HTTP de um campo; a resposta fica com o menor max-age entre os campos selecionados
+@strawberry.schema_directive(locations=[Location.FIELD_DEFINITION], name="cacheControl")
+class CacheControl:
+    max_age: int
+    scope: EscopoCache = EscopoCache.PUBLIC
+
+
+def diretiva_do_campo(definicao):
+    campo = definicao.extensions.get("strawberry-definition")
+    for diretiva in getattr(campo, "directives", None) or ():
+        if isinstance(diretiva, CacheControl):
+            return diretiva
+    return None
+
+#(max-age, privado) da operação: os campos com a diretiva limitam o max-age e os campos raiz sem ela usam o padrão
+def politica_de_cache(schema, documento, operacao):
+    calculo = CalculoDeCusto(schema, documento, operacao, None)
+    max_age = None
+    privado = False
+
+    def visitar(tipo, selecoes, raiz):
+        nonlocal max_age, privado
+        for tipo_campo, no in calculo.campos(tipo, selecoes):
+            nome = no.name.value
+            if nome.startswith("__") or not hasattr(tipo_campo, "fields"):
+                continue
+            definicao = tipo_campo.fields.get(nome)
+            if definicao is None:
+                continue
+
+            diretiva = diretiva_do_campo(definicao)
+            if diretiva is not None:
+                max_age = diretiva.max_age if max_age is None else min(max_age, diretiva.max_age)
+                privado = privado or diretiva.scope == EscopoCache.PRIVATE
+            elif raiz:
+                max_age = MAX_AGE_PADRAO if max_age is None else min(max_age, MAX_AGE_PADRAO)
+
+            if no.selection_set is not None:
+                visitar(get_named_type(definicao.type), no.selection_set, False)
+
+    visitar(schema.query_type, operacao.selection_set, True)
+    return (MAX_AGE_PADRAO if max_age is None else max_age), privado
+
+def cabecalho_cache_control(max_age: int, privado: bool) -> str:
+    if max_age <= 0:
+        return "private, no-cache" if privado else "no-cache"
+    return f"{'private' if privado else 'public'}, max-age={max_age}"
+
+
+#o ETag é o hash do corpo da resposta, então os mesmos dados têm o mesmo ETag em qualquer worker (e depois de
+#um restart). Para responder 304 sem executar nada, cada processo lembra o ETag de cada consulta junto com a
+#versão das tabelas que ela leu; a versão é incrementada a cada mutation (as dos outros workers chegam pelo barramento)
+versoes = {}
+
+@ouvir
+def nova_versao(alteracao):
+    versoes[alteracao.tabela] = versoes.get(alteracao.tabela, 0) + 1
+
+#chave da consulta -> (ETag, {tabela: versão quando o ETag foi calculado})
+etags_por_consulta = LRU(int(os.getenv("CACHE_HTTP_MAX_CONSULTAS", "5000")))
+
+def calcular_etag(dados) -> str:
+    texto = json.dumps(dados, separators=(",", ":"), ensure_ascii=False, default=str)
+    return '"' + hashlib.sha256(texto.encode()).hexdigest()[:32] + '"'
+
+def etag_valido(item) -> bool:
+    _, versoes_tabelas = item
+    return all(versoes.get(tabela, 0) == versao for tabela, versao in versoes_tabelas.items())
+
+def etag_confere(cabecalho: str, etag: str) -> bool:
+    if cabecalho.strip() == "*":
+        return True
+    return etag in (valor.strip().removeprefix("W/") for valor in cabecalho.split(","))
+
+
+#queries por GET saem com Cache-Control e ETag; um If-None-Match que ainda vale recebe 304 sem rodar nenhum resolver
+class CacheHTTP(SchemaExtension):
+    def on_execute(self):
+        contexto = self.execution_context
+        request = contexto.context.get("request") if isinstance(contexto.context, dict) else None
+        response = contexto.context.get("response") if isinstance(contexto.context, dict) else None
+        #as operações pelo WebSocket também têm request (o próprio WebSocket), mas não têm método
+        if (contexto.operation_type != OperationType.QUERY or request is None or response is None
+                or getattr(request, "method", None) != "GET" or contexto.result is not None):
+            yield
+            return
+
+        operacao = get_operation_ast(contexto.graphql_document, contexto.operation_name)
+        if operacao is not None:
+            response.headers["Cache-Control"] = cabecalho_cache_control(
+                *politica_de_cache(contexto.schema._schema, contexto.graphql_document, operacao))
+
+        chave = chave_cache(contexto.query, contexto.variables, contexto.operation_name)
+        cabecalho = request.headers.get("if-none-match")
+        conhecido = etags_por_consulta.get(chave)
+        if cabecalho and conhecido is not None and etag_valido(conhecido) and etag_confere(cabecalho, conhecido[0]):
+            response.headers["ETag"] = conhecido[0]
+            response.status_code = 304
+            contexto.result = ExecutionResult(data=None)
+            yield
+            return
+
+        #as versões são lidas antes da execução: se uma mutation acontecer no meio, o ETag guardado só fica velho (nunca errado)
+        versoes_inicio = dict(versoes)
+        inicio = time.monotonic()
+        tabelas = set()
+        token = tabelas_consultadas.set(tabelas)
+        try:
+            yield
+        finally:
+            tabelas_consultadas.reset(token)
+
+        resultado = contexto.result
+        if not isinstance(resultado, ExecutionResult) or resultado.errors or resultado.data is None:
+            return
+
+        #uma réplica lida logo depois de uma mutation pode ter devolvido os dados de antes dela: a resposta sai sem
+        #ETag e sem poder ser guardada, senão o 304 (ou um proxy) prenderia o cliente nos dados velhos
+        if leitura_pode_estar_atrasada(tabelas, inicio):
+            response.headers["Cache-Control"] = "no-store"
+            return
+
+        etag = calcular_etag(resultado.data)
+        etags_por_consulta.set(chave, (etag, {tabela: versoes_inicio.get(tabela, 0) for tabela in tabelas}))
+        response.headers["ETag"] = etag
+        #um ETag de outro worker (ou desta consulta antes de um restart) também termina em 304 se os dados são os mesmos
+        if cabecalho and etag_confere(cabecalho, etag):
+            response.status_code = 304
@@ -0,0 +1,109 @@
+import asyncio
+import gzip
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+#respostas menores que isso (em bytes) vão sem compressão: o ganho não paga o tempo de CPU
+COMPRESSAO_MINIMA = int(os.getenv("COMPRESSAO_MINIMA", "1024"))
+NIVEL_GZIP = int(os.getenv("COMPRESSAO_NIVEL_GZIP", "6"))
+NIVEL_BROTLI = int(os.getenv("COMPRESSAO_NIVEL_BROTLI", "5"))
+#acima desse tamanho a compressão roda numa thread, para não parar o event loop
+COMPRESSAO_EM_THREAD = 256 * 1024
+
+
+def comprimir(codificacao: str, corpo: bytes, nivel=None) -> bytes:
+    if codificacao == "br":
+        return brotli.compress(corpo, quality=NIVEL_BROTLI if nivel is None else nivel)
+    return gzip.compress(corpo, compresslevel=NIVEL_GZIP if nivel is None else nivel, mtime=0)
+
+#a melhor codificação aceita pelo cliente (brotli só se o pacote estiver instalado)
+def escolher_codificacao(accept_encoding: str):
+    aceitas = {}
+    for parte in accept_encoding.split(","):
+        nome, _, parametros = parte.strip().partition(";")
+        qualidade = 1.0
+        if parametros.strip().startswith("q="):
+            try:
+                qualidade = float(parametros.strip()[2:])
+            except ValueError:
+                qualidade = 0.0
+        aceitas[nome.strip().lower()] = qualidade
+
+    opcoes = (["br"] if brotli is not None else []) + ["gzip"]
+    candidatas = [codificacao for codificacao in opcoes if aceitas.get(codificacao, aceitas.get("*", 0)) > 0]
+    return max(candidatas, key=lambda codificacao: aceitas.get(codificacao, aceitas.get("*", 0)), default=None)
+
+
+#middleware ASGI que comprime com gzip ou brotli as respostas completas dos caminhos escolhidos;
+#respostas em partes (@defer/@stream) passam direto para cada parte chegar ao cliente assim que fica pronta
+class Compressao:
+    def __init__(self, app, caminhos=("/graphql",), minimo=COMPRESSAO_MINIMA):
+        self.app = app
+        self.caminhos = caminhos
+        self.minimo = minimo
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.caminhos):
+            await self.app(scope, receive, send)
+            return
+
+        cabecalhos = dict(scope["headers"])
+        codificacao = escolher_codificacao(cabecalhos.get(b"accept-encoding", b"").decode("latin-1"))
+        if codificacao is None:
+            await self.app(scope, receive, send)
+            return
+
+        inicio = None
+        repassando = False
+
+        async def enviar(mensagem):
+            nonlocal inicio, repassando
+            if mensagem["type"] == "http.response.start":
+                inicio = mensagem
+                return
+            if mensagem["type"] != "http.response.body" or repassando:
+                await send(mensagem)
+                return
+
+            corpo = mensagem.get("body", b"")
+            headers = [(nome, valor) for nome, valor in inicio["headers"]]
+            nomes = {nome.lower() for nome, _ in headers}
+            if mensagem.get("more_body", False) or len(corpo) < self.minimo or b"content-encoding" in nomes:
+                repassando = True
+                await send(inicio)
+                await send(mensagem)
+                return
+
+            if len(corpo) > COMPRESSAO_EM_THREAD:
+                comprimido = await asyncio.to_thread(comprimir, codificacao, corpo)
+            else:
+                comprimido = comprimir(codificacao, corpo)
+
+            novos = []
+            vary = []
+            for nome, valor in headers:
+                if nome.lower() == b"content-length":
+                    continue
+                #um Vary que já veio da aplicação é juntado ao Accept-Encoding num cabeçalho só
+                if nome.lower() == b"vary":
+                    vary += [parte.strip() for parte in valor.split(b",") if parte.strip()]
+                    continue
+                #o corpo comprimido é outra representação, então o ETag forte vira fraco
+                if nome.lower() == b"etag" and not valor.startswith(b"W/"):
+                    valor = b"W/" + valor
+                novos.append((nome, valor))
+            if b"*" not in vary and b"accept-encoding" not in {parte.lower() for parte in vary}:
+                vary.append(b"Accept-Encoding")
+            novos += [
+                (b"content-encoding", codificacao.encode()),
+                (b"content-length", str(len(comprimido)).encode()),
+                (b"vary", b", ".join(vary)),
+            ]
+            await send({**inicio, "headers": novos})
+            await send({"type": "http.response.body", "body": comprimido})
+
+        await self.app(scope, receive, enviar)
@@ -0,0 +1,123 @@
+from collections import OrderedDict
+import hashlib
+import os
+from fastapi import Response
+from graphql import GraphQLError
+from strawberry.extensions import SchemaExtension
+from strawberry.fastapi import GraphQLRouter
+from strawberry.types import ExecutionResult
+from serializacao import codificar_json
+
+
+#LRU simples usado pelas queries persistidas e pelos documentos já analisados
+class LRU:
+    def __init__(self, max_itens: int):
+        self.max_itens = max_itens
+        self.itens = OrderedDict()
+
+    def get(self, chave):
+        valor = self.itens.get(chave)
+        if valor is not None:
+            self.itens.move_to_end(chave)
+        return valor
+
+    def set(self, chave, valor):
+        self.itens[chave] = valor
+        self.itens.move_to_end(chave)
+        while len(self.itens) > self.max_itens:
+            self.itens.popitem(last=False)
+
+
+queries_persistidas = LRU(int(os.getenv("APQ_MAX_QUERIES", "5000")))
+documentos = LRU(int(os.getenv("DOCUMENTOS_MAX", "1000")))
+
+
+def hash_query(query: str) -> str:
+    return hashlib.sha256(query.encode()).hexdigest()
+
+def hash_persistido(extensoes):
+    persistida = (extensoes or {}).get("persistedQuery")
+    if not isinstance(persistida, dict):
+        return None
+    if persistida.get("version") != 1:
+        raise QueryPersistidaInvalida("Versão de query persistida não suportada")
+    return persistida.get("sha256Hash")
+
+
+class QueryPersistidaNaoEncontrada(Exception):
+    pass
+
+class QueryPersistidaInvalida(Exception):
+    pass
+
+
+#completa a requisição com o texto da query quando o cliente manda só o hash
+def carregar_query_persistida(dados):
+    sha = hash_persistido(dados.extensions)
+    if sha is None:
+        return
+
+    if dados.query:
+        if hash_query(dados.query) != sha:
+            raise QueryPersistidaInvalida("O hash enviado não corresponde à query")
+        queries_persistidas.set(sha, dados.query)
+        return
+
+    query = queries_persistidas.get(sha)
+    if query is None:
+        raise QueryPersistidaNaoEncontrada()
+    dados.query = query
+
+
+#router que aceita queries persistidas automáticas (APQ): o cliente manda só o hash
+#e, se o servidor ainda não conhece a query, manda o texto completo uma vez para registrar
+class GraphQLRouterPersistido(GraphQLRouter):
+    #um GET só com o hash também é uma query, não um pedido da interface do GraphiQL
+    def should_render_graphql_ide(self, request):
+        return request.query_params.get("extensions") is None and super().should_render_graphql_ide(request)
+
+    async def execute_single(self, *args, request_data, **kwargs):
+        try:
+            carregar_query_persistida(request_data)
+        except QueryPersistidaNaoEncontrada:
+            erro = GraphQLError("PersistedQueryNotFound", extensions={"code": "PERSISTED_QUERY_NOT_FOUND"})
+            return ExecutionResult(data=None, errors=[erro])
+        except QueryPersistidaInvalida as e:
+            erro = GraphQLError(str(e), extensions={"code": "PERSISTED_QUERY_INVALID"})
+            return ExecutionResult(data=None, errors=[erro])
+
+        return await super().execute_single(*args, request_data=request_data, **kwargs)
+
+    def encode_json(self, data):
+        return codificar_json(data)
+
+    #a revalidação com If-None-Match (ver cache_http.py) responde 304 sem corpo
+    def create_response(self, response_data, sub_response):
+        if sub_response.status_code == 304:
+            return Response(status_code=304, headers=dict(sub_response.headers))
+        return super().create_response(response_data, sub_response)
+
+
+#reaproveita o documento já analisado e validado de uma query conhecida, pulando o parse e a validação
+#a chave é sempre o hash do texto: o sha256Hash do persistedQuery vem do cliente e só é conferido no
+#execute_single do router, e outros caminhos (ex: o stream por SSE) chegam aqui sem essa conferência
+class CacheDeDocumentos(SchemaExtension):
+    def on_parse(self):
+        contexto = self.execution_context
+        self.sha = hash_query(contexto.query)
+        self.documento_em_cache = documentos.get(self.sha)
+        if self.documento_em_cache is not None:
+            contexto.graphql_document = self.documento_em_cache
+        yield
+
+    def on_validate(self):
+        contexto = self.execution_context
+        if self.documento_em_cache is not None:
+            #a validação só depende do schema, então um documento que já passou não precisa ser validado de novo
+            contexto.pre_execution_errors = []
+            yield
+            return
+
+        yield
+        if not contexto.pre_execution_errors:
+            documentos.set(self.sha, contexto.graphql_document)
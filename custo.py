@@ -0,0 +1,182 @@
+import os
+import time
+from graphql import (
+    ExecutionResult,
+    FieldNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    InlineFragmentNode,
+    get_named_type,
+    get_nullable_type,
+    is_leaf_type,
+    is_list_type,
+)
+from graphql.execution.values import get_argument_values, get_variable_values
+from graphql.utilities import get_operation_ast
+from strawberry.extensions import SchemaExtension
+from paginacao import PAGINA_PADRAO
+
+
+CUSTO_MAXIMO = int(os.getenv("CUSTO_MAXIMO", "5000"))
+PROFUNDIDADE_MAXIMA = int(os.getenv("PROFUNDIDADE_MAXIMA", "10"))
+#tamanho suposto para listas sem first/last (as listas antigas e as relações um-para-muitos)
+TAMANHO_LISTA_ESTIMADO = int(os.getenv("TAMANHO_LISTA_ESTIMADO", "50"))
+#custo que cada cliente pode gastar por minuto; 0 desliga o limite
+CUSTO_POR_MINUTO = int(os.getenv("CUSTO_POR_MINUTO", "0"))
+
+#campos que custam mais que o padrão (1 para objetos e listas, 0 para escalares), no formato Tipo.campo
+CUSTO_CAMPO = {
+    "Query.buscarOportunidades": 10,
+}
+
+
+#profundidade e custo de uma seleção; o custo de um campo é o dele mais o dos filhos multiplicado pelo tamanho da lista
+class CalculoDeCusto:
+    def __init__(self, schema, documento, operacao, variaveis):
+        self.schema = schema
+        self.fragmentos = {
+            definicao.name.value: definicao
+            for definicao in documento.definitions
+            if definicao.kind == "fragment_definition"
+        }
+        #variáveis inválidas são tratadas como ausentes; o erro aparece depois na execução
+        valores = get_variable_values(schema, operacao.variable_definitions or [], variaveis or {})
+        self.variaveis = None if isinstance(valores, list) else valores
+
+    #campos da seleção junto com o tipo a que pertencem (um fragmento "... on Tipo" troca o tipo, ex: nas unions)
+    def campos(self, tipo, selecoes, visitados=()):
+        for selecao in selecoes.selections:
+            if isinstance(selecao, FieldNode):
+                yield tipo, selecao
+            elif isinstance(selecao, InlineFragmentNode):
+                yield from self.campos(self.tipo_do_fragmento(tipo, selecao), selecao.selection_set, visitados)
+            elif isinstance(selecao, FragmentSpreadNode):
+                nome = selecao.name.value
+                if nome in self.fragmentos and nome not in visitados:
+                    fragmento = self.fragmentos[nome]
+                    yield from self.campos(self.tipo_do_fragmento(tipo, fragmento), fragmento.selection_set, visitados + (nome,))
+
+    def tipo_do_fragmento(self, tipo, fragmento):
+        if fragmento.type_condition is None:
+            return tipo
+        return self.schema.get_type(fragmento.type_condition.name.value) or tipo
+
+    def multiplicador(self, definicao, no, tipo, nome):
+        try:
+            argumentos = get_argument_values(definicao, no, self.variaveis)
+        except GraphQLError:
+            argumentos = {}
+
+        tamanho = argumentos.get("first") or argumentos.get("last")
+        if tamanho:
+            return tamanho
+        #sem first/last um campo paginado devolve a página padrão (paginar, linha do tempo e busca)
+        if "first" in definicao.args or "last" in definicao.args:
+            return PAGINA_PADRAO
+        #as edges de uma Connection já foram contadas pelo first/last do campo pai
+        if is_list_type(get_nullable_type(tipo)) and nome != "edges":
+            return TAMANHO_LISTA_ESTIMADO
+        return 1
+
+    def calcular(self, tipo_pai, selecoes, profundidade=1):
+        custo = 0
+        maior_profundidade = profundidade
+        for tipo_campo, no in self.campos(tipo_pai, selecoes):
+            nome = no.name.value
+            if nome.startswith("__") or not hasattr(tipo_campo, "fields"):
+                continue
+
+            definicao = tipo_campo.fields.get(nome)
+            if definicao is None:
+                continue
+
+            tipo = get_named_type(definicao.type)
+            custo_campo = CUSTO_CAMPO.get(f"{tipo_campo.name}.{nome}", 0 if is_leaf_type(tipo) else 1)
+            multiplicador = self.multiplicador(definicao, no, definicao.type, nome)
+
+            if no.selection_set is not None:
+                custo_filhos, profundidade_filhos = self.calcular(tipo, no.selection_set, profundidade + 1)
+                maior_profundidade = max(maior_profundidade, profundidade_filhos)
+            else:
+                custo_filhos = 0
+
+            custo += multiplicador * (custo_campo + custo_filhos)
+        return custo, maior_profundidade
+
+
+#orçamento de custo por cliente, reposto aos poucos ao longo do minuto
+class OrcamentoPorCliente:
+    def __init__(self, custo_por_minuto: int):
+        self.capacidade = custo_por_minuto
+        self.por_segundo = custo_por_minuto / 60
+        self.clientes = {}   #cliente -> (saldo, atualizado_em)
+
+    def gastar(self, cliente, custo):
+        agora = time.monotonic()
+        saldo, atualizado_em = self.clientes.get(cliente, (self.capacidade, agora))
+        saldo = min(self.capacidade, saldo + (agora - atualizado_em) * self.por_segundo)
+        if custo > saldo:
+            self.clientes[cliente] = (saldo, agora)
+            return False
+        self.clientes[cliente] = (saldo - custo, agora)
+        return True
+
+
+orcamento = OrcamentoPorCliente(CUSTO_POR_MINUTO) if CUSTO_POR_MINUTO > 0 else None
+
+
+def identificar_cliente(contexto):
+    request = contexto.get("request") if isinstance(contexto, dict) else None
+    if request is None or request.client is None:
+        return None
+    return request.client.host
+
+
+#calcula o custo da operação antes de qualquer resolver rodar e recusa as que passam do limite
+class AnaliseDeCusto(SchemaExtension):
+    def on_execute(self):
+        contexto = self.execution_context
+        self.custo = None
+        operacao = get_operation_ast(contexto.graphql_document, contexto.operation_name)
+        if operacao is None:
+            yield
+            return
+
+        schema = contexto.schema._schema
+        tipo_raiz = schema.get_root_type(operacao.operation)
+        calculo = CalculoDeCusto(schema, contexto.graphql_document, operacao, contexto.variables)
+        self.custo, self.profundidade = calculo.calcular(tipo_raiz, operacao.selection_set)
+
+        erro = None
+        if self.profundidade > PROFUNDIDADE_MAXIMA:
+            erro = GraphQLError(
+                f"A query tem profundidade {self.profundidade}, o máximo é {PROFUNDIDADE_MAXIMA}",
+                extensions={"code": "PROFUNDIDADE_EXCEDIDA"},
+            )
+        elif self.custo > CUSTO_MAXIMO:
+            erro = GraphQLError(
+                f"A query tem custo {self.custo}, o máximo é {CUSTO_MAXIMO}",
+                extensions={"code": "CUSTO_EXCEDIDO"},
+            )
+        elif orcamento is not None and not orcamento.gastar(identificar_cliente(contexto.context), self.custo):
+            erro = GraphQLError(
+                "Limite de custo por minuto atingido, tente novamente mais tarde",
+                extensions={"code": "LIMITE_DE_CUSTO"},
+            )
+
+        #com o resultado já definido a execução é pulada
+        if erro is not None:
+            contexto.result = ExecutionResult(data=None, errors=[erro])
+        yield
+
+    def get_results(self):
+        if getattr(self, "custo", None) is None:
+            return {}
+        return {
+            "custo": {
+                "custo": self.custo,
+                "profundidade": self.profundidade,
+                "custoMaximo": CUSTO_MAXIMO,
+                "profundidadeMaxima": PROFUNDIDADE_MAXIMA,
+            }
+        }
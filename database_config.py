@@ -1,16 +1,193 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy import event, Table, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.sql import ClauseElement
+from sqlalchemy.sql.util import find_tables
 from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from dotenv import load_dotenv
+from eventos import ouvir
+from pool import PoolMedido
+import asyncio
+import itertools
+import logging
 import os
+import time
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE")
-engine = create_async_engine(DATABASE_URL, echo=False)
+
+#configuração do pool de conexões pelo ambiente (os padrões são os mesmos do SQLAlchemy)
+def configuracao_pool(url):
+    url = make_url(url)
+    #o SQLite em memória usa um pool de conexão única, que não aceita essas opções
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": PoolMedido,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "-1")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "0") == "1",
+    }
+
+#banco principal: recebe as mutations (e as leituras quando não há réplicas)
+engine = create_async_engine(DATABASE_URL, echo=False, **configuracao_pool(DATABASE_URL))
 SessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
+logger = logging.getLogger("replicas")
+
+#réplicas de leitura, separadas por vírgula; sem nenhuma tudo vai para o banco principal
+REPLICAS_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICAS", "").split(",") if url.strip()]
+#round_robin ou menos_ocupada (a réplica com menos conexões em uso)
+BALANCEAMENTO = os.getenv("DB_BALANCEAMENTO", "round_robin")
+INTERVALO_SAUDE = float(os.getenv("DB_INTERVALO_SAUDE", "5"))
+TIMEOUT_SAUDE = float(os.getenv("DB_TIMEOUT_SAUDE", "2"))
+
+class Replica:
+    def __init__(self, url: str):
+        self.url = make_url(url).render_as_string(hide_password=True)
+        self.engine = create_async_engine(url, echo=False, **configuracao_pool(url))
+        self.sessoes = sessionmaker(bind=self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.saudavel = True
+        self.falhas = 0
+
+    def em_uso(self):
+        pool = self.engine.sync_engine.pool
+        return pool.checkedout() if hasattr(pool, "checkedout") else 0
+
+replicas = [Replica(url) for url in REPLICAS_URLS]
+_proxima = itertools.count()
+
+def escolher_replica():
+    saudaveis = [replica for replica in replicas if replica.saudavel]
+    if not saudaveis:
+        return None
+    if BALANCEAMENTO == "menos_ocupada":
+        return min(saudaveis, key=Replica.em_uso)
+    return saudaveis[next(_proxima) % len(saudaveis)]
+
+async def testar_conexao(engine):
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+#testa cada réplica com um SELECT 1; as que não respondem saem do rodízio até voltarem
+async def verificar_replicas():
+    for replica in replicas:
+        try:
+            await asyncio.wait_for(testar_conexao(replica.engine), TIMEOUT_SAUDE)
+        except Exception as e:
+            replica.falhas += 1
+            if replica.saudavel:
+                logger.warning("Réplica %s fora do rodízio: %s", replica.url, e)
+            replica.saudavel = False
+        else:
+            if not replica.saudavel:
+                logger.warning("Réplica %s voltou ao rodízio", replica.url)
+            replica.saudavel = True
+
+async def monitorar_replicas():
+    while True:
+        await verificar_replicas()
+        await asyncio.sleep(INTERVALO_SAUDE)
+
+#True enquanto a operação atual for só de leitura (queries); as mutations ficam no banco principal
+ler_de_replica = ContextVar("ler_de_replica", default=False)
+
+#quanto tempo uma réplica pode ficar atrás do banco principal; uma leitura de réplica feita até esse tempo depois
+#de uma mutation pode ter voltado com os dados de antes dela, então não é guardada nos caches
+ATRASO_REPLICAS = float(os.getenv("ATRASO_REPLICAS", "5"))
+alteradas_em = {}   #tabela -> time.monotonic() da última alteração (deste worker ou vinda pelo barramento)
+
+@ouvir
+def registrar_alteracao(alteracao):
+    alteradas_em[alteracao.tabela] = time.monotonic()
+
+#True se a operação atual leu de uma réplica e alguma das tabelas mudou pouco antes (inicio é quando a leitura começou)
+def leitura_pode_estar_atrasada(tabelas, inicio: float) -> bool:
+    if not replicas or not ler_de_replica.get():
+        return False
+    limite = inicio - ATRASO_REPLICAS
+    return any(tabela in alteradas_em and alteradas_em[tabela] > limite for tabela in tabelas)
+
+#tabelas usadas pela operação atual; fica None quando ninguém está acompanhando
+tabelas_consultadas = ContextVar("tabelas_consultadas", default=None)
+
+#o listener fica na classe Engine para valer também para as réplicas
+@event.listens_for(Engine, "before_execute")
+def registrar_tabelas(conn, clauseelement, multiparams, params, execution_options):
+    tabelas = tabelas_consultadas.get()
+    if tabelas is not None and isinstance(clauseelement, ClauseElement):
+        tabelas.update(
+            tabela.name for tabela in find_tables(clauseelement, include_joins=True)
+            if isinstance(tabela, Table)
+        )
+
+#para as respostas que não vêm de uma query no banco (ex: a busca em memória) marcarem as tabelas de que dependem
+def marcar_tabelas(*nomes):
+    tabelas = tabelas_consultadas.get()
+    if tabelas is not None:
+        tabelas.update(nomes)
+
+#sessões de uma requisição HTTP, compartilhadas por todos os resolvers e dataloaders dela (ver get_context no app.py):
+#cada uma só é aberta no primeiro uso, e uma operação que passa por vários campos raiz usa uma conexão só e enxerga
+#os dados de uma transação só. A trava impede dois resolvers de usarem a mesma sessão ao mesmo tempo
+class SessaoDaRequisicao:
+    def __init__(self):
+        self.sessoes = {}   #"primario" ou "replica" -> AsyncSession
+        self.trava = asyncio.Lock()
+        self.fechada = False
+
+    def sessao(self, primario: bool):
+        chave = "primario" if primario or not ler_de_replica.get() else "replica"
+        session = self.sessoes.get(chave)
+        if session is None:
+            fabrica = SessionLocal
+            if chave == "replica":
+                replica = escolher_replica()
+                if replica is not None:
+                    fabrica = replica.sessoes
+            session = self.sessoes[chave] = fabrica()
+        return session
+
+    #chamado no fim da resposta; devolve as conexões ao pool (o que não teve commit é desfeito)
+    async def fechar(self):
+        async with self.trava:
+            self.fechada = True
+            for session in self.sessoes.values():
+                await session.close()
+            self.sessoes.clear()
+
+#sessão compartilhada da operação atual; fica None fora de uma requisição HTTP (ex: nas subscriptions)
+sessao_da_requisicao = ContextVar("sessao_da_requisicao", default=None)
+
+#nas queries a sessão vem de uma réplica saudável; nas mutations (ou com primario=True) vem do banco principal
+#dentro de uma requisição a sessão é a compartilhada dela; propria=True pede uma sessão separada, para as leituras que
+#seguram a sessão entre um await e outro (os streams) e para os índices em memória, que não podem ler com o retrato
+#do banco de quando a requisição começou
 @asynccontextmanager
-async def get_session():
-    async with SessionLocal() as session:
-        yield session
\ No newline at end of file
+async def get_session(primario: bool = False, propria: bool = False):
+    compartilhada = sessao_da_requisicao.get()
+    if compartilhada is not None and not propria:
+        async with compartilhada.trava:
+            if not compartilhada.fechada:
+                session = compartilhada.sessao(primario)
+                try:
+                    yield session
+                except BaseException:
+                    #como a sessão fechando faria, um erro desfaz o que ficou sem commit
+                    await session.rollback()
+                    raise
+                return
+
+    fabrica = SessionLocal
+    if not primario and ler_de_replica.get():
+        replica = escolher_replica()
+        if replica is not None:
+            fabrica = replica.sessoes
+
+    async with fabrica() as session:
+        yield session
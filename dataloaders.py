@@ -0,0 +1,55 @@
+from collections import defaultdict
+from contextvars import ContextVar
+from strawberry.dataloader import DataLoader
+from sqlalchemy.future import select
+from database_config import get_session
+from projecao import colunas_do_tipo, converter_linhas
+
+
+#carrega vários elementos pelo id com uma única query (WHERE id IN (...))
+#as colunas são lidas direto (sem criar objetos do ORM) e viram o tipo do strawberry pelo conversor gerado
+def carregar_por_id(model_class, tipo):
+    colunas = colunas_do_tipo(model_class, tipo)
+    converter = converter_linhas(tipo, colunas)
+
+    async def carregar(ids):
+        async with get_session() as session:
+            resultado = await session.execute(
+                select(*colunas).where(model_class.id.in_(ids))
+            )
+            por_id = {row.id: converter(row) for row in resultado}
+
+        return [por_id.get(id) for id in ids]
+
+    return carregar
+
+#carrega os filhos de vários pais de uma vez, agrupando pela chave estrangeira
+def carregar_por_chave(model_class, coluna, tipo):
+    colunas = colunas_do_tipo(model_class, tipo)
+    converter = converter_linhas(tipo, colunas)
+
+    async def carregar(chaves):
+        async with get_session() as session:
+            resultado = await session.execute(
+                select(*colunas).where(coluna.in_(chaves)).order_by(model_class.id)
+            )
+            grupos = defaultdict(list)
+            for row in resultado:
+                grupos[getattr(row, coluna.key)].append(converter(row))
+
+        return [grupos.get(chave, []) for chave in chaves]
+
+    return carregar
+
+#os loaders precisam ser criados a cada requisição para que o cache não vaze entre usuários
+def criar_loaders(por_id: dict, por_chave: dict):
+    loaders = {}
+    for nome, (model_class, tipo) in por_id.items():
+        loaders[nome] = DataLoader(load_fn=carregar_por_id(model_class, tipo))
+    for nome, (model_class, coluna, tipo) in por_chave.items():
+        loaders[nome] = DataLoader(load_fn=carregar_por_chave(model_class, coluna, tipo))
+    return loaders
+
+#loaders em uso fora de uma requisição HTTP: nas subscriptions são os do evento (criados uma vez por lote de
+#alterações e usados por todos os assinantes, ver transmissao.py); nas outras operações pelo WebSocket, os da operação
+loaders_atuais = ContextVar("loaders_atuais", default=None)
@@ -1,205 +1,266 @@
-from models import Empresa, Curso, Estagio, Bolsa, Professor, Plataforma, Endereco
+from models import Base, Empresa, Curso, Estagio, Bolsa, Professor, Plataforma, Endereco
+import argparse
 import asyncio
+import os
+import random
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
 from faker import Faker
 import sqlalchemy as sa
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.future import select
-import random
-from datetime import datetime
+from sqlalchemy.ext.asyncio import create_async_engine
+
+# URL do banco de dados MySQL com asyncmy (pode ser trocada pela variável DATABASE ou por --url)
+DATABASE_URL = os.getenv("DATABASE", "mysql+asyncmy://root:@localhost:3306/banco")
+
+OPCOES = ["Telecomunicações", "Ciência da Computação", "Automação"]
+SUFIXOS_ACADEMICOS = ["PhD", "MSc", "BSc", "MD", "MBA", "DDS"]
+NIVEL = ["Básico", "Intermediário", "Avançado"]
+
+#ordem de criação: as tabelas filhas vêm depois das tabelas que elas referenciam
+ORDEM = [Professor, Plataforma, Endereco, Bolsa, Curso, Empresa, Estagio]
+#tabela filha -> tabela de onde vêm os ids da chave estrangeira dela
+PAI = {"bolsa": "professor", "curso": "plataforma", "empresa": "endereco", "estagio": "empresa"}
 
 fake = Faker("pt_BR")
 
-# URL do banco de dados MySQL com asyncmy
-DATABASE_URL = "mysql+asyncmy://root:@localhost:3306/banco"
-engine = create_async_engine(DATABASE_URL, echo=True)
-SessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-
-#funções que são usadas durante a construção do banco de dados
-async def get_vertente(id: int, TableName):
-    async with SessionLocal() as session:  #trabalha com uma instância da session
-        query = select(TableName).where(TableName.id == id)
-        result = await session.execute(query)
-        return result.scalar()
-
-async def get_number_of_elements(TableName):
-    async with SessionLocal() as session:  
-        query = sa.func.count(TableName.id)
-        result = await session.execute(query)
-        return result.scalar()
-
-async def popular_banco():
-    options = ["Telecomunicações", "Ciência da Computação", "Automação"]
-    sufixos_academicos = ["PhD", "MSc", "BSc", "MD", "MBA", "DDS"]
-    nivel = ["Básico", "Intermediário", "Avançado"]
-
-    async with SessionLocal() as session:
-        async with session.begin():
-
-            professores = [
-                Professor(
-                    nome=fake.name(), 
-                    email=fake.email(),
-                    vertente=random.choice(options),
-                    telefone=fake.phone_number()[:15],
-                    website=fake.url(),
-                    formacao=random.choice(sufixos_academicos)
-                    ) 
-                for _ in range(100)
-            ]
-            session.add_all(professores)
-
-            plataformas = [
-                Plataforma(
-                    nome=fake.company(), 
-                    email=fake.email(),
-                    website=fake.url(),
-                    tipo=fake.boolean()
-                    ) 
-                for _ in range(100)
-            ]
-            session.add_all(plataformas)
-
-            enderecos = [
-                Endereco(
-                    rua=fake.street_name(), 
-                    numero=fake.random_int(min=1, max=1000),
-                    bairro=fake.bairro(),
-                    cidade=fake.city(),
-                    estado=fake.estado_sigla(),
-                    cep=fake.postcode()
-                    )
-                for _ in range(100)
-            ]
-            session.add_all(enderecos)
-
-            #Criando as bolsas (dependem dos professores, e da vertente deles)
-            bolsas = []
-            for _ in range(100):
-                #definindo se a bolsa vai ser remunerada ou não
-                remunerado = fake.boolean()
-                if remunerado:
-                    #se for o salario vai ser definido
-                    salario = fake.pydecimal(left_digits=4, right_digits=2, positive=True)
-                else:
-                    salario = None
-                
-                #as bolsas tem o primeiro dia definido como hoje
-                data_inicio = datetime.today().date()
-
-                #verificando quantos professores existem para conectar um deles a bolsa
-                num = await get_number_of_elements(Professor)
-                id_professor = fake.random_int(min=0, max=num)
-                #verificando a vertente do professor para que a mesma seja a da bolsa
-                vertente = await get_vertente(id_professor, Professor)
-
-
-                bolsas.append(
-                    Bolsa(
-                    professor_id = id_professor,
-                    nome=fake.catch_phrase(),
-                    descricao=fake.text(), 
-                    horas_semanais=fake.random_int(min=10, max=80),
-                    vertente=vertente.vertente,
-                    quantidade_vagas=fake.random_int(min=1, max=100),
-                    data_inicio=data_inicio,
-                    salario=salario,
-                    data_fim=fake.date_between(start_date=data_inicio, end_date='+2y'),
-                    remunerado=remunerado
-                    )
-                )
-            session.add_all(bolsas)
-
-            #Criando os cursos (dependem da plataforma)
-            cursos = []
-            for _ in range(100):
-                #escolhendo a categoria que o curso terá
-                categoria = random.choice(["Pago", "Gratuito"])
-                if categoria=="Pago":
-                    #se ele for pago é definido o preço
-                    preco=fake.pydecimal(left_digits=3, right_digits=2, positive=True),
-                else:
-                    preco = None
-
-                #a data de início do curso é definida como a de hoje                
-                data_inicio = datetime.today().date()
-
-                #verificando quantas plataformas existem no banco para escolher a que vai ter o curso ofertado
-                num = await get_number_of_elements(Plataforma)
-                id_plataforma = fake.random_int(min=0, max=num)
-
-                cursos.append(
-                    Curso(
-                    nome=fake.catch_phrase(), 
-                    nivel=random.choice(nivel),
-                    vertente=random.choice(options),
-                    preco=preco,
-                    data_inicio=data_inicio,
-                    data_fim=fake.date_between(start_date=data_inicio, end_date='+2y'),
-                    plataforma_id=id_plataforma,
-                    categoria=categoria,
-                    )
-                )
-            session.add_all(cursos)
-
-            #Criando as empresas (dependem da endereco)
-            empresas = []
-            for _ in range(100):
-
-                #verifica quantos endereços existem para escolher um aleatoriamente
-                num = await get_number_of_elements(Endereco)
-                id_endereco = fake.random_int(min=0, max=num)
-
-                empresas.append(
-                    Empresa(
-                    nome=fake.company(), 
-                    CNPJ=fake.cnpj()[:14],
-                    telefone=fake.phone_number()[:15],
-                    website=fake.url(),
-                    email=fake.email(),
-                    status=fake.boolean(),
-                    endereco_id=id_endereco,
-                    vertente=random.choice(options),
-                    )
-                )
-            session.add_all(empresas)
-
-            #Criando os estagios (dependem da empresa)
-            estagios = []
-            for _ in range(100):
-                #escolhendo uma das empresas para ofertar o estágio
-                num = await get_number_of_elements(Empresa)
-                id_empresa = fake.random_int(min=1001, max=5000)
-                vertente = await get_vertente(id_empresa, Empresa) #associando a mesma vertente para o estágio
-
-                #todos os estágios vão começar a partir do dia atual
-                data_inicio = datetime.today().date()
-
-                #escolhendo se o estágio vai ser remunerado, e em caso positivo o salário é definido
-                remunerado = fake.boolean()
-                if remunerado:
-                    salario = fake.pydecimal(left_digits=4, right_digits=2, positive=True)
-                else:
-                    salario = None
-
-                estagios.append(
-                    Estagio(
-                    nome=fake.catch_phrase(), 
-                    salario=salario,
-                    empresa_id=id_empresa,
-                    vertente=vertente.vertente,
-                    horas_semanais=fake.random_int(min=10, max=80),
-                    data_inicio=data_inicio,
-                    data_fim=fake.date_between(start_date=data_inicio, end_date='+2y'),
-                    descricao=fake.text(), 
-                    remunerado=remunerado
-                    )
-                )
-            session.add_all(estagios)
-
-async def init_db():
-    await popular_banco()
+
+#a vertente de professores e empresas é calculada a partir do id, então as bolsas e os estágios
+#sabem a vertente do pai sem consultar o banco (e sem guardar uma lista com milhões de itens)
+def vertente_do_id(seed: int, tabela: str, id: int) -> str:
+    return OPCOES[zlib.crc32(f"{seed}-{tabela}-{id}".encode()) % len(OPCOES)]
+
+
+#gera as linhas de um bloco; roda num processo separado quando --processos > 0
+#cada bloco tem a sua própria seed, então o resultado não depende de qual processo gerou o bloco
+def gerar_bloco(tabela: str, primeiro_id: int, quantidade: int, pais: dict, seed: int, data_base: date):
+    fake.seed_instance(zlib.crc32(f"{seed}-{tabela}-{primeiro_id}".encode()))
+    rng = random.Random(f"{seed}-{tabela}-{primeiro_id}")
+    linhas = []
+
+    for id in range(primeiro_id, primeiro_id + quantidade):
+        if tabela == "professor":
+            linhas.append(dict(
+                id=id,
+                nome=fake.name(),
+                email=fake.email(),
+                vertente=vertente_do_id(seed, tabela, id),
+                telefone=fake.phone_number()[:15],
+                website=fake.url(),
+                formacao=rng.choice(SUFIXOS_ACADEMICOS),
+            ))
+
+        elif tabela == "plataforma":
+            linhas.append(dict(
+                id=id,
+                nome=fake.company(),
+                email=fake.email(),
+                website=fake.url(),
+                tipo=rng.random() < 0.5,
+            ))
+
+        elif tabela == "endereco":
+            linhas.append(dict(
+                id=id,
+                rua=fake.street_name(),
+                numero=rng.randint(1, 1000),
+                bairro=fake.bairro(),
+                cidade=fake.city(),
+                estado=fake.estado_sigla(),
+                cep=fake.postcode(),
+            ))
+
+        elif tabela == "bolsa":
+            #a bolsa tem a mesma vertente do professor
+            primeiro_pai, total_pais, _ = pais["professor"]
+            id_professor = primeiro_pai + rng.randrange(total_pais)
+            remunerado = rng.random() < 0.5
+            linhas.append(dict(
+                id=id,
+                professor_id=id_professor,
+                nome=fake.catch_phrase(),
+                descricao=fake.text(),
+                horas_semanais=rng.randint(10, 80),
+                vertente=vertente_do_id(seed, "professor", id_professor),
+                quantidade_vagas=rng.randint(1, 100),
+                data_inicio=data_base,
+                salario=round(rng.uniform(1, 9999.99), 2) if remunerado else None,
+                data_fim=data_base + timedelta(days=rng.randint(0, 730)),
+                remunerado=remunerado,
+            ))
+
+        elif tabela == "curso":
+            categoria = rng.choice(["Pago", "Gratuito"])
+            primeiro_pai, total_pais, _ = pais["plataforma"]
+            linhas.append(dict(
+                id=id,
+                nome=fake.catch_phrase(),
+                nivel=rng.choice(NIVEL),
+                vertente=rng.choice(OPCOES),
+                preco=round(rng.uniform(1, 999.99), 2) if categoria == "Pago" else None,
+                data_inicio=data_base,
+                data_fim=data_base + timedelta(days=rng.randint(0, 730)),
+                plataforma_id=primeiro_pai + rng.randrange(total_pais),
+                categoria=categoria,
+            ))
+
+        elif tabela == "empresa":
+            #cada empresa fica com um endereço diferente enquanto houver endereços sobrando, começando pelos
+            #endereços criados nesta execução (os que já existiam provavelmente já têm empresa)
+            primeiro_pai, total_pais, primeiro_novo = pais["endereco"]
+            posicao = primeiro_novo - primeiro_pai + id - pais["empresa"][2]
+            linhas.append(dict(
+                id=id,
+                nome=fake.company(),
+                CNPJ=fake.cnpj()[:14],
+                telefone=fake.phone_number()[:15],
+                website=fake.url(),
+                email=fake.email(),
+                status=rng.random() < 0.5,
+                endereco_id=primeiro_pai + posicao % total_pais,
+                vertente=vertente_do_id(seed, tabela, id),
+            ))
+
+        elif tabela == "estagio":
+            #o estágio tem a mesma vertente da empresa
+            primeiro_pai, total_pais, _ = pais["empresa"]
+            id_empresa = primeiro_pai + rng.randrange(total_pais)
+            remunerado = rng.random() < 0.5
+            linhas.append(dict(
+                id=id,
+                nome=fake.catch_phrase(),
+                salario=round(rng.uniform(1, 9999.99), 2) if remunerado else None,
+                empresa_id=id_empresa,
+                vertente=vertente_do_id(seed, "empresa", id_empresa),
+                horas_semanais=rng.randint(10, 80),
+                data_inicio=data_base,
+                data_fim=data_base + timedelta(days=rng.randint(0, 730)),
+                descricao=fake.text(),
+                remunerado=remunerado,
+            ))
+
+    return linhas
+
+
+#ids que as linhas filhas podem usar: (primeiro id, quantidade de ids, primeiro id criado nesta execução)
+#as linhas que já estão no banco entram quando os ids delas não têm buracos (um id deletado no meio viraria uma
+#chave estrangeira para uma linha que não existe); senão só as linhas novas são usadas
+async def ids_dos_pais(engine, model_class, quantidade):
+    async with engine.connect() as conn:
+        menor, maior, total = (await conn.execute(
+            sa.select(sa.func.min(model_class.id), sa.func.max(model_class.id), sa.func.count())
+        )).one()
+    primeiro_novo = (maior or 0) + 1
+    if total and maior - menor + 1 == total:
+        return menor, total + quantidade, primeiro_novo
+    return primeiro_novo, quantidade, primeiro_novo
+
+#os ids são inseridos explicitamente, e no postgres isso não avança a sequência da coluna id: sem o setval, o próximo
+#INSERT da API tentaria usar um id que já existe (mysql e sqlite ajustam o auto incremento sozinhos)
+async def ajustar_sequencias(engine):
+    if engine.dialect.name != "postgresql":
+        return
+    async with engine.begin() as conn:
+        for model_class in ORDEM:
+            #numa tabela vazia o MAX é nulo e o setval não faz nada
+            await conn.execute(sa.select(sa.func.setval(
+                sa.func.pg_get_serial_sequence(model_class.__tablename__, "id"), sa.func.max(model_class.id),
+            )))
+
+#gera e insere os blocos de uma tabela; com um pool de processos, alguns blocos ficam sendo gerados enquanto outro é inserido
+async def popular_tabela(engine, executor, model_class, quantidade, pais, seed, bloco, data_base, janela):
+    tabela = model_class.__tablename__
+    primeiro_id = pais[tabela][2]
+    loop = asyncio.get_running_loop()
+    blocos = deque(
+        (primeiro_id + inicio, min(bloco, quantidade - inicio))
+        for inicio in range(0, quantidade, bloco)
+    )
+    pendentes = deque()
+    inseridas = 0
+    inicio = time.perf_counter()
+
+    while blocos or pendentes:
+        while executor is not None and blocos and len(pendentes) < janela:
+            id_bloco, tamanho = blocos.popleft()
+            pendentes.append(loop.run_in_executor(executor, gerar_bloco, tabela, id_bloco, tamanho, pais, seed, data_base))
+
+        if executor is not None:
+            linhas = await pendentes.popleft()
+        else:
+            id_bloco, tamanho = blocos.popleft()
+            linhas = gerar_bloco(tabela, id_bloco, tamanho, pais, seed, data_base)
+
+        #um único INSERT com várias linhas por bloco, em vez de um objeto do ORM por linha
+        async with engine.begin() as conn:
+            await conn.execute(sa.insert(model_class.__table__), linhas)
+        inseridas += len(linhas)
+
+    duracao = time.perf_counter() - inicio
+    print(f"{tabela}: {inseridas} linhas em {duracao:.1f}s ({inseridas / max(duracao, 1e-9):.0f} linhas/s)")
+
+
+async def popular_banco(url=DATABASE_URL, quantidades=None, seed=42, bloco=5000, processos=0, criar_tabelas=False, data_base=None):
+    quantidades = quantidades or {model_class.__tablename__: 100 for model_class in ORDEM}
+    data_base = data_base or date.today()
+    engine = create_async_engine(url, echo=False)
+
+    if criar_tabelas:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    #os ids são definidos aqui (a partir do maior id já existente), então os filhos sabem os ids dos pais sem consultar o banco
+    pais = {}
+    for model_class in ORDEM:
+        tabela = model_class.__tablename__
+        pais[tabela] = await ids_dos_pais(engine, model_class, quantidades[tabela])
+
+    for tabela, pai in PAI.items():
+        if quantidades[tabela] > 0 and pais[pai][1] == 0:
+            await engine.dispose()
+            raise Exception(f"Não há linhas de {pai} para as linhas de {tabela} referenciarem: "
+                            f"gere pelo menos uma ({pai} com ids sem buracos no banco também serve)")
+
+    executor = ProcessPoolExecutor(max_workers=processos) if processos > 0 else None
+    try:
+        for model_class in ORDEM:
+            if quantidades[model_class.__tablename__] > 0:
+                await popular_tabela(engine, executor, model_class, quantidades[model_class.__tablename__],
+                                     pais, seed, bloco, data_base, janela=processos * 2)
+        await ajustar_sequencias(engine)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        await engine.dispose()
+
+async def init_db(**opcoes):
+    await popular_banco(**opcoes)
 
 if __name__ == "__main__":
-    asyncio.run(init_db())
+    parser = argparse.ArgumentParser(description="Popula o banco com dados gerados pelo Faker")
+    parser.add_argument("--url", default=DATABASE_URL)
+    parser.add_argument("--quantidade", type=int, default=100, help="linhas por tabela (cada tabela pode ser trocada abaixo)")
+    for model_class in ORDEM:
+        parser.add_argument(f"--{model_class.__tablename__}", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--bloco", type=int, default=5000, help="linhas por INSERT")
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1, help="processos gerando dados (0 gera no processo principal)")
+    parser.add_argument("--criar-tabelas", action="store_true")
+    parser.add_argument("--data-base", type=date.fromisoformat, default=None, help="data de início das oportunidades (padrão: hoje)")
+    args = parser.parse_args()
 
+    quantidades = {
+        model_class.__tablename__: getattr(args, model_class.__tablename__) if getattr(args, model_class.__tablename__) is not None else args.quantidade
+        for model_class in ORDEM
+    }
+    asyncio.run(init_db(
+        url=args.url,
+        quantidades=quantidades,
+        seed=args.seed,
+        bloco=args.bloco,
+        processos=args.processos,
+        criar_tabelas=args.criar_tabelas,
+        data_base=args.data_base,
+    ))
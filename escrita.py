@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import ONETOMANY
+
+
+#escritas de uma linha só, feitas em um único comando SQL sempre que o banco tem RETURNING
+#(SQLite e PostgreSQL têm; no MySQL o insert usa o id gerado pelo driver e o update precisa reler a linha)
+
+async def inserir_um(session, model_class, valores: dict):
+    colunas = model_class.__table__.columns
+    if session.bind.dialect.insert_returning:
+        resultado = await session.execute(insert(model_class).values(**valores).returning(*colunas))
+        return resultado.one()
+
+    resultado = await session.execute(insert(model_class).values(**valores))
+    linha = {coluna.name: valores.get(coluna.name) for coluna in colunas}
+    linha["id"] = resultado.inserted_primary_key[0]
+    return SimpleNamespace(**linha)
+
+#devolve None quando a linha não existe
+async def atualizar_um(session, model_class, id: int, valores: dict):
+    colunas = model_class.__table__.columns
+    if valores and session.bind.dialect.update_returning:
+        query = update(model_class).where(model_class.id == id).values(**valores).returning(*colunas)
+        return (await session.execute(query)).first()
+
+    if valores:
+        await session.execute(update(model_class).where(model_class.id == id).values(**valores))
+    return (await session.execute(select(*colunas).where(model_class.id == id))).first()
+
+#apaga a chave estrangeira das linhas filhas (o que o ORM fazia carregando cada filha) e depois a linha;
+#devolve {tabela filha: ids das filhas alteradas}, ou None quando a linha não existe
+async def deletar_um(session, model_class, id: int):
+    filhas = {}
+    for relacionamento in sa_inspect(model_class).relationships:
+        if relacionamento.direction is ONETOMANY:
+            filha = relacionamento.mapper.class_
+            ids = []
+            for local, remota in relacionamento.local_remote_pairs:
+                query = update(filha).where(remota == id).values({remota.name: None})
+                if session.bind.dialect.update_returning:
+                    ids += (await session.execute(query.returning(filha.id))).scalars().all()
+                else:
+                    ids += (await session.execute(select(filha.id).where(remota == id))).scalars().all()
+                    if ids:
+                        await session.execute(query)
+            if ids:
+                filhas[relacionamento.mapper.local_table.name] = ids
+
+    resultado = await session.execute(delete(model_class).where(model_class.id == id))
+    if resultado.rowcount == 0:
+        return None
+    return filhas
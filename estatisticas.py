@@ -0,0 +1,187 @@
+import heapq
+from bisect import bisect_left, insort
+from datetime import date
+from typing import List, Optional
+import strawberry
+from sqlalchemy import select
+from atualizacao_incremental import AtualizacaoIncremental
+from database_config import marcar_tabelas
+from eventos import ouvir
+from models import Bolsa, Curso, Estagio
+
+#tabelas que entram nas estatísticas e as colunas lidas de cada uma
+TABELAS_ESTATISTICAS = {
+    "estagio": (Estagio, ("vertente", "salario", "data_fim")),
+    "bolsa": (Bolsa, ("vertente", "salario", "quantidade_vagas", "data_fim")),
+    "curso": (Curso, ("nivel", "categoria")),
+}
+
+
+@strawberry.type
+class ResumoOportunidades:
+    vertente: Optional[str]
+    quantidade: int
+    salario_medio: Optional[float]
+    salario_mediano: Optional[float]
+    vagas: Optional[int]   #só as bolsas têm quantidade de vagas
+
+@strawberry.type
+class ContagemCursos:
+    nivel: Optional[str]
+    categoria: Optional[str]
+    quantidade: int
+
+@strawberry.type
+class Estatisticas:
+    estagios: List[ResumoOportunidades]
+    bolsas: List[ResumoOportunidades]
+    total_vagas: int
+    cursos: List[ContagemCursos]
+
+
+#números de um grupo; os salários ficam ordenados para a mediana sair sem percorrer o grupo
+class Resumo:
+    def __init__(self):
+        self.quantidade = 0
+        self.vagas = 0
+        self.soma_salarios = 0.0
+        self.salarios = []
+
+    #na carga de uma tabela inteira os salários são ordenados uma vez só no final
+    def adicionar(self, salario, vagas, ordenar=True):
+        self.quantidade += 1
+        self.vagas += vagas or 0
+        if salario is not None:
+            self.soma_salarios += salario
+            if ordenar:
+                insort(self.salarios, salario)
+            else:
+                self.salarios.append(salario)
+
+    def remover(self, salario, vagas):
+        self.quantidade -= 1
+        self.vagas -= vagas or 0
+        if salario is not None:
+            self.soma_salarios -= salario
+            del self.salarios[bisect_left(self.salarios, salario)]
+
+    def media(self):
+        return self.soma_salarios / len(self.salarios) if self.salarios else None
+
+    def mediana(self):
+        total = len(self.salarios)
+        if total == 0:
+            return None
+        meio = total // 2
+        return self.salarios[meio] if total % 2 else (self.salarios[meio - 1] + self.salarios[meio]) / 2
+
+
+def aberta(data_fim, hoje: date) -> bool:
+    return data_fim is None or data_fim >= hoje
+
+
+#agregados em memória mantidos pelas mutations: cada linha contada guarda a sua contribuição,
+#então uma alteração só tira a contribuição antiga e soma a nova, sem reler a tabela
+class AgregadosOportunidades(AtualizacaoIncremental):
+    def __init__(self):
+        super().__init__(TABELAS_ESTATISTICAS)
+        self.grupos = {tabela: {} for tabela in TABELAS_ESTATISTICAS}
+        self.contribuicoes = {}     #(tabela, id) -> (grupo, salario, vagas, data_fim)
+        self.vencimentos = []       #heap de (data_fim, tabela, id) das oportunidades abertas
+        self.hoje = date.today()    #data usada para decidir quais oportunidades estão abertas
+
+    def remover(self, documento):
+        contribuicao = self.contribuicoes.pop(documento, None)
+        if contribuicao is None:
+            return
+        grupo, salario, vagas, data_fim = contribuicao
+        resumo = self.grupos[documento[0]][grupo]
+        resumo.remover(salario, vagas)
+        if resumo.quantidade == 0:
+            del self.grupos[documento[0]][grupo]
+
+    def adicionar(self, tabela: str, row, hoje: date, ordenar=True):
+        documento = (tabela, row.id)
+        self.remover(documento)
+        if tabela == "curso":
+            grupo, salario, vagas, data_fim = (row.nivel, row.categoria), None, None, None
+        else:
+            #estágios e bolsas só contam enquanto estão abertos
+            if not aberta(row.data_fim, hoje):
+                return
+            grupo, salario, vagas, data_fim = row.vertente, row.salario, getattr(row, "quantidade_vagas", None), row.data_fim
+            if data_fim is not None:
+                heapq.heappush(self.vencimentos, (data_fim, tabela, row.id))
+
+        if grupo not in self.grupos[tabela]:
+            self.grupos[tabela][grupo] = Resumo()
+        self.grupos[tabela][grupo].adicionar(salario, vagas, ordenar)
+        self.contribuicoes[documento] = (grupo, salario, vagas, data_fim)
+
+    def remover_tabela(self, tabela: str):
+        self.grupos[tabela] = {}
+        for documento in [documento for documento in self.contribuicoes if documento[0] == tabela]:
+            del self.contribuicoes[documento]
+        self.vencimentos = [vencimento for vencimento in self.vencimentos if vencimento[1] != tabela]
+        heapq.heapify(self.vencimentos)
+
+    #tira as oportunidades que fecharam desde a última leitura; entradas de linhas já alteradas são ignoradas
+    def vencer(self, hoje: date):
+        while self.vencimentos and self.vencimentos[0][0] < hoje:
+            data_fim, tabela, id = heapq.heappop(self.vencimentos)
+            contribuicao = self.contribuicoes.get((tabela, id))
+            if contribuicao is not None and contribuicao[3] == data_fim:
+                self.remover((tabela, id))
+
+    async def ler(self, session, tabela: str, ids=None):
+        model_class, colunas = TABELAS_ESTATISTICAS[tabela]
+        query = select(model_class.id, *(getattr(model_class, coluna) for coluna in colunas))
+        if ids is not None:
+            query = query.where(model_class.id.in_(ids))
+
+        encontrados = set()
+        resultado = await session.stream(query.execution_options(yield_per=5000))
+        async for row in resultado:
+            self.adicionar(tabela, row, self.hoje, ordenar=ids is not None)
+            encontrados.add(row.id)
+        if ids is None:
+            for resumo in self.grupos[tabela].values():
+                resumo.salarios.sort()
+        return encontrados
+
+    async def atualizar(self):
+        self.hoje = date.today()
+        await super().atualizar()
+        self.vencer(self.hoje)
+
+    def resumos(self, tabela: str):
+        return [
+            ResumoOportunidades(
+                vertente=vertente,
+                quantidade=resumo.quantidade,
+                salario_medio=resumo.media(),
+                salario_mediano=resumo.mediana(),
+                vagas=resumo.vagas if tabela == "bolsa" else None,
+            )
+            for vertente, resumo in sorted(self.grupos[tabela].items(), key=lambda item: item[0] or "")
+        ]
+
+
+agregados_oportunidades = AgregadosOportunidades()
+ouvir(agregados_oportunidades.alteracao)
+
+
+#o custo da leitura depende só da quantidade de grupos (vertentes, níveis e categorias), não de linhas
+async def estatisticas() -> Estatisticas:
+    marcar_tabelas(*TABELAS_ESTATISTICAS)
+    await agregados_oportunidades.atualizar()
+    agregados = agregados_oportunidades
+    return Estatisticas(
+        estagios=agregados.resumos("estagio"),
+        bolsas=agregados.resumos("bolsa"),
+        total_vagas=sum(resumo.vagas for resumo in agregados.grupos["bolsa"].values()),
+        cursos=[
+            ContagemCursos(nivel=nivel, categoria=categoria, quantidade=resumo.quantidade)
+            for (nivel, categoria), resumo in sorted(agregados.grupos["curso"].items(), key=lambda item: (item[0][0] or "", item[0][1] or ""))
+        ],
+    )
@@ -0,0 +1,23 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+#descreve uma alteração feita por uma mutation; id None quer dizer que várias linhas da tabela podem ter mudado
+@dataclass
+class Alteracao:
+    tabela: str
+    acao: str   #as opções são criar, atualizar e deletar
+    id: Optional[int] = None
+    origem: Optional[str] = None   #o worker que fez a alteração, quando ela chegou pelo barramento (None = este processo)
+
+
+ouvintes = []
+
+#registra uma função que vai ser chamada a cada alteração (ex: invalidar o cache)
+def ouvir(funcao):
+    ouvintes.append(funcao)
+    return funcao
+
+def notificar(alteracao: Alteracao):
+    for funcao in ouvintes:
+        funcao(alteracao)
@@ -0,0 +1,83 @@
+from typing import Optional
+from dataclasses import fields
+import datetime
+import strawberry
+from sqlalchemy import select
+from geografia import ceps_no_raio
+from models import Empresa, Endereco, Estagio
+
+
+#tipos de intervalo usados pelos filtros (os dois limites são inclusivos e opcionais)
+@strawberry.input
+class FaixaNumero:
+    minimo: Optional[float] = None
+    maximo: Optional[float] = None
+
+@strawberry.input
+class FaixaData:
+    de: Optional[datetime.date] = None
+    ate: Optional[datetime.date] = None
+
+
+#busca por proximidade: endereços cujo CEP fica a até km quilômetros do ponto
+@strawberry.input
+class Raio:
+    latitude: float
+    longitude: float
+    km: float
+
+#filtro pelo endereço da empresa (nas empresas e nos estágios); cada campo é comparado com a coluna do endereço
+@strawberry.input
+class LocalizacaoFiltro:
+    cidade: Optional[str] = None
+    estado: Optional[str] = None
+    cep: Optional[str] = None
+    raio: Optional[Raio] = None
+
+
+#a localização vira subqueries IN que seguem as chaves estrangeiras (estagio.empresa_id -> empresa.endereco_id ->
+#endereco), todas indexadas; o banco resolve como semi-join, sem repetir linhas e sem trazer colunas das outras tabelas
+def condicao_localizacao(model_class, filtro):
+    enderecos = select(Endereco.id).where(*condicoes_filtro(Endereco, filtro))
+    if model_class is Empresa:
+        return Empresa.endereco_id.in_(enderecos)
+    if model_class is Estagio:
+        return Estagio.empresa_id.in_(select(Empresa.id).where(Empresa.endereco_id.in_(enderecos)))
+    raise Exception(f"Filtro por localização não disponível para {model_class.__tablename__}")
+
+#transforma o input de filtro em condições do WHERE; cada campo do input tem o nome de uma coluna do model
+def condicoes_filtro(model_class, filtro):
+    condicoes = []
+    if filtro is None:
+        return condicoes
+
+    for campo in fields(filtro):
+        valor = getattr(filtro, campo.name)
+        if valor is None:
+            continue
+
+        if isinstance(valor, LocalizacaoFiltro):
+            condicoes.append(condicao_localizacao(model_class, valor))
+            continue
+        if isinstance(valor, Raio):
+            condicoes.append(model_class.cep.in_(ceps_no_raio(valor.latitude, valor.longitude, valor.km)))
+            continue
+
+        coluna = getattr(model_class, campo.name)
+        if isinstance(valor, FaixaNumero):
+            if valor.minimo is not None:
+                condicoes.append(coluna >= valor.minimo)
+            if valor.maximo is not None:
+                condicoes.append(coluna <= valor.maximo)
+        elif isinstance(valor, FaixaData):
+            if valor.de is not None:
+                condicoes.append(coluna >= valor.de)
+            if valor.ate is not None:
+                condicoes.append(coluna <= valor.ate)
+        else:
+            condicoes.append(coluna == valor)
+
+    return condicoes
+
+def aplicar_filtro(query, model_class, filtro):
+    return query.where(*condicoes_filtro(model_class, filtro))
@@ -0,0 +1,113 @@
+import argparse
+import asyncio
+import csv
+import math
+import os
+import random
+from sqlalchemy import and_, insert, or_, select
+from sqlalchemy.ext.asyncio import create_async_engine
+from models import Base, CepGeocodificado, Endereco
+
+#lado de cada célula da grade em graus (0.1 grau é por volta de 11 km); a célula de cada CEP é calculada uma vez,
+#na importação, e fica num índice, então a busca por raio só lê os CEPs das células que tocam o círculo
+TAMANHO_CELULA = float(os.getenv("GRADE_CELULA", "0.1"))
+#a busca por raio lê uma faixa de células por linha da grade; raios que precisariam de mais faixas que isso
+#são recusados, para o custo da busca continuar limitado
+MAXIMO_FAIXAS = int(os.getenv("GRADE_MAXIMO_FAIXAS", "200"))
+KM_POR_GRAU = 111.32
+
+COLUNAS_GRADE = math.ceil(360 / TAMANHO_CELULA)
+
+
+def celula(latitude: float, longitude: float) -> int:
+    linha = math.floor((latitude + 90) / TAMANHO_CELULA)
+    coluna = math.floor((longitude + 180) / TAMANHO_CELULA) % COLUNAS_GRADE
+    return linha * COLUNAS_GRADE + coluna
+
+#células que cobrem o retângulo em volta do círculo; como a célula é linha * COLUNAS_GRADE + coluna, as células
+#de uma mesma linha são números seguidos e cada linha vira um intervalo (dois quando cruza o antimeridiano)
+def faixas_no_raio(latitude: float, longitude: float, km: float):
+    if km <= 0:
+        raise Exception("O raio deve ser maior que zero")
+    graus_latitude = km / KM_POR_GRAU
+    graus_longitude = km / (KM_POR_GRAU * max(math.cos(math.radians(latitude)), 0.01))
+
+    linhas = range(math.floor((max(latitude - graus_latitude, -90) + 90) / TAMANHO_CELULA),
+                   math.floor((min(latitude + graus_latitude, 90) + 90) / TAMANHO_CELULA) + 1)
+    if len(linhas) > MAXIMO_FAIXAS:
+        raise Exception(f"Raio de {km} km grande demais para a busca por proximidade")
+
+    primeira = math.floor((longitude - graus_longitude + 180) / TAMANHO_CELULA)
+    ultima = math.floor((longitude + graus_longitude + 180) / TAMANHO_CELULA)
+    if ultima - primeira + 1 >= COLUNAS_GRADE:
+        colunas = [(0, COLUNAS_GRADE - 1)]
+    elif primeira < 0:
+        colunas = [(primeira + COLUNAS_GRADE, COLUNAS_GRADE - 1), (0, ultima)]
+    elif ultima >= COLUNAS_GRADE:
+        colunas = [(primeira, COLUNAS_GRADE - 1), (0, ultima - COLUNAS_GRADE)]
+    else:
+        colunas = [(primeira, ultima)]
+    return [(linha * COLUNAS_GRADE + inicio, linha * COLUNAS_GRADE + fim) for linha in linhas for inicio, fim in colunas]
+
+#CEPs a até km quilômetros do ponto; a distância é a equirretangular (só soma e multiplicação, então roda em
+#qualquer banco) e o erro dela é desprezível para os raios de uma busca por proximidade
+def ceps_no_raio(latitude: float, longitude: float, km: float):
+    escala_longitude = math.cos(math.radians(latitude))
+    raio_graus = km / KM_POR_GRAU
+    delta_latitude = CepGeocodificado.latitude - latitude
+    delta_longitude = (CepGeocodificado.longitude - longitude) * escala_longitude
+    return select(CepGeocodificado.cep).where(and_(
+        or_(*(CepGeocodificado.celula.between(inicio, fim) for inicio, fim in faixas_no_raio(latitude, longitude, km))),
+        delta_latitude * delta_latitude + delta_longitude * delta_longitude <= raio_graus * raio_graus,
+    ))
+
+
+def linha_geocodificada(cep: str, latitude: float, longitude: float):
+    return {"cep": cep, "latitude": latitude, "longitude": longitude, "celula": celula(latitude, longitude)}
+
+#importa um CSV com as colunas cep, latitude e longitude (o CEP tem que estar no mesmo formato do endereço)
+async def importar_ceps(url: str, caminho: str, bloco: int = 5000):
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[CepGeocodificado.__table__])
+    with open(caminho, newline="", encoding="utf-8") as arquivo:
+        linhas = [linha_geocodificada(linha["cep"], float(linha["latitude"]), float(linha["longitude"])) for linha in csv.DictReader(arquivo)]
+    await inserir_ceps(engine, linhas, bloco)
+    await engine.dispose()
+    print(f"cep_geocodificado: {len(linhas)} CEPs importados")
+
+#para testes e benchmark: coordenadas aleatórias (dentro do Brasil) para os CEPs dos endereços que ainda não têm
+async def geocodificar_aleatorio(url: str, seed: int = 42, bloco: int = 5000):
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[CepGeocodificado.__table__])
+        ceps = (await conn.execute(
+            select(Endereco.cep).distinct()
+            .where(Endereco.cep.is_not(None), Endereco.cep.not_in(select(CepGeocodificado.cep)))
+        )).scalars().all()
+    rng = random.Random(seed)
+    linhas = [linha_geocodificada(cep, rng.uniform(-33.7, 5.2), rng.uniform(-73.9, -34.8)) for cep in ceps]
+    await inserir_ceps(engine, linhas, bloco)
+    await engine.dispose()
+    print(f"cep_geocodificado: {len(linhas)} CEPs geocodificados")
+
+async def inserir_ceps(engine, linhas, bloco):
+    for inicio in range(0, len(linhas), bloco):
+        async with engine.begin() as conn:
+            await conn.execute(insert(CepGeocodificado.__table__), linhas[inicio:inicio + bloco])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carrega as coordenadas dos CEPs usadas na busca por proximidade")
+    parser.add_argument("--url", default=os.getenv("DATABASE"))
+    parser.add_argument("--csv", help="arquivo com as colunas cep, latitude e longitude")
+    parser.add_argument("--aleatorio", action="store_true", help="gera coordenadas aleatórias para os CEPs dos endereços (testes)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.csv:
+        asyncio.run(importar_ceps(args.url, args.csv))
+    elif args.aleatorio:
+        asyncio.run(geocodificar_aleatorio(args.url, args.seed))
+    else:
+        parser.error("informe --csv ou --aleatorio")
@@ -0,0 +1,83 @@
+import asyncio
+import base64
+import datetime
+import heapq
+import json
+from typing import Optional
+from sqlalchemy import select
+from database_config import get_session
+from paginacao import PAGINA_PADRAO, Direcao, depois_de, nulos_maiores, validar_tamanho
+
+
+#o cursor da linha do tempo guarda a posição em cada tabela: a última (data, id) entregue de cada uma
+def codificar_cursor_linha_do_tempo(campo: str, direcao: Direcao, posicoes: dict) -> str:
+    texto = json.dumps(
+        [campo, direcao.value, {tabela: [valor.isoformat() if valor is not None else None, id] for tabela, (valor, id) in posicoes.items()}],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(texto.encode()).decode()
+
+def decodificar_cursor_linha_do_tempo(cursor: str, campo: str, direcao: Direcao) -> dict:
+    try:
+        campo_cursor, direcao_cursor, posicoes = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        posicoes = {
+            tabela: (datetime.date.fromisoformat(valor) if valor is not None else None, int(id))
+            for tabela, (valor, id) in posicoes.items()
+        }
+    except Exception:
+        raise Exception("Cursor inválido")
+
+    #um cursor só vale para a ordenação em que foi gerado
+    if campo_cursor != campo or direcao_cursor != direcao.value:
+        raise Exception("Cursor inválido para esta ordenação")
+    return posicoes
+
+
+#próximas linhas de uma tabela na ordem (campo, id), usando o índice (campo, id) dela
+async def ler_tabela(model_class, colunas, campo: str, decrescente: bool, posicao, condicoes, tamanho: int):
+    coluna = getattr(model_class, campo)
+    query = select(*colunas).where(*condicoes)
+    async with get_session() as session:
+        nulos_sao_maiores = nulos_maiores(session)
+        if posicao is not None:
+            query = query.where(depois_de(coluna, model_class.id, posicao[0], posicao[1], decrescente, nulos_sao_maiores))
+        ordem = [coluna.desc(), model_class.id.desc()] if decrescente else [coluna.asc(), model_class.id.asc()]
+        resultado = await session.execute(query.order_by(*ordem).limit(tamanho + 1))
+        return nulos_sao_maiores, resultado.all()
+
+#linha do tempo de várias tabelas ordenada por uma coluna de data: cada tabela devolve só as suas primeiras
+#first + 1 linhas depois da posição do cursor e as listas já ordenadas são intercaladas aqui (k-way merge)
+#fontes: tabela -> (Model, colunas, conversor, condições do WHERE)
+async def linha_do_tempo(fontes: dict, campo: str, direcao: Direcao = Direcao.ASC,
+                         first: Optional[int] = None, after: Optional[str] = None):
+    validar_tamanho("first", first)
+    tamanho = first or PAGINA_PADRAO
+    decrescente = direcao == Direcao.DESC
+    posicoes = decodificar_cursor_linha_do_tempo(after, campo, direcao) if after is not None else {}
+
+    tabelas = list(fontes)
+    leituras = await asyncio.gather(*(
+        ler_tabela(fontes[tabela][0], fontes[tabela][1], campo, decrescente, posicoes.get(tabela), fontes[tabela][3], tamanho)
+        for tabela in tabelas
+    ))
+
+    #chave de ordenação igual à do banco: nulos antes ou depois das datas, e a ordem das tabelas desempata a mesma data
+    def fluxo(indice, tabela, nulos_maiores, linhas):
+        for row in linhas:
+            valor = getattr(row, campo)
+            grupo = 0 if valor is not None else (1 if nulos_maiores else -1)
+            yield (grupo, valor, indice, row.id), tabela, row
+
+    intercalado = heapq.merge(
+        *(fluxo(indice, tabela, nulos_maiores, linhas) for indice, (tabela, (nulos_maiores, linhas)) in enumerate(zip(tabelas, leituras))),
+        key=lambda item: item[0], reverse=decrescente,
+    )
+
+    itens = []
+    posicoes = dict(posicoes)
+    for (_, valor, _, id), tabela, row in intercalado:
+        if len(itens) == tamanho:
+            return itens, True
+        posicoes[tabela] = (valor, id)
+        itens.append((codificar_cursor_linha_do_tempo(campo, direcao, posicoes), fontes[tabela][2](row)))
+    return itens, False
@@ -0,0 +1,145 @@
+from typing import Generic, List, TypeVar
+from dataclasses import asdict
+import os
+import strawberry
+from sqlalchemy import insert, select
+from database_config import get_session
+from projecao import colunas_do_tipo, converter_linhas
+from eventos import Alteracao, notificar
+
+T = TypeVar("T")
+
+LOTE_MAXIMO = int(os.getenv("LOTE_MAXIMO", "50000"))
+#tamanho dos pedaços usados no IN (...) da checagem das chaves estrangeiras
+TAMANHO_BLOCO = 1000
+
+#colunas numéricas que não podem ser negativas
+COLUNAS_POSITIVAS = ("salario", "preco", "horas_semanais", "quantidade_vagas", "numero")
+
+
+@strawberry.type
+class ErroLote:
+    indice: int
+    mensagem: str
+
+#o índice é a posição do elemento na lista de entrada, como no ErroLote
+@strawberry.type
+class ItemLote(Generic[T]):
+    indice: int
+    elemento: T
+
+@strawberry.type
+class ResultadoLote(Generic[T]):
+    itens: List[ItemLote[T]]
+    erros: List[ErroLote]
+
+
+#validações que não precisam do banco
+def validar_linha(linha: dict):
+    for campo in ("nome", "rua"):
+        if campo in linha and not (linha[campo] or "").strip():
+            return f"O campo {campo} não pode ser vazio"
+
+    for campo in COLUNAS_POSITIVAS:
+        if linha.get(campo) is not None and linha[campo] < 0:
+            return f"O campo {campo} não pode ser negativo"
+
+    if linha.get("data_inicio") and linha.get("data_fim") and linha["data_fim"] < linha["data_inicio"]:
+        return "A data de fim não pode ser anterior à data de início"
+
+    return None
+
+#confere todas as chaves estrangeiras do lote com uma query por tabela referenciada (e não uma por linha)
+async def validar_chaves(session, model_class, linhas: List[dict]):
+    erros = {}
+    for chave in model_class.__table__.foreign_keys:
+        coluna = chave.parent.name
+        referencia = chave.column
+        ids = list({linha[coluna] for linha in linhas if linha.get(coluna) is not None})
+
+        existentes = set()
+        for inicio in range(0, len(ids), TAMANHO_BLOCO):
+            bloco = ids[inicio:inicio + TAMANHO_BLOCO]
+            resultado = await session.execute(select(referencia).where(referencia.in_(bloco)))
+            existentes.update(resultado.scalars().all())
+
+        for indice, linha in enumerate(linhas):
+            if linha.get(coluna) is not None and linha[coluna] not in existentes:
+                erros.setdefault(indice, f"{referencia.table.name} {linha[coluna]} não existe")
+    return erros
+
+#insere todas as linhas de uma vez e devolve as linhas inseridas na mesma ordem da lista; com RETURNING quando o
+#banco garante essa ordem (sort_by_parameter_order), senão pelo flush do ORM
+#as linhas devolvidas têm só as colunas pedidas, na mesma ordem
+async def inserir(session, model_class, colunas, linhas: List[dict]):
+    dialeto = session.bind.dialect
+    if dialeto.insert_executemany_returning_sort_by_parameter_order:
+        query = insert(model_class).returning(*colunas, sort_by_parameter_order=True)
+        resultado = await session.execute(query, linhas)
+        return resultado.all()
+
+    objetos = [model_class(**linha) for linha in linhas]
+    session.add_all(objetos)
+    await session.flush()
+    return [tuple(getattr(objeto, coluna.key) for coluna in colunas) for objeto in objetos]
+
+#se o lote inteiro falhar no banco, cada linha é tentada no seu próprio savepoint para descobrir qual deu erro
+async def inserir_separado(session, model_class, colunas, linhas: List[dict], indices: List[int], erros: dict):
+    inseridas = []
+    for indice, linha in zip(indices, linhas):
+        try:
+            async with session.begin_nested():
+                inseridas.extend((indice, row) for row in await inserir(session, model_class, colunas, [linha]))
+        except Exception as e:
+            erros[indice] = str(e)
+    return inseridas
+
+async def criar_em_lote(model_class, tipo, inputs, atomico: bool):
+    if len(inputs) > LOTE_MAXIMO:
+        raise Exception(f"O lote pode ter no máximo {LOTE_MAXIMO} elementos")
+
+    colunas = colunas_do_tipo(model_class, tipo)
+    converter = converter_linhas(tipo, colunas)
+
+    linhas = [asdict(item) for item in inputs]
+    async with get_session() as session:
+        try:
+            erros = {}
+            for indice, linha in enumerate(linhas):
+                mensagem = validar_linha(linha)
+                if mensagem:
+                    erros[indice] = mensagem
+            for indice, mensagem in (await validar_chaves(session, model_class, linhas)).items():
+                erros.setdefault(indice, mensagem)
+
+            if atomico and erros:
+                await session.rollback()
+                return ResultadoLote(itens=[], erros=[ErroLote(indice=i, mensagem=m) for i, m in sorted(erros.items())])
+
+            indices = [i for i in range(len(linhas)) if i not in erros]
+            validas = [linhas[i] for i in indices]
+            #inseridas: (índice na entrada, linha inserida)
+            inseridas = []
+            if validas:
+                if atomico:
+                    inseridas = list(zip(indices, await inserir(session, model_class, colunas, validas)))
+                else:
+                    try:
+                        async with session.begin_nested():
+                            inseridas = list(zip(indices, await inserir(session, model_class, colunas, validas)))
+                    except Exception:
+                        inseridas = await inserir_separado(session, model_class, colunas, validas, indices, erros)
+
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            raise Exception(f"Erro: {str(e)}")
+
+    itens = [ItemLote(indice=indice, elemento=converter(row)) for indice, row in inseridas]
+    for item in itens:
+        notificar(Alteracao(model_class.__tablename__, "criar", item.elemento.id))
+
+    return ResultadoLote(
+        itens=itens,
+        erros=[ErroLote(indice=i, mensagem=m) for i, m in sorted(erros.items())],
+    )
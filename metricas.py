@@ -0,0 +1,219 @@
+import inspect
+import os
+import time
+from contextvars import ContextVar
+import psutil
+from graphql import FieldNode
+from graphql.utilities import get_operation_ast
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from strawberry.extensions import SchemaExtension
+from strawberry.extensions.tracing.utils import should_skip_tracing
+
+
+#limites (em segundos) dos histogramas de latência
+LIMITES_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+#limites da quantidade de comandos SQL por requisição
+LIMITES_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 500)
+
+#o nome da operação vem do cliente e vira label no Prometheus: os nomes listados aqui sempre têm label próprio,
+#os outros só até o limite de labels; depois disso tudo que é novo cai em "outros"
+OPERACOES_CONHECIDAS = {nome.strip() for nome in os.getenv("METRICAS_OPERACOES", "").split(",") if nome.strip()}
+MAXIMO_OPERACOES = int(os.getenv("METRICAS_MAXIMO_OPERACOES", "200"))
+
+
+class Histograma:
+    def __init__(self, limites):
+        self.limites = limites
+        self.contagens = [0] * len(limites)
+        self.quantidade = 0
+        self.soma = 0.0
+
+    def observar(self, valor):
+        self.quantidade += 1
+        self.soma += valor
+        for posicao, limite in enumerate(self.limites):
+            if valor <= limite:
+                self.contagens[posicao] += 1
+                break
+
+    #contagens acumuladas por limite, como o Prometheus espera
+    def acumulado(self):
+        total = 0
+        for limite, contagem in zip(self.limites, self.contagens):
+            total += contagem
+            yield str(limite), total
+        yield "+Inf", self.quantidade
+
+
+class Metricas:
+    def __init__(self):
+        self.operacoes = {}          #operação -> Histograma
+        self.resolvers = {}          #Tipo.campo -> Histograma
+        self.erros = {}              #operação -> quantidade de erros
+        self.consultas_sql = Histograma(LIMITES_CONSULTAS)
+        self.duracao_sql = Histograma(LIMITES_LATENCIA)
+        self.comandos_sql = Histograma(LIMITES_LATENCIA)
+
+    def rotulo_operacao(self, nome: str) -> str:
+        if nome in OPERACOES_CONHECIDAS or nome in self.operacoes or len(self.operacoes) < MAXIMO_OPERACOES:
+            return nome
+        return "outros"
+
+    def histograma(self, grupo, nome):
+        if nome not in grupo:
+            grupo[nome] = Histograma(LIMITES_LATENCIA)
+        return grupo[nome]
+
+
+metricas = Metricas()
+
+#comandos SQL da requisição atual: [quantidade, duração total]
+sql_da_requisicao = ContextVar("sql_da_requisicao", default=None)
+
+#o listener fica na classe Engine para valer para todas as engines criadas; o início fica no contexto da execução
+#(e não na conexão), então um comando que falha e nunca chega no after_cursor_execute não deixa nada para trás
+@event.listens_for(Engine, "before_cursor_execute")
+def inicio_comando(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.inicio_comando = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def fim_comando(conn, cursor, statement, parameters, context, executemany):
+    inicio = getattr(context, "inicio_comando", None)
+    if inicio is None:
+        return
+    duracao = time.perf_counter() - inicio
+    metricas.comandos_sql.observar(duracao)
+    contagem = sql_da_requisicao.get()
+    if contagem is not None:
+        contagem[0] += 1
+        contagem[1] += duracao
+
+
+#nome usado para agrupar a operação: o operationName ou, se não tiver, os campos raiz da query
+def nome_operacao(contexto):
+    if contexto.operation_name:
+        return contexto.operation_name
+    try:
+        operacao = get_operation_ast(contexto.graphql_document, None)
+    except Exception:
+        operacao = None
+    if operacao is None:
+        return "desconhecida"
+    campos = sorted({selecao.name.value for selecao in operacao.selection_set.selections if isinstance(selecao, FieldNode)})
+    return "+".join(campos[:5]) or "anonima"
+
+
+#as listas em stream só terminam quando o último item é entregue
+async def percorrer(gerador, histograma, inicio):
+    try:
+        async for item in gerador:
+            yield item
+    finally:
+        histograma.observar(time.perf_counter() - inicio)
+
+
+#mede a latência das operações e dos resolvers, os comandos SQL de cada requisição e os erros
+class MetricasGraphQL(SchemaExtension):
+    def on_operation(self):
+        contexto = self.execution_context
+        inicio = time.perf_counter()
+        contagem = [0, 0.0]
+        token = sql_da_requisicao.set(contagem)
+        try:
+            yield
+        finally:
+            sql_da_requisicao.reset(token)
+
+        nome = metricas.rotulo_operacao(nome_operacao(contexto))
+        metricas.histograma(metricas.operacoes, nome).observar(time.perf_counter() - inicio)
+        metricas.consultas_sql.observar(contagem[0])
+        metricas.duracao_sql.observar(contagem[1])
+
+        erros = getattr(contexto.result, "errors", None) or contexto.pre_execution_errors
+        if erros:
+            metricas.erros[nome] = metricas.erros.get(nome, 0) + len(erros)
+
+    #só os campos com resolver próprio são medidos; ler um atributo não precisa de histograma
+    def resolve(self, _next, root, info, *args, **kwargs):
+        if should_skip_tracing(_next, info):
+            return _next(root, info, *args, **kwargs)
+
+        histograma = metricas.histograma(metricas.resolvers, f"{info.parent_type.name}.{info.field_name}")
+        inicio = time.perf_counter()
+        resultado = _next(root, info, *args, **kwargs)
+
+        if inspect.isawaitable(resultado):
+            async def aguardar():
+                valor = await resultado
+                if inspect.isasyncgen(valor):
+                    return percorrer(valor, histograma, inicio)
+                histograma.observar(time.perf_counter() - inicio)
+                return valor
+            return aguardar()
+
+        if inspect.isasyncgen(resultado):
+            return percorrer(resultado, histograma, inicio)
+
+        histograma.observar(time.perf_counter() - inicio)
+        return resultado
+
+
+processo = psutil.Process()
+
+def escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def linhas_histograma(nome, histograma, rotulos=""):
+    separador = "," if rotulos else ""
+    for limite, total in histograma.acumulado():
+        yield f'{nome}_bucket{{{rotulos}{separador}le="{limite}"}} {total}'
+    chaves = f"{{{rotulos}}}" if rotulos else ""
+    yield f"{nome}_sum{chaves} {histograma.soma}"
+    yield f"{nome}_count{chaves} {histograma.quantidade}"
+
+def linhas_contador(nome, valor, rotulos=""):
+    yield f"{nome}{{{rotulos}}} {valor}" if rotulos else f"{nome} {valor}"
+
+
+#todas as métricas no formato de texto do Prometheus
+def exportar(extras=()):
+    linhas = []
+
+    linhas.append("# TYPE graphql_operacao_duracao_segundos histogram")
+    for nome, histograma in sorted(metricas.operacoes.items()):
+        linhas.extend(linhas_histograma("graphql_operacao_duracao_segundos", histograma, f'operacao="{escapar(nome)}"'))
+
+    linhas.append("# TYPE graphql_resolver_duracao_segundos histogram")
+    for nome, histograma in sorted(metricas.resolvers.items()):
+        linhas.extend(linhas_histograma("graphql_resolver_duracao_segundos", histograma, f'campo="{escapar(nome)}"'))
+
+    linhas.append("# TYPE graphql_erros_total counter")
+    for nome, quantidade in sorted(metricas.erros.items()):
+        linhas.extend(linhas_contador("graphql_erros_total", quantidade, f'operacao="{escapar(nome)}"'))
+
+    linhas.append("# TYPE sql_comandos_por_requisicao histogram")
+    linhas.extend(linhas_histograma("sql_comandos_por_requisicao", metricas.consultas_sql))
+    linhas.append("# TYPE sql_duracao_por_requisicao_segundos histogram")
+    linhas.extend(linhas_histograma("sql_duracao_por_requisicao_segundos", metricas.duracao_sql))
+    linhas.append("# TYPE sql_comando_duracao_segundos histogram")
+    linhas.extend(linhas_histograma("sql_comando_duracao_segundos", metricas.comandos_sql))
+
+    with processo.oneshot():
+        cpu = processo.cpu_times()
+        linhas.append("# TYPE processo_cpu_segundos_total counter")
+        linhas.extend(linhas_contador("processo_cpu_segundos_total", cpu.user + cpu.system))
+        linhas.append("# TYPE processo_cpu_percentual gauge")
+        linhas.extend(linhas_contador("processo_cpu_percentual", processo.cpu_percent()))
+        linhas.append("# TYPE processo_memoria_rss_bytes gauge")
+        linhas.extend(linhas_contador("processo_memoria_rss_bytes", processo.memory_info().rss))
+
+    #números de outros componentes (cache, pool...) no formato prefixo -> dicionário
+    for prefixo, valores in extras:
+        for chave, valor in valores.items():
+            if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+                linhas.append(f"# TYPE {prefixo}_{chave} gauge")
+                linhas.extend(linhas_contador(f"{prefixo}_{chave}", valor))
+
+    return "\n".join(linhas) + "\n"
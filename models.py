@@ -6,6 +6,13 @@ Base = declarative_base()
 #definindo as classes para as tabelas no banco de dados
 class Endereco(Base):
     __tablename__ = 'endereco'
+    #índices (coluna, id) usados pela paginação por cursor em cada ordenação
+    __table_args__ = (
+        sa.Index('ix_endereco_cidade_id', 'cidade', 'id'),
+        #índices compostos para os filtros mais usados de cada lista
+        sa.Index('ix_endereco_estado_cidade', 'estado', 'cidade', 'id'),
+        sa.Index('ix_endereco_cep', 'cep'),
+    )
     def __str__(self):
         return f"""Rua: {self.rua},
             Número: {self.numero},
@@ -29,6 +36,10 @@ class Endereco(Base):
 
 class Empresa(Base):
     __tablename__ = 'empresa'
+    __table_args__ = (
+        sa.Index('ix_empresa_nome_id', 'nome', 'id'),
+        sa.Index('ix_empresa_vertente_status', 'vertente', 'status', 'id'),
+    )
     def __str__(self):
         return f"""Nome: {self.nome},
             Vertente: {self.vertente},
@@ -44,7 +55,7 @@ class Empresa(Base):
     nome = sa.Column(sa.String) 
     vertente = sa.Column(sa.String) 
     CNPJ = sa.Column(sa.String)
-    endereco_id = sa.Column(sa.Integer, sa.ForeignKey('endereco.id'))
+    endereco_id = sa.Column(sa.Integer, sa.ForeignKey('endereco.id'), index=True)
     telefone = sa.Column(sa.String)
     email = sa.Column(sa.String)
     website = sa.Column(sa.String)
@@ -58,6 +69,9 @@ class Empresa(Base):
 
 class Plataforma(Base):
     __tablename__ = 'plataforma'
+    __table_args__ = (
+        sa.Index('ix_plataforma_nome_id', 'nome', 'id'),
+    )
     def __str__(self):
         return f"""Nome: {self.nome},
             Email: {self.email},
@@ -77,6 +91,14 @@ class Plataforma(Base):
 
 class Curso(Base):
     __tablename__ = 'curso'
+    __table_args__ = (
+        sa.Index('ix_curso_nome_id', 'nome', 'id'),
+        sa.Index('ix_curso_preco_id', 'preco', 'id'),
+        sa.Index('ix_curso_data_inicio_id', 'data_inicio', 'id'),
+        sa.Index('ix_curso_data_fim_id', 'data_fim', 'id'),
+        sa.Index('ix_curso_vertente_nivel_categoria', 'vertente', 'nivel', 'categoria', 'id'),
+        sa.Index('ix_curso_vertente_data_fim', 'vertente', 'data_fim', 'id'),
+    )
     def __str__(self):
         return f"""Nome: {self.nome},
             Vertente: {self.vertente},
@@ -92,7 +114,7 @@ class Curso(Base):
     nome = sa.Column(sa.String)
     categoria = sa.Column(sa.String)   #se é pago ou não
     preco = sa.Column(sa.Float)
-    plataforma_id =  sa.Column(sa.Integer, sa.ForeignKey('plataforma.id'))
+    plataforma_id =  sa.Column(sa.Integer, sa.ForeignKey('plataforma.id'), index=True)
     nivel = sa.Column(sa.String)    #as três opções são, iniciante, intermédiario e avançado
     vertente = sa.Column(sa.String)
     data_inicio = sa.Column(sa.DATE)
@@ -103,6 +125,14 @@ class Curso(Base):
 
 class Estagio(Base):
     __tablename__ = 'estagio'
+    __table_args__ = (
+        sa.Index('ix_estagio_nome_id', 'nome', 'id'),
+        sa.Index('ix_estagio_salario_id', 'salario', 'id'),
+        sa.Index('ix_estagio_data_inicio_id', 'data_inicio', 'id'),
+        sa.Index('ix_estagio_data_fim_id', 'data_fim', 'id'),
+        sa.Index('ix_estagio_vertente_remunerado_data_fim', 'vertente', 'remunerado', 'data_fim', 'id'),
+        sa.Index('ix_estagio_vertente_salario', 'vertente', 'salario', 'id'),
+    )
     def __str__(self):
         return f'''Nome: {self.nome}, 
             Vertente: {self.vertente},
@@ -119,7 +149,7 @@ class Estagio(Base):
     nome = sa.Column(sa.String)
     vertente = sa.Column(sa.String)
     salario = sa.Column(sa.Float)
-    empresa_id = sa.Column(sa.Integer, sa.ForeignKey('empresa.id'))
+    empresa_id = sa.Column(sa.Integer, sa.ForeignKey('empresa.id'), index=True)
     remunerado  = sa.Column(sa.Boolean)
     horas_semanais = sa.Column(sa.Integer)
     descricao = sa.Column(sa.String)
@@ -131,6 +161,14 @@ class Estagio(Base):
 
 class Bolsa(Base):
     __tablename__ = 'bolsa'
+    __table_args__ = (
+        sa.Index('ix_bolsa_nome_id', 'nome', 'id'),
+        sa.Index('ix_bolsa_salario_id', 'salario', 'id'),
+        sa.Index('ix_bolsa_data_inicio_id', 'data_inicio', 'id'),
+        sa.Index('ix_bolsa_data_fim_id', 'data_fim', 'id'),
+        sa.Index('ix_bolsa_vertente_remunerado_data_fim', 'vertente', 'remunerado', 'data_fim', 'id'),
+        sa.Index('ix_bolsa_vertente_salario', 'vertente', 'salario', 'id'),
+    )
     def __str__(self):
         return f"""Nome: {self.nome},
             Vertente: {self.vertente},
@@ -154,13 +192,17 @@ class Bolsa(Base):
     descricao = sa.Column(sa.String)
     data_inicio = sa.Column(sa.DATE)
     data_fim = sa.Column(sa.DATE) 
-    professor_id = sa.Column(sa.Integer, sa.ForeignKey('professor.id'))
+    professor_id = sa.Column(sa.Integer, sa.ForeignKey('professor.id'), index=True)
 
     #definindo o relacionamento com a tabela professor (many to one)
     professor = sa.orm.relationship("Professor", back_populates="bolsas")
 
 class Professor(Base):
     __tablename__ = 'professor'
+    __table_args__ = (
+        sa.Index('ix_professor_nome_id', 'nome', 'id'),
+        sa.Index('ix_professor_vertente', 'vertente', 'id'),
+    )
     
     def __str__(self):
         return f"""Nome: {self.nome}, 
@@ -180,4 +222,17 @@ class Professor(Base):
     formacao = sa.Column(sa.String)
 
     #relacionamento com a tabela bolsa (one to many)
-    bolsas = sa.orm.relationship("Bolsa", back_populates="professor")
\ No newline at end of file
+    bolsas = sa.orm.relationship("Bolsa", back_populates="professor")
+
+#coordenadas de cada CEP, usadas na busca por proximidade; a célula da grade (calculada na importação, ver geografia.py)
+#fica indexada para a busca por raio ler só os CEPs perto do ponto
+class CepGeocodificado(Base):
+    __tablename__ = 'cep_geocodificado'
+    __table_args__ = (
+        sa.Index('ix_cep_geocodificado_celula', 'celula', 'latitude', 'longitude', 'cep'),
+    )
+
+    cep = sa.Column(sa.String, primary_key=True)
+    latitude = sa.Column(sa.Float, nullable=False)
+    longitude = sa.Column(sa.Float, nullable=False)
+    celula = sa.Column(sa.Integer, nullable=False)
@@ -1,27 +1,55 @@
-import psutil
-import time
 import csv
+import os
+import time
+import urllib.request
+
+#lê o /metrics da API uma vez por segundo; não depende do PID, então continua funcionando depois de um restart
+URL_METRICAS = os.getenv("URL_METRICAS", "http://localhost:8000/metrics")
 
-target_pids = [27420]
-pid_names = {
-    27420: "API GraphQL"
-}
+def ler_metricas():
+    valores = {}
+    with urllib.request.urlopen(URL_METRICAS, timeout=5) as resposta:
+        for linha in resposta.read().decode().splitlines():
+            if not linha or linha.startswith("#"):
+                continue
+            nome, valor = linha.rsplit(" ", 1)
+            valores[nome] = float(valor)
+    return valores
+
+def total(valores, prefixo):
+    return sum(valor for nome, valor in valores.items() if nome.startswith(prefixo))
 
 with open("monitoramento.csv", "w", newline="") as f:
     writer = csv.writer(f)
-    writer.writerow(["timestamp", "pid", "name", "cpu_percent", "memory_mb"])
+    writer.writerow(["timestamp", "cpu_percent", "memory_mb", "operacoes", "latencia_media_ms", "erros", "sql_por_requisicao"])
 
+    anterior = None
     try:
         while True:
-            for pid in target_pids:
-                try:
-                    proc = psutil.Process(pid)
-                    cpu = proc.cpu_percent(interval=0.1)
-                    mem = proc.memory_info().rss / (1024 * 1024)
-                    name = pid_names.get(pid, f"PID {pid}")
-                    writer.writerow([time.time(), pid, name, cpu, mem])
-                except psutil.NoSuchProcess:
-                    pass
+            try:
+                valores = ler_metricas()
+            except OSError:
+                time.sleep(1)
+                continue
+
+            operacoes = total(valores, "graphql_operacao_duracao_segundos_count")
+            soma = total(valores, "graphql_operacao_duracao_segundos_sum")
+            erros = total(valores, "graphql_erros_total")
+            comandos = valores.get("sql_comandos_por_requisicao_sum", 0)
+
+            #as médias são do último intervalo, não desde que a API subiu
+            if anterior is not None and operacoes >= anterior[0]:
+                novas = operacoes - anterior[0]
+                latencia = (soma - anterior[1]) / novas * 1000 if novas else 0
+                sql = (comandos - anterior[3]) / novas if novas else 0
+                writer.writerow([
+                    time.time(),
+                    valores.get("processo_cpu_percentual", 0),
+                    valores.get("processo_memoria_rss_bytes", 0) / (1024 * 1024),
+                    novas, latencia, erros - anterior[2], sql,
+                ])
+                f.flush()
+            anterior = (operacoes, soma, erros, comandos)
             time.sleep(1)
     except KeyboardInterrupt:
         print("Monitoramento encerrado.")
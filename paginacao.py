@@ -0,0 +1,125 @@
+from typing import Generic, List, Optional, TypeVar
+from enum import Enum
+import base64
+import datetime
+import json
+import strawberry
+from sqlalchemy import and_, or_
+
+T = TypeVar("T")
+
+PAGINA_PADRAO = 20
+PAGINA_MAXIMA = 100
+
+
+@strawberry.enum
+class Direcao(Enum):
+    ASC = "asc"
+    DESC = "desc"
+
+@strawberry.type
+class PageInfo:
+    hasNextPage: bool
+    hasPreviousPage: bool
+    startCursor: Optional[str] = None
+    endCursor: Optional[str] = None
+
+@strawberry.type
+class Edge(Generic[T]):
+    cursor: str
+    node: T
+
+@strawberry.type
+class Connection(Generic[T]):
+    edges: List[Edge[T]]
+    pageInfo: PageInfo
+
+
+#o cursor guarda o valor da coluna de ordenação e o id da última linha vista
+def codificar_cursor(valor, id: int) -> str:
+    if isinstance(valor, datetime.date):
+        valor = valor.isoformat()
+    texto = json.dumps([valor, id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(texto.encode()).decode()
+
+def decodificar_cursor(cursor: str, coluna):
+    try:
+        valor, id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise Exception("Cursor inválido")
+
+    if valor is not None and coluna.type.python_type is datetime.date:
+        valor = datetime.date.fromisoformat(valor)
+    return valor, id
+
+#postgres e oracle ordenam os nulos como maiores valores, mysql e sqlite como menores
+def nulos_maiores(session) -> bool:
+    return session.bind.dialect.name in ("postgresql", "oracle")
+
+#condição que seleciona as linhas que vêm depois de (valor, id) na ordenação escolhida
+def depois_de(coluna, coluna_id, valor, id, decrescente: bool, nulos_maiores: bool):
+    id_depois = coluna_id < id if decrescente else coluna_id > id
+    if coluna is coluna_id:
+        return id_depois
+
+    #os nulos ficam no fim do percurso quando o banco os considera maiores e a ordem é crescente (ou o contrário)
+    nulos_no_fim = nulos_maiores != decrescente
+    if valor is None:
+        condicao = and_(coluna.is_(None), id_depois)
+        return condicao if nulos_no_fim else or_(condicao, coluna.is_not(None))
+
+    valor_depois = coluna < valor if decrescente else coluna > valor
+    condicao = or_(valor_depois, and_(coluna == valor, id_depois))
+    return or_(condicao, coluna.is_(None)) if nulos_no_fim else condicao
+
+def validar_tamanho(nome: str, valor: Optional[int]):
+    if valor is not None and not 1 <= valor <= PAGINA_MAXIMA:
+        raise Exception(f"{nome} deve estar entre 1 e {PAGINA_MAXIMA}")
+
+#paginação por keyset: nunca usa OFFSET, então o custo de cada página não depende da posição na tabela
+async def paginar(session, query, model_class, converter, campo: str = "id", direcao: Direcao = Direcao.ASC,
+                  first: Optional[int] = None, after: Optional[str] = None,
+                  last: Optional[int] = None, before: Optional[str] = None) -> Connection:
+    validar_tamanho("first", first)
+    validar_tamanho("last", last)
+
+    coluna = getattr(model_class, campo)
+    coluna_id = model_class.id
+    decrescente = direcao == Direcao.DESC
+    nulos_sao_maiores = nulos_maiores(session)
+
+    if after is not None:
+        valor, id = decodificar_cursor(after, coluna)
+        query = query.where(depois_de(coluna, coluna_id, valor, id, decrescente, nulos_sao_maiores))
+    if before is not None:
+        valor, id = decodificar_cursor(before, coluna)
+        query = query.where(depois_de(coluna, coluna_id, valor, id, not decrescente, nulos_sao_maiores))
+
+    #com last e sem first a página é lida de trás pra frente e invertida no final
+    para_tras = last is not None and first is None
+    tamanho = (last if para_tras else first) or PAGINA_PADRAO
+    invertido = decrescente != para_tras
+    ordem = [coluna.desc(), coluna_id.desc()] if invertido else [coluna.asc(), coluna_id.asc()]
+    if coluna is coluna_id:
+        ordem = ordem[1:]
+
+    resultado = await session.execute(query.order_by(*ordem).limit(tamanho + 1))
+    linhas = resultado.all()
+    tem_mais = len(linhas) > tamanho
+    linhas = linhas[:tamanho]
+    if para_tras:
+        linhas.reverse()
+
+    edges = [
+        Edge(cursor=codificar_cursor(getattr(row, campo), row.id), node=converter(row))
+        for row in linhas
+    ]
+    return Connection(
+        edges=edges,
+        pageInfo=PageInfo(
+            hasNextPage=before is not None if para_tras else tem_mais,
+            hasPreviousPage=tem_mais if para_tras else after is not None,
+            startCursor=edges[0].cursor if edges else None,
+            endCursor=edges[-1].cursor if edges else None,
+        ),
+    )
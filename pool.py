@@ -0,0 +1,91 @@
+import logging
+import os
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+logger = logging.getLogger("pool")
+
+#esperas por uma conexão acima desse tempo (em segundos) são registradas no log
+ESPERA_LENTA = float(os.getenv("DB_POOL_ESPERA_LENTA", "0.1"))
+#limites (em segundos) do histograma do tempo de espera por uma conexão
+LIMITES_ESPERA = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+
+
+class MetricasPool:
+    def __init__(self):
+        self.checkouts = 0
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+        self.esperas_lentas = 0
+        self.timeouts = 0
+        self.overflows = 0   #conexões criadas além do tamanho do pool
+        self.histograma = [0] * (len(LIMITES_ESPERA) + 1)
+
+    def registrar_espera(self, espera: float):
+        self.checkouts += 1
+        self.espera_total += espera
+        self.espera_maxima = max(self.espera_maxima, espera)
+        for posicao, limite in enumerate(LIMITES_ESPERA):
+            if espera <= limite:
+                self.histograma[posicao] += 1
+                break
+        else:
+            self.histograma[-1] += 1
+
+
+#pool padrão do SQLAlchemy para drivers assíncronos, medindo quanto tempo cada checkout esperou por uma conexão
+class PoolMedido(AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metricas = MetricasPool()
+
+    def _do_get(self):
+        overflow_antes = self._overflow
+        inicio = time.perf_counter()
+        try:
+            conexao = super()._do_get()
+        except exc.TimeoutError:
+            self.metricas.timeouts += 1
+            logger.warning("Timeout esperando uma conexão do pool (%s)", self.status())
+            raise
+
+        espera = time.perf_counter() - inicio
+        self.metricas.registrar_espera(espera)
+        if self._overflow > overflow_antes and self._overflow > 0:
+            self.metricas.overflows += 1
+        if espera > ESPERA_LENTA:
+            self.metricas.esperas_lentas += 1
+            logger.warning("Checkout esperou %.3fs por uma conexão (%s)", espera, self.status())
+        return conexao
+
+    #o pool é recriado no dispose(); as métricas continuam de onde pararam
+    def recreate(self):
+        novo = super().recreate()
+        novo.metricas = self.metricas
+        return novo
+
+
+def estatisticas_pool(engine):
+    pool = engine.sync_engine.pool
+    if not isinstance(pool, PoolMedido):
+        return {"pool": type(pool).__name__}
+
+    metricas = pool.metricas
+    return {
+        "pool": type(pool).__name__,
+        "tamanho": pool.size(),
+        "em_uso": pool.checkedout(),
+        "ociosas": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+        "timeout": pool.timeout(),
+        "checkouts": metricas.checkouts,
+        "espera_total": metricas.espera_total,
+        "espera_media": metricas.espera_total / metricas.checkouts if metricas.checkouts else 0.0,
+        "espera_maxima": metricas.espera_maxima,
+        "esperas_lentas": metricas.esperas_lentas,
+        "timeouts": metricas.timeouts,
+        "overflows": metricas.overflows,
+        "histograma_espera": dict(zip([*map(str, LIMITES_ESPERA), "+Inf"], metricas.histograma)),
+    }
@@ -0,0 +1,60 @@
+from dataclasses import MISSING, fields
+from functools import lru_cache
+from strawberry.types.nodes import FragmentSpread, InlineFragment
+
+
+#junta os nomes dos campos pedidos pelo cliente no caminho indicado (ex: edges -> node), seguindo os fragmentos
+def nomes_selecionados(selecoes, caminho=()):
+    nomes = set()
+    for selecao in selecoes:
+        if isinstance(selecao, (FragmentSpread, InlineFragment)):
+            nomes |= nomes_selecionados(selecao.selections, caminho)
+        elif caminho:
+            if selecao.name == caminho[0]:
+                nomes |= nomes_selecionados(selecao.selections, caminho[1:])
+        else:
+            nomes.add(selecao.name)
+    return nomes
+
+#descobre quais colunas da tabela precisam ser lidas para responder o que foi pedido
+def colunas_selecionadas(info, model_class, tipo, caminho=(), extras=()):
+    nomes_graphql = nomes_selecionados(info.selected_fields[0].selections, caminho)
+    conversor = info.schema.config.name_converter
+    tabela = model_class.__table__.columns
+
+    colunas = {"id", *extras}
+    for campo in tipo.__strawberry_definition__.fields:
+        if conversor.get_graphql_name(campo) not in nomes_graphql:
+            continue
+        if campo.python_name in tabela:
+            colunas.add(campo.python_name)
+        #campos de relacionamento (ex: empresa) precisam da chave estrangeira (empresa_id)
+        elif f"{campo.python_name}_id" in tabela:
+            colunas.add(f"{campo.python_name}_id")
+
+    return [getattr(model_class, nome) for nome in sorted(colunas)]
+
+#monta o tipo direto da linha retornada; campos obrigatórios que não foram pedidos ficam como None
+#o código do conversor é gerado uma vez por (tipo, colunas) e lê a linha por posição, sem montar dicionários
+@lru_cache(maxsize=512)
+def _conversor(tipo, nomes):
+    faltando = [
+        campo.name for campo in fields(tipo)
+        if campo.init and campo.default is MISSING and campo.default_factory is MISSING
+        and campo.name not in nomes
+    ]
+    argumentos = [f"{nome}=row[{posicao}]" for posicao, nome in enumerate(nomes)]
+    argumentos += [f"{nome}=None" for nome in faltando]
+
+    escopo = {"tipo": tipo}
+    exec(f"def converter(row):\n    return tipo({', '.join(argumentos)})\n", escopo)
+    return escopo["converter"]
+
+def converter_linhas(tipo, colunas):
+    return _conversor(tipo, tuple(coluna.key for coluna in colunas))
+
+#todas as colunas da tabela que existem no tipo, para as leituras que não dependem da seleção (ex: dataloaders)
+@lru_cache(maxsize=None)
+def colunas_do_tipo(model_class, tipo):
+    tabela = model_class.__table__.columns
+    return tuple(getattr(model_class, campo.name) for campo in fields(tipo) if campo.init and campo.name in tabela)
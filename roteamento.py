@@ -0,0 +1,44 @@
+import os
+from strawberry.extensions import SchemaExtension
+from strawberry.types.graphql import OperationType
+from database_config import ler_de_replica, sessao_da_requisicao
+
+#por quantos segundos depois de uma mutation o mesmo cliente continua lendo do banco principal
+#(para ver as próprias escritas mesmo com atraso na replicação); 0 desliga
+LER_PROPRIAS_ESCRITAS = float(os.getenv("LER_PROPRIAS_ESCRITAS", "0"))
+COOKIE_ESCRITA = "escrita_recente"
+
+
+def escreveu_recentemente(contexto):
+    request = contexto.get("request") if isinstance(contexto, dict) else None
+    return request is not None and COOKIE_ESCRITA in request.cookies
+
+#queries leem das réplicas e mutations vão para o banco principal (inclusive os campos aninhados do resultado delas)
+class RoteamentoLeitura(SchemaExtension):
+    def on_execute(self):
+        contexto = self.execution_context
+        mutation = contexto.operation_type == OperationType.MUTATION
+        leitura = not mutation and not (LER_PROPRIAS_ESCRITAS > 0 and escreveu_recentemente(contexto.context))
+
+        token = ler_de_replica.set(leitura)
+        try:
+            yield
+        finally:
+            ler_de_replica.reset(token)
+
+        #o cookie expira sozinho quando acaba a janela, então a presença dele já basta
+        response = contexto.context.get("response") if isinstance(contexto.context, dict) else None
+        if mutation and LER_PROPRIAS_ESCRITAS > 0 and response is not None:
+            response.set_cookie(COOKIE_ESCRITA, "1", max_age=int(LER_PROPRIAS_ESCRITAS), httponly=True)
+
+
+#durante a execução, o get_session entrega a sessão da requisição que o context_getter colocou no contexto
+class SessaoCompartilhada(SchemaExtension):
+    def on_execute(self):
+        contexto = self.execution_context.context
+        sessao = contexto.get("sessao") if isinstance(contexto, dict) else None
+        token = sessao_da_requisicao.set(sessao)
+        try:
+            yield
+        finally:
+            sessao_da_requisicao.reset(token)
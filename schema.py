@@ -1,11 +1,34 @@
-from typing import List, Type, Optional
+from typing import Annotated, AsyncGenerator, List, Type, Optional, Union
+import asyncio
 import strawberry
+from strawberry.types import Info
+from strawberry.schema.config import StrawberryConfig
 from models import Empresa, Curso, Estagio, Bolsa, Professor, Plataforma, Endereco
 import datetime
+from enum import Enum
 from dataclasses import asdict
 from sqlalchemy.future import select
 from database_config import get_session
-
+from eventos import Alteracao, notificar, ouvir
+from cache import CacheDeResposta
+from cache_http import CacheControl, CacheHTTP
+from custo import AnaliseDeCusto
+from metricas import MetricasGraphQL
+from roteamento import RoteamentoLeitura, SessaoCompartilhada
+from consultas_persistidas import CacheDeDocumentos
+from lote import ResultadoLote, criar_em_lote
+from escrita import atualizar_um, deletar_um, inserir_um
+from dataloaders import criar_loaders, loaders_atuais
+from paginacao import Connection, Direcao, Edge, PageInfo, paginar
+from busca import buscar, codificar_cursor_busca
+from linha_do_tempo import linha_do_tempo
+from estatisticas import Estatisticas, estatisticas
+from transmissao import ExecucaoCompartilhada, Transmissor
+from projecao import colunas_selecionadas, converter_linhas
+from filtros import FaixaData, FaixaNumero, LocalizacaoFiltro, Raio, aplicar_filtro
+
+
+TAMANHO_BLOCO_STREAM = 500
 
 # Criando um scalar para lidar com Date no GraphQL
 DateScalar = strawberry.scalar(
@@ -14,118 +37,67 @@ DateScalar = strawberry.scalar(
     parse_value=lambda v: datetime.date.fromisoformat(v)
 )
 
-async def get_estagios():
-    async with get_session() as session:
-        resultado = await session.execute(select(Estagio))
-        item = resultado.scalars().all()
-
-        return [EstagioType(
-            id=row.id,
-            nome=row.nome,
-            vertente=row.vertente,
-            salario=row.salario,
-            empresa_id=row.empresa_id,
-            horas_semanais=row.horas_semanais,
-            remunerado=row.remunerado,
-            descricao=row.descricao,
-            data_inicio=row.data_inicio,
-            data_fim=row.data_fim
-            ) for row in item]
-
-async def get_bolsas():
-    async with get_session() as session:
-        resultado = await session.execute(select(Bolsa))
-        item = resultado.scalars().all()
-
-        return [BolsaType(
-            id=row.id,
-            nome=row.nome,
-            vertente=row.vertente,
-            salario=row.salario,
-            professor_id=row.professor_id,
-            horas_semanais=row.horas_semanais,
-            remunerado=row.remunerado,
-            quantidade_vagas=row.quantidade_vagas,
-            data_inicio=row.data_inicio,
-            data_fim=row.data_fim,
-            descricao=row.descricao
-            ) for row in item]
-
-async def get_professores():
-    async with get_session() as session:
-        resultado = await session.execute(select(Professor))
-        item = resultado.scalars().all()
-
-        return [ProfessorType(
-            id=row.id,
-            nome=row.nome,
-            vertente=row.vertente,
-            telefone=row.telefone,
-            email=row.email,
-            website=row.website,
-            formacao=row.formacao,
-            ) for row in item]
-
-async def get_empresas():
-    async with get_session() as session:
-        resultado = await session.execute(select(Empresa))
-        item = resultado.scalars().all()
-
-        return [EmpresaType(
-            id=row.id,
-            nome=row.nome,
-            vertente=row.vertente,
-            telefone=row.telefone,
-            email=row.email,
-            website=row.website,
-            CNPJ=row.CNPJ,
-            status=row.status,
-            endereco_id=row.endereco_id
-            ) for row in item]
-
-async def get_endereco():
-    async with get_session() as session:
-        resultado = await session.execute(select(Endereco))
-        item = resultado.scalars().all()
-
-        return [EnderecoType(
-            id=row.id,
-            rua=row.rua,
-            numero=row.numero,
-            bairro=row.bairro,
-            cidade=row.cidade,
-            estado=row.estado,
-            cep=row.cep,
-            ) for row in item]
-
-async def get_plataforma():
-    async with get_session() as session:
-        resultado = await session.execute(select(Plataforma))
-        item = resultado.scalars().all()
-
-        return [PlataformaType(
-            id=row.id,
-            nome=row.nome,
-            email=row.email,
-            website=row.website,
-            tipo=row.tipo,
-            ) for row in item]
-
-async def get_courses():
-    async with get_session() as session:
-        resultado = await session.execute(select(Curso))
-        item = resultado.scalars().all()
-        return [CursoType(
-                id=row.id,
-                nome=row.nome,
-                categoria=row.categoria,
-                preco= row.preco,
-                plataforma_id=row.plataforma_id,
-                nivel=row.nivel,
-                vertente=row.vertente,
-                data_inicio=row.data_inicio,
-                data_fim=row.data_fim
-                ) for row in item]
+#as listas são geradores assíncronos lidos direto do cursor do banco, assim o @stream
+#consegue mandar as primeiras linhas antes da lista inteira ser carregada na memória
+#(o cursor fica aberto entre um yield e outro, então elas usam uma sessão própria e não a da requisição)
+def linhas_em_stream(query):
+    return query.execution_options(yield_per=TAMANHO_BLOCO_STREAM)
+
+async def get_estagios(info: Info, filtro: Optional["EstagioFiltro"] = None):
+    colunas = colunas_selecionadas(info, Estagio, EstagioType)
+    converter = converter_linhas(EstagioType, colunas)
+    async with get_session(propria=True) as session:
+        resultado = await session.stream(linhas_em_stream(aplicar_filtro(select(*colunas), Estagio, filtro)))
+        async for row in resultado:
+            yield converter(row)
+
+async def get_bolsas(info: Info, filtro: Optional["BolsaFiltro"] = None):
+    colunas = colunas_selecionadas(info, Bolsa, BolsaType)
+    converter = converter_linhas(BolsaType, colunas)
+    async with get_session(propria=True) as session:
+        resultado = await session.stream(linhas_em_stream(aplicar_filtro(select(*colunas), Bolsa, filtro)))
+        async for row in resultado:
+            yield converter(row)
+
+async def get_professores(info: Info, filtro: Optional["ProfessorFiltro"] = None):
+    colunas = colunas_selecionadas(info, Professor, ProfessorType)
+    converter = converter_linhas(ProfessorType, colunas)
+    async with get_session(propria=True) as session:
+        resultado = await session.stream(linhas_em_stream(aplicar_filtro(select(*colunas), Professor, filtro)))
+        async for row in resultado:
+            yield converter(row)
+
+async def get_empresas(info: Info, filtro: Optional["EmpresaFiltro"] = None):
+    colunas = colunas_selecionadas(info, Empresa, EmpresaType)
+    converter = converter_linhas(EmpresaType, colunas)
+    async with get_session(propria=True) as session:
+        resultado = await session.stream(linhas_em_stream(aplicar_filtro(select(*colunas), Empresa, filtro)))
+        async for row in resultado:
+            yield converter(row)
+
+async def get_endereco(info: Info, filtro: Optional["EnderecoFiltro"] = None):
+    colunas = colunas_selecionadas(info, Endereco, EnderecoType)
+    converter = converter_linhas(EnderecoType, colunas)
+    async with get_session(propria=True) as session:
+        resultado = await session.stream(linhas_em_stream(aplicar_filtro(select(*colunas), Endereco, filtro)))
+        async for row in resultado:
+            yield converter(row)
+
+async def get_plataforma(info: Info, filtro: Optional["PlataformaFiltro"] = None):
+    colunas = colunas_selecionadas(info, Plataforma, PlataformaType)
+    converter = converter_linhas(PlataformaType, colunas)
+    async with get_session(propria=True) as session:
+        resultado = await session.stream(linhas_em_stream(aplicar_filtro(select(*colunas), Plataforma, filtro)))
+        async for row in resultado:
+            yield converter(row)
+
+async def get_courses(info: Info, filtro: Optional["CursoFiltro"] = None):
+    colunas = colunas_selecionadas(info, Curso, CursoType)
+    converter = converter_linhas(CursoType, colunas)
+    async with get_session(propria=True) as session:
+        resultado = await session.stream(linhas_em_stream(aplicar_filtro(select(*colunas), Curso, filtro)))
+        async for row in resultado:
+            yield converter(row)
 
 
 #criando os tipos para as queries
@@ -147,6 +119,10 @@ class PlataformaType:
 	website: Optional[str] = None
 	tipo: Optional[bool] = None
 
+	@strawberry.field
+	async def cursos(self, info: Info) -> List["CursoType"]:
+		return await loaders_de(info)["cursos_por_plataforma"].load(self.id)
+
 @strawberry.type
 class ProfessorType:
 	id: int
@@ -157,6 +133,10 @@ class ProfessorType:
 	website: Optional[str] = None
 	formacao: Optional[str] = None
 
+	@strawberry.field
+	async def bolsas(self, info: Info) -> List["BolsaType"]:
+		return await loaders_de(info)["bolsas_por_professor"].load(self.id)
+
 #a partir daqui começa as tabelas com relacionamentos
 @strawberry.type
 class EmpresaType:
@@ -170,6 +150,16 @@ class EmpresaType:
 	website: Optional[str] = None
 	status: Optional[bool] = None
 
+	@strawberry.field
+	async def endereco(self, info: Info) -> Optional[EnderecoType]:
+		if self.endereco_id is None:
+			return None
+		return await loaders_de(info)["endereco"].load(self.endereco_id)
+
+	@strawberry.field
+	async def estagios(self, info: Info) -> List["EstagioType"]:
+		return await loaders_de(info)["estagios_por_empresa"].load(self.id)
+
 @strawberry.type
 class CursoType:
     id: int
@@ -182,6 +172,12 @@ class CursoType:
     data_inicio: Optional[datetime.date] = None
     data_fim: Optional[datetime.date] = None
 
+    @strawberry.field
+    async def plataforma(self, info: Info) -> Optional[PlataformaType]:
+        if self.plataforma_id is None:
+            return None
+        return await loaders_de(info)["plataforma"].load(self.plataforma_id)
+
 
 @strawberry.type
 class EstagioType:
@@ -196,6 +192,12 @@ class EstagioType:
     data_inicio: Optional[datetime.date] = None
     data_fim: Optional[datetime.date] = None
 
+    @strawberry.field
+    async def empresa(self, info: Info) -> Optional[EmpresaType]:
+        if self.empresa_id is None:
+            return None
+        return await loaders_de(info)["empresa"].load(self.empresa_id)
+
 @strawberry.type
 class BolsaType:
 	id: int
@@ -210,132 +212,395 @@ class BolsaType:
 	data_fim: Optional[datetime.date] = None
 	professor_id: Optional[int] = None
 
+	@strawberry.field
+	async def professor(self, info: Info) -> Optional[ProfessorType]:
+		if self.professor_id is None:
+			return None
+		return await loaders_de(info)["professor"].load(self.professor_id)
+
+#os dataloaders de cada requisição, usados pelos campos aninhados (evita o problema N+1)
+def get_loaders():
+    return criar_loaders(
+        por_id={
+            "empresa": (Empresa, EmpresaType),
+            "endereco": (Endereco, EnderecoType),
+            "professor": (Professor, ProfessorType),
+            "plataforma": (Plataforma, PlataformaType),
+            "curso": (Curso, CursoType),
+            "estagio": (Estagio, EstagioType),
+            "bolsa": (Bolsa, BolsaType),
+        },
+        por_chave={
+            "estagios_por_empresa": (Estagio, Estagio.empresa_id, EstagioType),
+            "bolsas_por_professor": (Bolsa, Bolsa.professor_id, BolsaType),
+            "cursos_por_plataforma": (Curso, Curso.plataforma_id, CursoType),
+        },
+    )
+
+#nas requisições HTTP os loaders vêm do contexto; pelo WebSocket a conexão dura muito tempo e não guarda loaders
+#(o cache deles ficaria velho e crescendo), então vêm do evento da subscription ou são criados para a operação
+def loaders_de(info: Info):
+    loaders = loaders_atuais.get()
+    if loaders is None:
+        loaders = info.context.get("loaders")
+    if loaders is None:
+        loaders = get_loaders()
+        loaders_atuais.set(loaders)
+    return loaders
+
 #criando os tipos para os gets e o delete com id
 @strawberry.input
 class GetIDType:
     id: int
 
-async def getbyid_professor(self, input: GetIDType) -> ProfessorType:
+async def getbyid_professor(info: Info, input: GetIDType) -> ProfessorType:
+    colunas = colunas_selecionadas(info, Professor, ProfessorType)
     async with get_session() as session:
-        resultado = await session.get(Professor, input.id)
-        if not resultado:
+        resultado = await session.execute(select(*colunas).where(Professor.id == input.id))
+        row = resultado.first()
+        if not row:
             raise Exception("Professor não foi encontrado")
 
-        return ProfessorType(
-            id=resultado.id,
-            nome=resultado.nome,
-            vertente=resultado.vertente,
-            telefone=resultado.telefone,
-            email=resultado.email,
-            website=resultado.website,
-            formacao=resultado.formacao
-        )
-
-async def getbyid_curso(self, input: GetIDType) -> CursoType:
+        return converter_linhas(ProfessorType, colunas)(row)
+
+async def getbyid_curso(info: Info, input: GetIDType) -> CursoType:
+    colunas = colunas_selecionadas(info, Curso, CursoType)
     async with get_session() as session:
-        resultado = await session.get(Curso, input.id)
-        if not resultado:
+        resultado = await session.execute(select(*colunas).where(Curso.id == input.id))
+        row = resultado.first()
+        if not row:
             raise Exception("Curso não foi encontrado")
 
-        return CursoType(
-            id=resultado.id,
-            nome=resultado.nome,
-            categoria=resultado.categoria,
-            preco=resultado.preco,
-            plataforma_id=resultado.plataforma_id,
-            nivel=resultado.nivel,
-            vertente=resultado.vertente,
-            data_inicio=resultado.data_inicio,
-            data_fim=resultado.data_fim,
-        )
-
-async def getbyid_plataforma(self, input: GetIDType) -> PlataformaType:
+        return converter_linhas(CursoType, colunas)(row)
+
+async def getbyid_plataforma(info: Info, input: GetIDType) -> PlataformaType:
+    colunas = colunas_selecionadas(info, Plataforma, PlataformaType)
     async with get_session() as session:
-        resultado = await session.get(Plataforma, input.id)
-        if not resultado:
+        resultado = await session.execute(select(*colunas).where(Plataforma.id == input.id))
+        row = resultado.first()
+        if not row:
             raise Exception("Plataforma não foi encontrada")
 
-        return PlataformaType(
-            id=resultado.id,
-            nome=resultado.nome,
-            email=resultado.email,
-            website=resultado.website,
-            tipo=resultado.tipo
-        )
+        return converter_linhas(PlataformaType, colunas)(row)
 
-async def getbyid_estagio(self, input: GetIDType) -> EstagioType:
+async def getbyid_estagio(info: Info, input: GetIDType) -> EstagioType:
+    colunas = colunas_selecionadas(info, Estagio, EstagioType)
     async with get_session() as session:
-        resultado = await session.get(Estagio, input.id)
-        if not resultado:
+        resultado = await session.execute(select(*colunas).where(Estagio.id == input.id))
+        row = resultado.first()
+        if not row:
             raise Exception("Estágio não foi encontrado")
-        return EstagioType(
-            id=resultado.id,
-            nome=resultado.nome,
-            vertente=resultado.vertente,
-            salario=resultado.salario,
-            empresa_id=resultado.empresa_id,
-            remunerado=resultado.remunerado,
-            horas_semanais=resultado.horas_semanais,
-            descricao=resultado.descricao,
-            data_inicio=resultado.data_inicio,
-            data_fim=resultado.data_fim
-        )
-
-async def getbyid_endereco(self, input: GetIDType) -> EnderecoType:
+
+        return converter_linhas(EstagioType, colunas)(row)
+
+async def getbyid_endereco(info: Info, input: GetIDType) -> EnderecoType:
+    colunas = colunas_selecionadas(info, Endereco, EnderecoType)
     async with get_session() as session:
-        resultado = await session.get(Endereco, input.id)
-        if not resultado:
+        resultado = await session.execute(select(*colunas).where(Endereco.id == input.id))
+        row = resultado.first()
+        if not row:
             raise Exception("Endereco não foi encontrado")
 
-        return EnderecoType(
-            id=resultado.id,
-            rua=resultado.rua,
-            numero=resultado.numero,
-            bairro=resultado.bairro,
-            cidade=resultado.cidade,
-            estado=resultado.estado,
-            cep=resultado.cep
-        )
-
-async def getbyid_empresa(self, input: GetIDType) -> EmpresaType:
+        return converter_linhas(EnderecoType, colunas)(row)
+
+async def getbyid_empresa(info: Info, input: GetIDType) -> EmpresaType:
+    colunas = colunas_selecionadas(info, Empresa, EmpresaType)
     async with get_session() as session:
-        resultado = await session.get(Empresa, input.id)
-        if not resultado:
+        resultado = await session.execute(select(*colunas).where(Empresa.id == input.id))
+        row = resultado.first()
+        if not row:
             raise Exception("Empresa não foi encontrada")
 
-        await session.commit()
-        await session.refresh(resultado)
-        return EmpresaType(
-            id=resultado.id,
-            nome=resultado.nome,
-            vertente=resultado.vertente,
-            CNPJ=resultado.CNPJ,
-            endereco_id=resultado.endereco_id,
-            telefone=resultado.telefone,
-            email=resultado.email,
-            website=resultado.website,
-            status=resultado.status,
-        )
-
-async def getbyid_bolsa(self, input: GetIDType) -> BolsaType:
+        return converter_linhas(EmpresaType, colunas)(row)
+
+async def getbyid_bolsa(info: Info, input: GetIDType) -> BolsaType:
+    colunas = colunas_selecionadas(info, Bolsa, BolsaType)
     async with get_session() as session:
-        resultado = await session.get(Bolsa, input.id)
-        if not resultado:
+        resultado = await session.execute(select(*colunas).where(Bolsa.id == input.id))
+        row = resultado.first()
+        if not row:
             raise Exception("Bolsa não foi encontrada")
 
-        return BolsaType(
-            id=resultado.id,
-            nome=resultado.nome,
-            vertente=resultado.vertente,
-            salario=resultado.salario,
-            remunerado=resultado.remunerado,
-            horas_semanais=resultado.horas_semanais,
-            quantidade_vagas=resultado.quantidade_vagas,
-            descricao=resultado.descricao,
-            data_inicio=resultado.data_inicio,
-            data_fim=resultado.data_fim,
-            professor_id=resultado.professor_id
-        )
+        return converter_linhas(BolsaType, colunas)(row)
+
+#criando os tipos de filtro das listas (cada campo é comparado com a coluna de mesmo nome)
+@strawberry.input
+class CursoFiltro:
+    vertente: Optional[str] = None
+    nivel: Optional[str] = None
+    categoria: Optional[str] = None
+    preco: Optional[FaixaNumero] = None
+    plataforma_id: Optional[int] = None
+    data_inicio: Optional[FaixaData] = None
+    data_fim: Optional[FaixaData] = None
+
+@strawberry.input
+class PlataformaFiltro:
+    tipo: Optional[bool] = None
+
+@strawberry.input
+class EnderecoFiltro:
+    cidade: Optional[str] = None
+    estado: Optional[str] = None
+    cep: Optional[str] = None
+    raio: Optional[Raio] = None
+
+@strawberry.input
+class EmpresaFiltro:
+    vertente: Optional[str] = None
+    status: Optional[bool] = None
+    endereco_id: Optional[int] = None
+    localizacao: Optional[LocalizacaoFiltro] = None
+
+@strawberry.input
+class ProfessorFiltro:
+    vertente: Optional[str] = None
+    formacao: Optional[str] = None
+
+@strawberry.input
+class BolsaFiltro:
+    vertente: Optional[str] = None
+    remunerado: Optional[bool] = None
+    salario: Optional[FaixaNumero] = None
+    horas_semanais: Optional[FaixaNumero] = None
+    quantidade_vagas: Optional[FaixaNumero] = None
+    professor_id: Optional[int] = None
+    data_inicio: Optional[FaixaData] = None
+    data_fim: Optional[FaixaData] = None
+
+@strawberry.input
+class EstagioFiltro:
+    vertente: Optional[str] = None
+    remunerado: Optional[bool] = None
+    salario: Optional[FaixaNumero] = None
+    horas_semanais: Optional[FaixaNumero] = None
+    empresa_id: Optional[int] = None
+    data_inicio: Optional[FaixaData] = None
+    data_fim: Optional[FaixaData] = None
+    localizacao: Optional[LocalizacaoFiltro] = None
+
+#criando os tipos de ordenação usados na paginação por cursor
+@strawberry.enum
+class CursoCampoOrdem(Enum):
+    ID = "id"
+    NOME = "nome"
+    PRECO = "preco"
+    DATA_INICIO = "data_inicio"
+    DATA_FIM = "data_fim"
+
+@strawberry.input
+class CursoOrdem:
+    campo: CursoCampoOrdem = CursoCampoOrdem.ID
+    direcao: Direcao = Direcao.ASC
+
+@strawberry.enum
+class PlataformaCampoOrdem(Enum):
+    ID = "id"
+    NOME = "nome"
+
+@strawberry.input
+class PlataformaOrdem:
+    campo: PlataformaCampoOrdem = PlataformaCampoOrdem.ID
+    direcao: Direcao = Direcao.ASC
+
+@strawberry.enum
+class EnderecoCampoOrdem(Enum):
+    ID = "id"
+    CIDADE = "cidade"
+
+@strawberry.input
+class EnderecoOrdem:
+    campo: EnderecoCampoOrdem = EnderecoCampoOrdem.ID
+    direcao: Direcao = Direcao.ASC
+
+@strawberry.enum
+class EmpresaCampoOrdem(Enum):
+    ID = "id"
+    NOME = "nome"
+
+@strawberry.input
+class EmpresaOrdem:
+    campo: EmpresaCampoOrdem = EmpresaCampoOrdem.ID
+    direcao: Direcao = Direcao.ASC
+
+@strawberry.enum
+class ProfessorCampoOrdem(Enum):
+    ID = "id"
+    NOME = "nome"
+
+@strawberry.input
+class ProfessorOrdem:
+    campo: ProfessorCampoOrdem = ProfessorCampoOrdem.ID
+    direcao: Direcao = Direcao.ASC
+
+@strawberry.enum
+class BolsaCampoOrdem(Enum):
+    ID = "id"
+    NOME = "nome"
+    SALARIO = "salario"
+    DATA_INICIO = "data_inicio"
+    DATA_FIM = "data_fim"
+
+@strawberry.input
+class BolsaOrdem:
+    campo: BolsaCampoOrdem = BolsaCampoOrdem.ID
+    direcao: Direcao = Direcao.ASC
+
+@strawberry.enum
+class EstagioCampoOrdem(Enum):
+    ID = "id"
+    NOME = "nome"
+    SALARIO = "salario"
+    DATA_INICIO = "data_inicio"
+    DATA_FIM = "data_fim"
+
+@strawberry.input
+class EstagioOrdem:
+    campo: EstagioCampoOrdem = EstagioCampoOrdem.ID
+    direcao: Direcao = Direcao.ASC
+
+#listas paginadas por cursor (first/after, last/before), no formato de connection do Relay
+async def listar_cursos(info: Info, first: Optional[int] = None, after: Optional[str] = None,
+        last: Optional[int] = None, before: Optional[str] = None,
+        ordem: Optional[CursoOrdem] = None, filtro: Optional[CursoFiltro] = None) -> Connection[CursoType]:
+    ordem = ordem or CursoOrdem()
+    colunas = colunas_selecionadas(info, Curso, CursoType, ("edges", "node"), [ordem.campo.value])
+    async with get_session() as session:
+        return await paginar(session, aplicar_filtro(select(*colunas), Curso, filtro), Curso, converter_linhas(CursoType, colunas),
+            ordem.campo.value, ordem.direcao, first, after, last, before)
+
+async def listar_plataformas(info: Info, first: Optional[int] = None, after: Optional[str] = None,
+        last: Optional[int] = None, before: Optional[str] = None,
+        ordem: Optional[PlataformaOrdem] = None, filtro: Optional[PlataformaFiltro] = None) -> Connection[PlataformaType]:
+    ordem = ordem or PlataformaOrdem()
+    colunas = colunas_selecionadas(info, Plataforma, PlataformaType, ("edges", "node"), [ordem.campo.value])
+    async with get_session() as session:
+        return await paginar(session, aplicar_filtro(select(*colunas), Plataforma, filtro), Plataforma, converter_linhas(PlataformaType, colunas),
+            ordem.campo.value, ordem.direcao, first, after, last, before)
+
+async def listar_enderecos(info: Info, first: Optional[int] = None, after: Optional[str] = None,
+        last: Optional[int] = None, before: Optional[str] = None,
+        ordem: Optional[EnderecoOrdem] = None, filtro: Optional[EnderecoFiltro] = None) -> Connection[EnderecoType]:
+    ordem = ordem or EnderecoOrdem()
+    colunas = colunas_selecionadas(info, Endereco, EnderecoType, ("edges", "node"), [ordem.campo.value])
+    async with get_session() as session:
+        return await paginar(session, aplicar_filtro(select(*colunas), Endereco, filtro), Endereco, converter_linhas(EnderecoType, colunas),
+            ordem.campo.value, ordem.direcao, first, after, last, before)
+
+async def listar_empresas(info: Info, first: Optional[int] = None, after: Optional[str] = None,
+        last: Optional[int] = None, before: Optional[str] = None,
+        ordem: Optional[EmpresaOrdem] = None, filtro: Optional[EmpresaFiltro] = None) -> Connection[EmpresaType]:
+    ordem = ordem or EmpresaOrdem()
+    colunas = colunas_selecionadas(info, Empresa, EmpresaType, ("edges", "node"), [ordem.campo.value])
+    async with get_session() as session:
+        return await paginar(session, aplicar_filtro(select(*colunas), Empresa, filtro), Empresa, converter_linhas(EmpresaType, colunas),
+            ordem.campo.value, ordem.direcao, first, after, last, before)
+
+async def listar_professores(info: Info, first: Optional[int] = None, after: Optional[str] = None,
+        last: Optional[int] = None, before: Optional[str] = None,
+        ordem: Optional[ProfessorOrdem] = None, filtro: Optional[ProfessorFiltro] = None) -> Connection[ProfessorType]:
+    ordem = ordem or ProfessorOrdem()
+    colunas = colunas_selecionadas(info, Professor, ProfessorType, ("edges", "node"), [ordem.campo.value])
+    async with get_session() as session:
+        return await paginar(session, aplicar_filtro(select(*colunas), Professor, filtro), Professor, converter_linhas(ProfessorType, colunas),
+            ordem.campo.value, ordem.direcao, first, after, last, before)
+
+async def listar_bolsas(info: Info, first: Optional[int] = None, after: Optional[str] = None,
+        last: Optional[int] = None, before: Optional[str] = None,
+        ordem: Optional[BolsaOrdem] = None, filtro: Optional[BolsaFiltro] = None) -> Connection[BolsaType]:
+    ordem = ordem or BolsaOrdem()
+    colunas = colunas_selecionadas(info, Bolsa, BolsaType, ("edges", "node"), [ordem.campo.value])
+    async with get_session() as session:
+        return await paginar(session, aplicar_filtro(select(*colunas), Bolsa, filtro), Bolsa, converter_linhas(BolsaType, colunas),
+            ordem.campo.value, ordem.direcao, first, after, last, before)
+
+async def listar_estagios(info: Info, first: Optional[int] = None, after: Optional[str] = None,
+        last: Optional[int] = None, before: Optional[str] = None,
+        ordem: Optional[EstagioOrdem] = None, filtro: Optional[EstagioFiltro] = None) -> Connection[EstagioType]:
+    ordem = ordem or EstagioOrdem()
+    colunas = colunas_selecionadas(info, Estagio, EstagioType, ("edges", "node"), [ordem.campo.value])
+    async with get_session() as session:
+        return await paginar(session, aplicar_filtro(select(*colunas), Estagio, filtro), Estagio, converter_linhas(EstagioType, colunas),
+            ordem.campo.value, ordem.direcao, first, after, last, before)
+
+#uma oportunidade pode ser um curso, um estágio ou uma bolsa
+Oportunidade = Annotated[Union[CursoType, EstagioType, BolsaType], strawberry.union("Oportunidade")]
+
+@strawberry.enum
+class TipoOportunidade(Enum):
+    CURSO = "curso"
+    ESTAGIO = "estagio"
+    BOLSA = "bolsa"
+
+@strawberry.type
+class ResultadoBusca:
+    relevancia: float
+    oportunidade: Oportunidade
+
+#busca por palavras no nome e na descrição das oportunidades, da mais relevante para a menos relevante
+async def buscar_oportunidades(info: Info, texto: str, tipos: Optional[List[TipoOportunidade]] = None,
+        vertente: Optional[str] = None, first: Optional[int] = None, after: Optional[str] = None) -> Connection[ResultadoBusca]:
+    tabelas = {tipo.value for tipo in tipos} if tipos else None
+    resultados, tem_mais = await buscar(texto, tabelas, vertente, first, after)
+
+    #os elementos da página são carregados pelos dataloaders (uma query por tabela)
+    loaders = loaders_de(info)
+    oportunidades = await asyncio.gather(*(loaders[tabela].load(id) for _, (tabela, id) in resultados))
+    edges = [
+        Edge(cursor=codificar_cursor_busca(relevancia, documento), node=ResultadoBusca(relevancia=relevancia, oportunidade=oportunidade))
+        for (relevancia, documento), oportunidade in zip(resultados, oportunidades)
+        if oportunidade is not None
+    ]
+    return Connection(
+        edges=edges,
+        pageInfo=PageInfo(
+            hasNextPage=tem_mais,
+            hasPreviousPage=after is not None,
+            startCursor=edges[0].cursor if edges else None,
+            endCursor=edges[-1].cursor if edges else None,
+        ),
+    )
+
+@strawberry.enum
+class OportunidadeCampoOrdem(Enum):
+    DATA_INICIO = "data_inicio"
+    DATA_FIM = "data_fim"
+
+@strawberry.input
+class OportunidadeOrdem:
+    campo: OportunidadeCampoOrdem = OportunidadeCampoOrdem.DATA_FIM
+    direcao: Direcao = Direcao.ASC
+
+TABELAS_OPORTUNIDADES = {
+    TipoOportunidade.CURSO: (Curso, CursoType),
+    TipoOportunidade.ESTAGIO: (Estagio, EstagioType),
+    TipoOportunidade.BOLSA: (Bolsa, BolsaType),
+}
+
+#cursos, estágios e bolsas numa lista só, ordenada por data; o cursor guarda a posição em cada uma das tabelas
+async def listar_oportunidades(info: Info, first: Optional[int] = None, after: Optional[str] = None,
+        ordem: Optional[OportunidadeOrdem] = None, tipos: Optional[List[TipoOportunidade]] = None,
+        vertente: Optional[str] = None) -> Connection[Oportunidade]:
+    ordem = ordem or OportunidadeOrdem()
+    fontes = {}
+    for tipo, (model_class, tipo_graphql) in TABELAS_OPORTUNIDADES.items():
+        if tipos and tipo not in tipos:
+            continue
+        colunas = colunas_selecionadas(info, model_class, tipo_graphql, ("edges", "node"), [ordem.campo.value])
+        condicoes = [model_class.vertente == vertente] if vertente is not None else []
+        fontes[tipo.value] = (model_class, colunas, converter_linhas(tipo_graphql, colunas), condicoes)
+
+    itens, tem_mais = await linha_do_tempo(fontes, ordem.campo.value, ordem.direcao, first, after)
+    edges = [Edge(cursor=cursor, node=oportunidade) for cursor, oportunidade in itens]
+    return Connection(
+        edges=edges,
+        pageInfo=PageInfo(
+            hasNextPage=tem_mais,
+            hasPreviousPage=after is not None,
+            startCursor=edges[0].cursor if edges else None,
+            endCursor=edges[-1].cursor if edges else None,
+        ),
+    )
 
 @strawberry.type
 class Query:
@@ -353,6 +618,16 @@ class Query:
     getIdEmpresa: EmpresaType = strawberry.field(resolver=getbyid_empresa)
     getIdPlataforma: PlataformaType = strawberry.field(resolver=getbyid_plataforma)
     getIdCurso: CursoType = strawberry.field(resolver=getbyid_curso)
+    cursos: Connection[CursoType] = strawberry.field(resolver=listar_cursos, directives=[CacheControl(max_age=30)])
+    plataformas: Connection[PlataformaType] = strawberry.field(resolver=listar_plataformas)
+    enderecos: Connection[EnderecoType] = strawberry.field(resolver=listar_enderecos)
+    empresas: Connection[EmpresaType] = strawberry.field(resolver=listar_empresas)
+    professores: Connection[ProfessorType] = strawberry.field(resolver=listar_professores)
+    bolsas: Connection[BolsaType] = strawberry.field(resolver=listar_bolsas, directives=[CacheControl(max_age=30)])
+    estagios: Connection[EstagioType] = strawberry.field(resolver=listar_estagios, directives=[CacheControl(max_age=30)])
+    buscarOportunidades: Connection[ResultadoBusca] = strawberry.field(resolver=buscar_oportunidades, directives=[CacheControl(max_age=30)])
+    oportunidades: Connection[Oportunidade] = strawberry.field(resolver=listar_oportunidades, directives=[CacheControl(max_age=30)])
+    estatisticas: Estatisticas = strawberry.field(resolver=estatisticas, directives=[CacheControl(max_age=60)])
 
 
 #criando os tipos para as mutations (criação)
@@ -433,20 +708,12 @@ class BolsaInputCreate:
 
 
 
-async def criar_professor(info, input: ProfessorInputCreate) -> ProfessorType:
+async def criar_professor(info: Info, input: ProfessorInputCreate) -> ProfessorType:
     async with get_session() as session:
         try:
-            novo_professor = Professor(
-                nome=input.nome,
-                vertente=input.vertente,
-                telefone=input.telefone,
-                email=input.email,
-                website=input.website,
-                formacao=input.formacao
-            )
-            session.add(novo_professor)
+            novo_professor = await inserir_um(session, Professor, asdict(input))
             await session.commit()
-            await session.refresh(novo_professor)
+            notificar(Alteracao(Professor.__tablename__, "criar", novo_professor.id))
 
             return ProfessorType(
                 id=novo_professor.id,
@@ -461,24 +728,12 @@ async def criar_professor(info, input: ProfessorInputCreate) -> ProfessorType:
             await session.rollback()
             raise Exception(f"Erro: {str(e)}")
 
-async def criar_bolsa(info, input: BolsaInputCreate) -> BolsaType:
+async def criar_bolsa(info: Info, input: BolsaInputCreate) -> BolsaType:
     async with get_session() as session:
         try:
-            nova_bolsa = Bolsa(
-                nome=input.nome,
-                vertente=input.vertente,
-                salario=input.salario,
-                remunerado=input.remunerado,
-                horas_semanais=input.horas_semanais,
-                quantidade_vagas=input.quantidade_vagas,
-                descricao=input.descricao,
-                data_inicio=input.data_inicio,
-                data_fim=input.data_fim,
-                professor_id=input.professor_id
-            )
-            session.add(nova_bolsa)
+            nova_bolsa = await inserir_um(session, Bolsa, asdict(input))
             await session.commit()
-            await session.refresh(nova_bolsa)
+            notificar(Alteracao(Bolsa.__tablename__, "criar", nova_bolsa.id))
 
             return BolsaType(
                 id=nova_bolsa.id,
@@ -497,20 +752,12 @@ async def criar_bolsa(info, input: BolsaInputCreate) -> BolsaType:
             await session.rollback()
             raise Exception(f"Erro: {str(e)}")
 
-async def criar_endereco(info, input: EnderecoInputCreate) -> EnderecoType:
+async def criar_endereco(info: Info, input: EnderecoInputCreate) -> EnderecoType:
     async with get_session() as session:
         try:
-            novo_endereco = Endereco(
-                rua=input.rua,
-                numero=input.numero,
-                bairro=input.bairro,
-                cidade=input.cidade,
-                estado=input.estado,
-                cep=input.cep
-            )
-            session.add(novo_endereco)
+            novo_endereco = await inserir_um(session, Endereco, asdict(input))
             await session.commit()
-            await session.refresh(novo_endereco)
+            notificar(Alteracao(Endereco.__tablename__, "criar", novo_endereco.id))
 
             return EnderecoType(
                 id=novo_endereco.id,
@@ -525,22 +772,12 @@ async def criar_endereco(info, input: EnderecoInputCreate) -> EnderecoType:
             await session.rollback()
             raise Exception(f"Erro: {str(e)}")
 
-async def criar_empresa(info, input: EmpresaInputCreate) -> EmpresaType:
+async def criar_empresa(info: Info, input: EmpresaInputCreate) -> EmpresaType:
     async with get_session() as session:
         try:
-            nova_empresa = Empresa(
-                nome=input.nome,
-                vertente=input.vertente,
-                CNPJ=input.CNPJ,
-                endereco_id=input.endereco_id,
-                telefone=input.telefone,
-                email=input.email,
-                website=input.website,
-                status=input.status
-            )
-            session.add(nova_empresa)
+            nova_empresa = await inserir_um(session, Empresa, asdict(input))
             await session.commit()
-            await session.refresh(nova_empresa)
+            notificar(Alteracao(Empresa.__tablename__, "criar", nova_empresa.id))
 
             return EmpresaType(
                 id=nova_empresa.id,
@@ -557,22 +794,12 @@ async def criar_empresa(info, input: EmpresaInputCreate) -> EmpresaType:
             await session.rollback()
             raise Exception(f"Erro: {str(e)}")
 
-async def criar_curso(info, input: CursoInputCreate) -> CursoType:
+async def criar_curso(info: Info, input: CursoInputCreate) -> CursoType:
     async with get_session() as session:
         try:
-            novo_curso = Curso(
-                nome=input.nome,
-                vertente=input.vertente,
-                categoria=input.categoria,
-                preco=input.preco,
-                plataforma_id=input.plataforma_id,
-                nivel=input.nivel,
-                data_inicio=input.data_inicio,
-                data_fim=input.data_fim
-            )
-            session.add(novo_curso)
+            novo_curso = await inserir_um(session, Curso, asdict(input))
             await session.commit()
-            await session.refresh(novo_curso)
+            notificar(Alteracao(Curso.__tablename__, "criar", novo_curso.id))
 
             return CursoType(
                 id=novo_curso.id,
@@ -589,18 +816,12 @@ async def criar_curso(info, input: CursoInputCreate) -> CursoType:
             await session.rollback()
             raise Exception(f"Erro: {str(e)}")
 
-async def criar_plataforma(info, input: PlataformaInputCreate) -> PlataformaType:
+async def criar_plataforma(info: Info, input: PlataformaInputCreate) -> PlataformaType:
     async with get_session() as session:
         try:
-            nova_plataforma = Plataforma(
-                nome=input.nome,
-                email=input.email,
-                website=input.website,
-                tipo=input.tipo
-            )
-            session.add(nova_plataforma)
+            nova_plataforma = await inserir_um(session, Plataforma, asdict(input))
             await session.commit()
-            await session.refresh(nova_plataforma)
+            notificar(Alteracao(Plataforma.__tablename__, "criar", nova_plataforma.id))
 
             return PlataformaType(
                 id=nova_plataforma.id,
@@ -613,23 +834,12 @@ async def criar_plataforma(info, input: PlataformaInputCreate) -> PlataformaType
             await session.rollback()
             raise Exception(f"Erro: {str(e)}")
 
-async def criar_estagio(info, input: EstagioInputCreate) -> EstagioType:
+async def criar_estagio(info: Info, input: EstagioInputCreate) -> EstagioType:
     async with get_session() as session:
         try:
-            novo_estagio = Estagio(
-                nome=input.nome,
-                vertente=input.vertente,
-                salario=input.salario,
-                empresa_id=input.empresa_id,
-                remunerado=input.remunerado,
-                horas_semanais=input.horas_semanais,
-                descricao=input.descricao,
-                data_inicio=input.data_inicio,
-                data_fim=input.data_fim
-            )
-            session.add(novo_estagio)
+            novo_estagio = await inserir_um(session, Estagio, asdict(input))
             await session.commit()
-            await session.refresh(novo_estagio)
+            notificar(Alteracao(Estagio.__tablename__, "criar", novo_estagio.id))
 
             return EstagioType(
                 id=novo_estagio.id,
@@ -647,6 +857,29 @@ async def criar_estagio(info, input: EstagioInputCreate) -> EstagioType:
             await session.rollback()
             raise Exception(f"Erro: {str(e)}")
 
+#criação em lote: o lote todo é validado e inserido numa única transação
+#sem o modo atômico as linhas com erro são informadas e as outras são inseridas normalmente
+async def criar_professores(inputs: List[ProfessorInputCreate], atomico: bool = False) -> ResultadoLote[ProfessorType]:
+    return await criar_em_lote(Professor, ProfessorType, inputs, atomico)
+
+async def criar_bolsas(inputs: List[BolsaInputCreate], atomico: bool = False) -> ResultadoLote[BolsaType]:
+    return await criar_em_lote(Bolsa, BolsaType, inputs, atomico)
+
+async def criar_enderecos(inputs: List[EnderecoInputCreate], atomico: bool = False) -> ResultadoLote[EnderecoType]:
+    return await criar_em_lote(Endereco, EnderecoType, inputs, atomico)
+
+async def criar_empresas(inputs: List[EmpresaInputCreate], atomico: bool = False) -> ResultadoLote[EmpresaType]:
+    return await criar_em_lote(Empresa, EmpresaType, inputs, atomico)
+
+async def criar_cursos(inputs: List[CursoInputCreate], atomico: bool = False) -> ResultadoLote[CursoType]:
+    return await criar_em_lote(Curso, CursoType, inputs, atomico)
+
+async def criar_plataformas(inputs: List[PlataformaInputCreate], atomico: bool = False) -> ResultadoLote[PlataformaType]:
+    return await criar_em_lote(Plataforma, PlataformaType, inputs, atomico)
+
+async def criar_estagios(inputs: List[EstagioInputCreate], atomico: bool = False) -> ResultadoLote[EstagioType]:
+    return await criar_em_lote(Estagio, EstagioType, inputs, atomico)
+
 #criando os tipos para as atualizações
 @strawberry.input
 class EnderecoUpdateInput:
@@ -732,17 +965,13 @@ class BolsaUpdateInput:
 async def update_bolsa(self, input: BolsaUpdateInput) -> BolsaType:
     async with get_session() as session:
         try:
-            resultado = await session.get(Bolsa, input.id)
+            input_elementos = {key: value for key, value in asdict(input).items() if key != "id" and value is not None}
+            resultado = await atualizar_um(session, Bolsa, input.id, input_elementos)
             if not resultado:
                 raise Exception("Bolsa não foi encontrada")
 
-            input_elementos = asdict(input)
-            for key, value in input_elementos.items():
-                if key != "id" and value is not None:
-                    setattr(resultado, key, value)
-
             await session.commit()
-            await session.refresh(resultado)
+            notificar(Alteracao(Bolsa.__tablename__, "atualizar", resultado.id))
             return BolsaType(
                 id=resultado.id,
                 nome=resultado.nome,
@@ -763,17 +992,13 @@ async def update_bolsa(self, input: BolsaUpdateInput) -> BolsaType:
 async def update_curso(self, input: CursoUpdateInput) -> CursoType:
     async with get_session() as session:
         try:
-            resultado = await session.get(Curso, input.id)
+            input_elementos = {key: value for key, value in asdict(input).items() if key != "id" and value is not None}
+            resultado = await atualizar_um(session, Curso, input.id, input_elementos)
             if not resultado:
                 raise Exception("Curso não foi encontrado")
 
-            input_elementos = asdict(input)
-            for key, value in input_elementos.items():
-                if key != "id" and value is not None:
-                    setattr(resultado, key, value)
-
             await session.commit()
-            await session.refresh(resultado)
+            notificar(Alteracao(Curso.__tablename__, "atualizar", resultado.id))
             return CursoType(
                 id=resultado.id,
                 nome=resultado.nome,
@@ -792,17 +1017,13 @@ async def update_curso(self, input: CursoUpdateInput) -> CursoType:
 async def update_empresa(self, input: EmpresaUpdateInput) -> EmpresaType:
     async with get_session() as session:
         try:
-            resultado = await session.get(Empresa, input.id)
+            input_elementos = {key: value for key, value in asdict(input).items() if key != "id" and value is not None}
+            resultado = await atualizar_um(session, Empresa, input.id, input_elementos)
             if not resultado:
                 raise Exception("Empresa não foi encontrada")
 
-            input_elementos = asdict(input)
-            for key, value in input_elementos.items():
-                if key != "id" and value is not None:
-                    setattr(resultado, key, value)
-
             await session.commit()
-            await session.refresh(resultado)
+            notificar(Alteracao(Empresa.__tablename__, "atualizar", resultado.id))
             return EmpresaType(
                 id=resultado.id,
                 nome=resultado.nome,
@@ -821,17 +1042,13 @@ async def update_empresa(self, input: EmpresaUpdateInput) -> EmpresaType:
 async def update_endereco(self, input: EnderecoUpdateInput) -> EnderecoType:
     async with get_session() as session:
         try:
-            resultado = await session.get(Endereco, input.id)
+            input_elementos = {key: value for key, value in asdict(input).items() if key != "id" and value is not None}
+            resultado = await atualizar_um(session, Endereco, input.id, input_elementos)
             if not resultado:
                 raise Exception("Endereco não foi encontrado")
 
-            input_elementos = asdict(input)
-            for key, value in input_elementos.items():
-                if key != "id" and value is not None:
-                    setattr(resultado, key, value)
-
             await session.commit()
-            await session.refresh(resultado)
+            notificar(Alteracao(Endereco.__tablename__, "atualizar", resultado.id))
             return EnderecoType(
                 id=resultado.id,
                 rua=resultado.rua,
@@ -848,17 +1065,13 @@ async def update_endereco(self, input: EnderecoUpdateInput) -> EnderecoType:
 async def update_estagio(self, input: EstagioUpdateInput) -> EstagioType:
     async with get_session() as session:
         try:
-            resultado = await session.get(Estagio, input.id)
+            input_elementos = {key: value for key, value in asdict(input).items() if key != "id" and value is not None}
+            resultado = await atualizar_um(session, Estagio, input.id, input_elementos)
             if not resultado:
                 raise Exception("Estágio não foi encontrado")
 
-            input_elementos = asdict(input)
-            for key, value in input_elementos.items():
-                if key != "id" and value is not None:
-                    setattr(resultado, key, value)
-
             await session.commit()
-            await session.refresh(resultado)
+            notificar(Alteracao(Estagio.__tablename__, "atualizar", resultado.id))
             return EstagioType(
                 id=resultado.id,
                 nome=resultado.nome,
@@ -878,17 +1091,13 @@ async def update_estagio(self, input: EstagioUpdateInput) -> EstagioType:
 async def update_plataforma(self, input: PlataformaUpdateInput) -> PlataformaType:
     async with get_session() as session:
         try:
-            resultado = await session.get(Plataforma, input.id)
+            input_elementos = {key: value for key, value in asdict(input).items() if key != "id" and value is not None}
+            resultado = await atualizar_um(session, Plataforma, input.id, input_elementos)
             if not resultado:
                 raise Exception("Plataforma não foi encontrada")
 
-            input_elementos = asdict(input)
-            for key, value in input_elementos.items():
-                if key != "id" and value is not None:
-                    setattr(resultado, key, value)
-
             await session.commit()
-            await session.refresh(resultado)
+            notificar(Alteracao(Plataforma.__tablename__, "atualizar", resultado.id))
             return PlataformaType(
                 id=resultado.id,
                 nome=resultado.nome,
@@ -903,17 +1112,13 @@ async def update_plataforma(self, input: PlataformaUpdateInput) -> PlataformaTyp
 async def update_professor(self, input: ProfessorUpdateInput) -> ProfessorType:
     async with get_session() as session:
         try:
-            resultado = await session.get(Professor, input.id)
+            input_elementos = {key: value for key, value in asdict(input).items() if key != "id" and value is not None}
+            resultado = await atualizar_um(session, Professor, input.id, input_elementos)
             if not resultado:
                 raise Exception("Professor não foi encontrado")
 
-            input_elementos = asdict(input)
-            for key, value in input_elementos.items():
-                if key != "id" and value is not None:
-                    setattr(resultado, key, value)
-
             await session.commit()
-            await session.refresh(resultado)
+            notificar(Alteracao(Professor.__tablename__, "atualizar", resultado.id))
             return ProfessorType(
                 id=resultado.id,
                 nome=resultado.nome,
@@ -934,15 +1139,20 @@ class MensagemInput:
     message: str
 
 def delete_elementos(model_class: Type):
-    async def resolver(info, input: GetIDType) -> MensagemInput:
+    async def resolver(info: Info, input: GetIDType) -> MensagemInput:
         async with get_session() as session:
             try:
-                resultado = await session.get(model_class, input.id)
-                if not resultado:
+                filhas = await deletar_um(session, model_class, input.id)
+                if filhas is None:
                     raise Exception("Elemento não foi encontrado")
 
-                await session.delete(resultado)
                 await session.commit()
+                notificar(Alteracao(model_class.__tablename__, "deletar", input.id))
+                #as linhas filhas tiveram a chave estrangeira apagada; cada uma é avisada pelo id, para os índices
+                #em memória (busca, estatísticas) atualizarem só essas linhas em vez de reler a tabela inteira
+                for tabela, ids in filhas.items():
+                    for id in ids:
+                        notificar(Alteracao(tabela, "atualizar", id))
                 return MensagemInput(ok=True, message="Elemento deletado com sucesso.")
             except Exception as e:
                 await session.rollback()
@@ -960,6 +1170,13 @@ class Mutation:
     criarCurso: CursoType = strawberry.field(resolver=criar_curso)
     criarPlataforma: PlataformaType = strawberry.field(resolver=criar_plataforma)
     criarEstagio: EstagioType = strawberry.field(resolver=criar_estagio)
+    criarProfessores: ResultadoLote[ProfessorType] = strawberry.field(resolver=criar_professores)
+    criarBolsas: ResultadoLote[BolsaType] = strawberry.field(resolver=criar_bolsas)
+    criarEnderecos: ResultadoLote[EnderecoType] = strawberry.field(resolver=criar_enderecos)
+    criarEmpresas: ResultadoLote[EmpresaType] = strawberry.field(resolver=criar_empresas)
+    criarCursos: ResultadoLote[CursoType] = strawberry.field(resolver=criar_cursos)
+    criarPlataformas: ResultadoLote[PlataformaType] = strawberry.field(resolver=criar_plataformas)
+    criarEstagios: ResultadoLote[EstagioType] = strawberry.field(resolver=criar_estagios)
     updateBolsa: BolsaType = strawberry.field(resolver=update_bolsa)
     updateCurso: CursoType = strawberry.field(resolver=update_curso)
     updateEmpresa: EmpresaType = strawberry.field(resolver=update_empresa)
@@ -976,4 +1193,35 @@ class Mutation:
     deleteProfessor: MensagemInput = strawberry.field(resolver=delete_elementos(Professor))
 
 
-schema = strawberry.federation.Schema(query=Query, mutation=Mutation)
\ No newline at end of file
+#as subscriptions (pelo WebSocket do mesmo /graphql) recebem as oportunidades criadas e alteradas pelas mutations,
+#inclusive as de outros workers, que chegam pelo barramento
+transmissor = Transmissor({
+    "curso": (Curso, CursoType),
+    "estagio": (Estagio, EstagioType),
+    "bolsa": (Bolsa, BolsaType),
+}, get_loaders)
+ouvir(transmissor.alteracao)
+
+async def nova_oportunidade(vertente: Optional[str] = None) -> AsyncGenerator[Oportunidade, None]:
+    async for oportunidade in transmissor.assinar("nova", vertente):
+        yield oportunidade
+
+async def oportunidade_atualizada() -> AsyncGenerator[Oportunidade, None]:
+    async for oportunidade in transmissor.assinar("atualizada"):
+        yield oportunidade
+
+@strawberry.type
+class Subscription:
+    novaOportunidade: Oportunidade = strawberry.subscription(resolver=nova_oportunidade)
+    oportunidadeAtualizada: Oportunidade = strawberry.subscription(resolver=oportunidade_atualizada)
+
+
+#a execução incremental habilita as diretivas @defer e @stream (respostas em multipart)
+schema = strawberry.federation.Schema(
+    query=Query,
+    mutation=Mutation,
+    subscription=Subscription,
+    extensions=[MetricasGraphQL, CacheDeDocumentos, AnaliseDeCusto, RoteamentoLeitura, SessaoCompartilhada, CacheHTTP, CacheDeResposta],
+    config=StrawberryConfig(enable_experimental_incremental_execution=True),
+    execution_context_class=ExecucaoCompartilhada,
+)
\ No newline at end of file
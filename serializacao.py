@@ -0,0 +1,20 @@
+import json
+import os
+
+#serializador das respostas: "json" (padrão, biblioteca padrão) ou "orjson" (mais rápido, precisa do pacote orjson)
+SERIALIZADOR_JSON = os.getenv("SERIALIZADOR_JSON", "json")
+
+if SERIALIZADOR_JSON == "orjson":
+    try:
+        import orjson
+    except ImportError:
+        raise Exception("SERIALIZADOR_JSON=orjson precisa do pacote orjson (pip install orjson)")
+elif SERIALIZADOR_JSON != "json":
+    raise Exception(f"Serializador JSON desconhecido: {SERIALIZADOR_JSON}")
+
+
+#o orjson devolve bytes e já sabe escrever date/datetime em ISO 8601, como o DateScalar
+def codificar_json(dados):
+    if SERIALIZADOR_JSON == "orjson":
+        return orjson.dumps(dados)
+    return json.dumps(dados, separators=(",", ":"))
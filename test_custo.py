@@ -0,0 +1,33 @@
+import os
+
+os.environ.setdefault("DATABASE", "sqlite+aiosqlite://")
+
+from graphql import parse
+from graphql.utilities import get_operation_ast
+from custo import CalculoDeCusto
+from paginacao import PAGINA_PADRAO
+from schema import schema
+
+
+def custo_de(query: str, variaveis=None):
+    graphql_schema = schema._schema
+    documento = parse(query)
+    operacao = get_operation_ast(documento)
+    calculo = CalculoDeCusto(graphql_schema, documento, operacao, variaveis)
+    return calculo.calcular(graphql_schema.get_root_type(operacao.operation), operacao.selection_set)[0]
+
+
+#sem first/last a Connection devolve a página padrão, então custa o mesmo que pedir first: PAGINA_PADRAO
+def test_connection_sem_first_usa_pagina_padrao():
+    sem_first = custo_de("{ estagios { edges { node { id empresa { nome } } } } }")
+    com_first = custo_de(f"{{ estagios(first: {PAGINA_PADRAO}) {{ edges {{ node {{ id empresa {{ nome }} }} }} }} }}")
+    assert sem_first == com_first
+    assert sem_first > PAGINA_PADRAO
+
+def test_first_e_last_definem_o_multiplicador():
+    assert custo_de("{ estagios(first: 5) { edges { node { id } } } }") == 5 + 5 * 2
+    assert custo_de("query($n: Int) { cursos(first: $n) { edges { node { id } } } }", {"n": 3}) == 3 + 3 * 2
+
+def test_outras_connections_sem_first():
+    for campo in ("cursos", "oportunidades"):
+        assert custo_de(f"{{ {campo} {{ edges {{ cursor }} }} }}") == PAGINA_PADRAO * 2
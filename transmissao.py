@@ -0,0 +1,166 @@
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import select
+from strawberry.schema.schema import StrawberryGraphQLCoreExecutionContext
+from database_config import get_session
+from dataloaders import loaders_atuais
+from projecao import colunas_do_tipo, converter_linhas
+
+logger = logging.getLogger("transmissao")
+
+#eventos guardados por filtro; um assinante que ficar mais que isso para trás perde os mais antigos
+TAMANHO_FILA = int(os.getenv("TRANSMISSAO_FILA", "100"))
+
+#resultados já executados do evento que o assinante atual está recebendo: (operação, variáveis) -> resultado
+resultados_atuais = ContextVar("resultados_atuais", default=None)
+
+
+#os eventos de um filtro ficam numa fila só, compartilhada por todos os assinantes dele: publicar não depende
+#de quantos assinantes existem, e cada assinante só guarda a posição do último evento que leu
+class Canal:
+    def __init__(self):
+        self.eventos = deque(maxlen=TAMANHO_FILA)   #(sequência, objeto, loaders, resultados)
+        self.sequencia = 0
+        self.sinal = asyncio.Event()
+        self.assinantes = 0
+
+    def publicar(self, objeto, loaders, resultados):
+        self.sequencia += 1
+        self.eventos.append((self.sequencia, objeto, loaders, resultados))
+        sinal, self.sinal = self.sinal, asyncio.Event()
+        sinal.set()
+
+
+#transmissor único das subscriptions: cada alteração é lida do banco uma vez só (e não uma vez por conexão),
+#convertida para o tipo do GraphQL e publicada no canal de cada filtro (evento, vertente) que tem assinantes;
+#os campos aninhados (ex: empresa) usam dataloaders novos a cada lote, compartilhados por todos os assinantes,
+#então cada relação é lida uma vez por lote e nunca vem de um cache antigo da conexão; e a seleção de cada evento
+#roda uma vez por documento e variáveis, não uma vez por conexão (ver ExecucaoCompartilhada)
+class Transmissor:
+    def __init__(self, tipos: dict, criar_loaders):
+        self.tipos = tipos             #tabela -> (Model, Type)
+        self.criar_loaders = criar_loaders
+        self.canais = {}               #(evento, vertente) -> Canal
+        self.pendentes = {}            #tabela -> {id: evento}
+        self.agendado = False
+        self.eventos = 0
+        self.entregas = 0
+        self.descartados = 0
+
+    def quantidade_assinantes(self, evento: Optional[str] = None):
+        return sum(canal.assinantes for (nome, _), canal in self.canais.items() if evento is None or nome == evento)
+
+    async def assinar(self, evento: str, vertente: Optional[str] = None):
+        chave = (evento, vertente)
+        canal = self.canais.get(chave)
+        if canal is None:
+            canal = self.canais[chave] = Canal()
+        canal.assinantes += 1
+        posicao = canal.sequencia
+        try:
+            while True:
+                if canal.sequencia == posicao:
+                    await canal.sinal.wait()
+                for sequencia, objeto, loaders, resultados in list(canal.eventos):
+                    if sequencia <= posicao:
+                        continue
+                    #os eventos que saíram da fila antes de serem lidos foram perdidos por este assinante
+                    self.descartados += sequencia - posicao - 1
+                    posicao = sequencia
+                    self.entregas += 1
+                    #a execução da seleção do evento roda nesta mesma tarefa, logo depois do yield
+                    loaders_atuais.set(loaders)
+                    resultados_atuais.set(resultados)
+                    yield objeto
+        finally:
+            canal.assinantes -= 1
+            if canal.assinantes == 0 and self.canais.get(chave) is canal:
+                del self.canais[chave]
+
+    #ouvinte do eventos.py; as alterações do mesmo instante (ex: uma criação em lote) são lidas juntas
+    def alteracao(self, alteracao):
+        evento = {"criar": "nova", "atualizar": "atualizada"}.get(alteracao.acao)
+        if evento is None or alteracao.id is None or alteracao.tabela not in self.tipos:
+            return
+        if not self.quantidade_assinantes(evento):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        self.pendentes.setdefault(alteracao.tabela, {})[alteracao.id] = evento
+        if not self.agendado:
+            self.agendado = True
+            loop.create_task(self.entregar())
+
+    async def entregar(self):
+        await asyncio.sleep(0)
+        pendentes, self.pendentes, self.agendado = self.pendentes, {}, False
+        loaders = self.criar_loaders()
+        try:
+            async with get_session(primario=True, propria=True) as session:
+                for tabela, eventos in pendentes.items():
+                    model_class, tipo = self.tipos[tabela]
+                    colunas = colunas_do_tipo(model_class, tipo)
+                    converter = converter_linhas(tipo, colunas)
+                    resultado = await session.execute(select(*colunas).where(model_class.id.in_(list(eventos))))
+                    for row in resultado:
+                        self.distribuir(eventos[row.id], converter(row), loaders)
+        except Exception as e:
+            logger.warning("Erro lendo as alterações para as subscriptions: %s", e)
+
+    def distribuir(self, evento: str, objeto, loaders=None):
+        self.eventos += 1
+        vertente = getattr(objeto, "vertente", None)
+        chaves = [(evento, None)] + ([(evento, vertente)] if vertente is not None else [])
+        loaders = loaders if loaders is not None else self.criar_loaders()
+        #os dois canais recebem o mesmo objeto, então a mesma seleção também serve para os dois
+        resultados = {}
+        for chave in chaves:
+            canal = self.canais.get(chave)
+            if canal is not None:
+                canal.publicar(objeto, loaders, resultados)
+
+    def estatisticas(self):
+        return {
+            "assinantes": self.quantidade_assinantes(),
+            "filtros": len(self.canais),
+            "eventos": self.eventos,
+            "entregas": self.entregas,
+            "descartados": self.descartados,
+        }
+
+
+#executor do graphql-core usado pelo schema: nas subscriptions, a seleção de cada evento é executada uma vez só para
+#cada documento e variáveis, e o resultado é entregue a todos os assinantes que pediram a mesma coisa; o documento
+#de um mesmo texto é sempre o mesmo objeto (ver CacheDeDocumentos), então a operação serve de chave
+class ExecucaoCompartilhada(StrawberryGraphQLCoreExecutionContext):
+    evento = False
+
+    def build_per_event_executor(self, payload):
+        executor = super().build_per_event_executor(payload)
+        executor.evento = True
+        return executor
+
+    def execute_operation(self, serially=None):
+        resultados = resultados_atuais.get() if self.evento else None
+        if resultados is None:
+            return super().execute_operation(serially)
+
+        chave = (self.operation, json.dumps(self.variable_values.coerced, sort_keys=True, default=str))
+        resultado = resultados.get(chave)
+        if resultado is None:
+            resultado = super().execute_operation(serially)
+            if self.is_awaitable(resultado):
+                resultado = asyncio.ensure_future(resultado)
+            resultados[chave] = resultado
+        if isinstance(resultado, asyncio.Future):
+            #o shield impede que um assinante desconectando cancele a execução que os outros estão esperando
+            return asyncio.shield(resultado)
+        return resultado